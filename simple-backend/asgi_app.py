@@ -0,0 +1,177 @@
+"""
+ASGI server for Agora Conversational AI
+
+An asyncio counterpart of local_server.py for many concurrent agent starts.
+Agora calls go through the non-blocking AsyncioTransport, so a slow join holds
+a coroutine and a socket instead of a worker thread. Serves the same
+/start-agent, /hangup-agent and /health responses as the Flask app (enforced
+by tests/test_contract.py); the other endpoints stay on local_server.py.
+
+    uvicorn asgi_app:app --port 8081
+
+This is a thin wrapper that:
+1. Loads .env file into environment
+2. Extracts parameters from the ASGI scope
+3. Calls core business logic (same as Flask and Lambda!)
+4. Returns the JSON response
+"""
+
+import json
+import logging
+import urllib.parse
+
+from dotenv import find_dotenv, load_dotenv
+
+# Variables set in the shell take precedence over .env, as in local_server.py
+load_dotenv(find_dotenv(usecwd=True))  # Load .env file before importing core modules
+
+from core.agent import hangup_agent_async, hangup_channel_async, send_agent_to_channel_once_async  # noqa: E402
+from core.config import get_constants  # noqa: E402
+from core.endpoints import health_response, join_and_mint_async, prepare_start, start_response  # noqa: E402
+from core.log import get_logger, log_event  # noqa: E402
+from core.metrics import StageTimer  # noqa: E402
+from core.transport import get_async_transport  # noqa: E402
+from core.warmup import warm_channel_pools, warm_up  # noqa: E402
+
+
+logger = get_logger("asgi")
+
+# Same CORS headers as local_server.after_request
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type,Authorization"),
+    (b"access-control-allow-methods", b"GET,PUT,POST,DELETE,OPTIONS"),
+]
+ALLOWED_METHODS = b"OPTIONS, GET, HEAD"
+
+
+def parse_query(scope):
+    """
+    Parses the query string like Flask's request.args.to_dict(): blank
+    values are kept and the first of repeated keys wins.
+    """
+    query_params = {}
+    query = scope.get("query_string", b"").decode("latin-1")
+    for key, value in urllib.parse.parse_qsl(query, keep_blank_values=True, errors="replace"):
+        query_params.setdefault(key, value)
+    return query_params
+
+
+def encode_json(body):
+    """Serializes body exactly as Flask's jsonify does (sorted keys, compact, newline)."""
+    return json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def send_response(send, status, body=b"", headers=(), content_type=b"application/json", head=False):
+    """Sends a complete HTTP response with the CORS headers."""
+    response_headers = [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]
+    response_headers.extend(headers)
+    response_headers.extend(CORS_HEADERS)
+    await send({"type": "http.response.start", "status": status, "headers": response_headers})
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+async def start_agent(query_params):
+    """
+    Start an agent and return connection details (see
+    local_server.start_agent for the query parameters).
+    """
+    timer = StageTimer()
+
+    # Look up the profile, mint tokens and render the payload
+    start = prepare_start(query_params, timer)
+
+    # Send agent to channel (concurrent starts for the same channel share one
+    # join), minting the tokens the payload did not need meanwhile
+    agent_response = None
+    if start.needs_join:
+        agent_response = await join_and_mint_async(start, lambda: send_agent_to_channel_once_async(
+            start.channel, start.agent_payload, start.constants))
+
+    status, body = start_response(start, agent_response)
+    return status, body, timer
+
+
+async def hangup_agent_route(query_params):
+    """
+    Disconnect an agent from the channel, by agent_id or channel (see
+    local_server.hangup_agent_route).
+    """
+    constants = get_constants(query_params.get('profile'))
+
+    if 'agent_id' in query_params:
+        hangup_response = await hangup_agent_async(query_params['agent_id'], constants)
+    elif query_params.get('channel'):
+        hangup_response = await hangup_channel_async(query_params['channel'], constants)
+    else:
+        return 400, {"error": "Missing agent_id or channel parameter"}, None
+
+    return 200, {"agent_response": hangup_response}, None
+
+
+async def health(query_params):
+    """Health check endpoint (see local_server.health)."""
+    status, body = health_response(query_params)
+    return status, body, None
+
+
+ROUTES = {
+    "/start-agent": start_agent,
+    "/hangup-agent": hangup_agent_route,
+    "/health": health,
+}
+
+
+async def lifespan(receive, send):
+    """
+    Warms the process at startup (profiles, token minters, payload templates
+    and warm channel pools) and closes idle upstream connections at shutdown.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Upstream connections belong to the event loop, so the first
+            # requests open them rather than the blocking warm-up
+            summary = warm_up(connections=0)
+            warm_channel_pools()
+            log_event(logger, logging.INFO, "ASGI app started", profiles=summary["profiles"])
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await get_async_transport().close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 3 application."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    route = ROUTES.get(scope["path"])
+    method = scope["method"]
+    if route is None:
+        await send_response(send, 404, encode_json({"error": "Not found"}))
+        return
+    if method == "OPTIONS":
+        await send_response(send, 200, headers=[(b"allow", ALLOWED_METHODS)], content_type=b"text/html; charset=utf-8")
+        return
+    if method not in ("GET", "HEAD"):
+        await send_response(send, 405, encode_json({"error": "Method not allowed"}), headers=[(b"allow", ALLOWED_METHODS)])
+        return
+
+    try:
+        status, body, timer = await route(parse_query(scope))
+    except Exception:
+        logger.exception("Unhandled error on %s", scope["path"])
+        await send_response(send, 500, encode_json({"error": "Internal server error"}))
+        return
+
+    headers = []
+    if timer is not None:
+        headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+        # Lets cross-origin pages read the timings (Resource Timing API)
+        headers.append((b"timing-allow-origin", b"*"))
+    await send_response(send, status, encode_json(body), headers, head=method == "HEAD")
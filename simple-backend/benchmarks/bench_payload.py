@@ -0,0 +1,74 @@
+"""
+Join payload throughput: create_agent_payload + json.dumps vs precompiled templates
+
+Usage:
+    python3 benchmarks/bench_payload.py [--seconds 2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.agent import create_agent_payload  # noqa: E402
+from core.config import compile_profile  # noqa: E402
+from core.templates import render_agent_payload  # noqa: E402
+
+ENV = {
+    "APP_ID": "abcdef1234567890abcdef1234567890",
+    "AGENT_AUTH_HEADER": "Basic abc",
+    "LLM_API_KEY": "sk-test",
+    "TTS_VENDOR": "elevenlabs",
+    "TTS_KEY": "tts-key",
+    "TTS_VOICE_ID": "voice",
+    "HEYGEN_API_KEY": "hg-key",
+    "AVATAR_ENABLED": "true",
+}
+TOKEN = "007eJxTYBBdsample" * 8
+
+
+def build_and_dump(constants, channel):
+    """The pre-template code path: build the dictionary, then serialize it."""
+    return json.dumps(create_agent_payload(channel, constants, {}, TOKEN), indent=2)
+
+
+def render(constants, channel):
+    return render_agent_payload(channel, constants, {}, TOKEN).json
+
+
+def measure(fn, constants, seconds):
+    """Calls fn repeatedly for about `seconds` and returns operations per second."""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for i in range(100):
+            fn(constants, f"channel{i}")
+        count += 100
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration per case")
+    args = parser.parse_args()
+
+    constants = compile_profile(None, ENV)
+    assert build_and_dump(constants, "check") == render(constants, "check")
+
+    results = {
+        "create_agent_payload + json.dumps": measure(build_and_dump, constants, args.seconds),
+        "render_agent_payload": measure(render, constants, args.seconds),
+    }
+
+    baseline = results["create_agent_payload + json.dumps"]
+    print(f"{'case':<38}{'ops/sec':>12}{'speedup':>10}")
+    for name, ops in results.items():
+        print(f"{name:<38}{ops:>12,.0f}{ops / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
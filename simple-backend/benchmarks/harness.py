@@ -0,0 +1,239 @@
+"""
+Shared measurement, reporting and baseline helpers for the benchmark suite
+
+measure() times individual calls with perf_counter_ns, so it reports latency
+percentiles as well as throughput, then makes a separate pass under
+tracemalloc to record the memory allocated per call. Results are plain
+dictionaries so they can be written to and compared against JSON baselines.
+"""
+
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Environment every case runs with (set before the core modules are imported,
+# since logging is configured on import)
+BENCH_ENV = {
+    "APP_ID": "abcdef1234567890abcdef1234567890",
+    "APP_CERTIFICATE": "fedcba0987654321fedcba0987654321",
+    "AGENT_AUTH_HEADER": "Basic YmVuY2g6YmVuY2g=",
+    "LLM_API_KEY": "sk-bench",
+    "TTS_VENDOR": "elevenlabs",
+    "TTS_KEY": "tts-key",
+    "TTS_VOICE_ID": "voice",
+    "RIME_API_KEY": "rime-key",
+    "DEEPGRAM_KEY": "deepgram-key",
+    "HEYGEN_API_KEY": "heygen-key",
+    "ANAM_API_KEY": "anam-key",
+    "ANAM_AVATAR_ID": "anam-avatar",
+    "ANAM_BETA_APP_ID": "0123456789abcdef0123456789abcdef",
+    # Profile used by the config cases
+    "BENCH_TTS_VENDOR": "openai",
+    "BENCH_DEFAULT_PROMPT": "You are a benchmark assistant.",
+    # Keep background work and logging out of the measurements
+    "WARM_POOL_SIZE": "0",
+    "METRICS_LOG": "false",
+    "LOG_LEVEL": "WARNING",
+    "DEBUG": "false",
+}
+
+PERCENTILES = (50, 95, 99)
+
+# Fields compared against a baseline: name -> True if higher is better. Tail
+# percentiles are reported but too noisy between runs to fail on.
+COMPARED_FIELDS = {"ops_per_sec": True, "p50_us": False}
+
+
+class Case:
+    """
+    One benchmarked operation.
+
+    Args:
+        name: Unique case name, e.g. "tokens/build_token_with_rtm"
+        fn: Callable taking the call index
+        setup: Optional callable run once before the case; its return value
+            is passed to teardown
+        teardown: Optional callable run once after the case
+    """
+
+    __slots__ = ("name", "fn", "setup", "teardown")
+
+    def __init__(self, name, fn, setup=None, teardown=None):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.teardown = teardown
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure_allocations(fn, calls=200):
+    """
+    Returns the mean bytes allocated per call (tracemalloc peak above the
+    level before the call), which counts short-lived garbage as well as
+    retained memory.
+    """
+    fn(0)
+    tracemalloc.start()
+    try:
+        total = 0
+        for i in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn(i)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / calls
+
+
+def measure(fn, seconds=1.0, min_calls=20, warmup=20, alloc_calls=200):
+    """
+    Calls fn(i) repeatedly for about `seconds` (and at least `min_calls`
+    times) and summarizes the per-call latencies.
+
+    Args:
+        fn: Callable taking the call index
+        seconds: Target measuring time
+        min_calls: Minimum number of timed calls
+        warmup: Untimed calls made first (caches, lazy imports)
+        alloc_calls: Calls made under tracemalloc (0 to skip)
+
+    Returns:
+        Dictionary with calls, ops_per_sec, mean_us, p50_us, p95_us, p99_us,
+        max_us and alloc_bytes
+    """
+    for i in range(warmup):
+        fn(i)
+
+    samples = []
+    clock = time.perf_counter_ns
+    gc.collect()
+    deadline = clock() + int(seconds * 1e9)
+    started = clock()
+    i = 0
+    while i < min_calls or clock() < deadline:
+        call_started = clock()
+        fn(i)
+        samples.append(clock() - call_started)
+        i += 1
+    elapsed = clock() - started
+
+    samples.sort()
+    result = {
+        "calls": len(samples),
+        "ops_per_sec": round(len(samples) / (elapsed / 1e9), 1),
+        "mean_us": round(sum(samples) / len(samples) / 1000, 2),
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_us"] = round(percentile(samples, pct) / 1000, 2)
+    result["max_us"] = round(samples[-1] / 1000, 2)
+    result["alloc_bytes"] = round(measure_allocations(fn, alloc_calls)) if alloc_calls else None
+    return result
+
+
+def run_cases(cases, seconds=1.0, pattern=None, **kwargs):
+    """
+    Measures every case whose name contains `pattern`.
+
+    Returns:
+        Dictionary of case name -> measure() result
+    """
+    results = {}
+    for case in cases:
+        if pattern and pattern not in case.name:
+            continue
+        state = case.setup() if case.setup else None
+        try:
+            results[case.name] = measure(case.fn, seconds, **kwargs)
+        finally:
+            if case.teardown:
+                case.teardown(state)
+    return results
+
+
+def environment():
+    """Describes the machine and interpreter, stored alongside baselines."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def save_baseline(path, results, seconds):
+    """Writes results and the environment they were measured in as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "seconds": seconds, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path):
+    """Reads a baseline written by save_baseline."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Compares results with a baseline's results.
+
+    Args:
+        results: Dictionary of case name -> measure() result
+        baseline: Loaded baseline (see load_baseline)
+        threshold: Relative change treated as a regression, e.g. 0.25 for 25%
+
+    Returns:
+        List of (case, field, baseline value, current value, relative change)
+        for every compared field that got worse by more than threshold
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for field, higher_is_better in COMPARED_FIELDS.items():
+            old, new = previous.get(field), current.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append((name, field, old, new, change))
+    return regressions
+
+
+def format_table(results, baseline=None, out=None):
+    """Prints results, with the ops/sec change against a baseline if given."""
+    out = out or sys.stdout
+    header = f"{'case':<62}{'ops/sec':>12}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'alloc B':>10}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header, file=out)
+    for name, r in results.items():
+        alloc = "-" if r["alloc_bytes"] is None else f"{r['alloc_bytes']:,}"
+        line = (f"{name:<62}{r['ops_per_sec']:>12,.0f}{r['p50_us']:>10,.1f}"
+                f"{r['p95_us']:>10,.1f}{r['p99_us']:>10,.1f}{alloc:>10}")
+        if baseline:
+            previous = baseline["results"].get(name)
+            if previous and previous.get("ops_per_sec"):
+                line += f"{r['ops_per_sec'] / previous['ops_per_sec'] - 1:>+10.0%}"
+            else:
+                line += f"{'new':>10}"
+        print(line, file=out)
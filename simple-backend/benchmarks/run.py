@@ -0,0 +1,64 @@
+"""
+Benchmark suite: tokens, join payloads, config loading and whole requests
+
+Reports ops/sec, latency percentiles and bytes allocated per call for each
+case. Results can be saved as a JSON baseline and later runs compared with
+it; the exit status is 1 if any case regressed by more than the threshold.
+
+Usage:
+    python3 benchmarks/run.py [--suite tokens] [--filter avatar] [--seconds 1]
+    python3 benchmarks/run.py --save benchmarks/baselines/local.json
+    python3 benchmarks/run.py --compare benchmarks/baselines/local.json [--threshold 0.25]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import BENCH_ENV, compare, format_table, load_baseline, run_cases, save_baseline  # noqa: E402
+
+# Before the core modules read their settings (logging is configured on import)
+os.environ.update(BENCH_ENV)
+
+from benchmarks.suites import SUITES  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="suite to run (repeatable; default: all)")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--seconds", type=float, default=1.0, help="measuring time per case")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown reported as a regression (default 0.25)")
+    args = parser.parse_args(argv)
+
+    cases = []
+    for name in args.suite or SUITES:
+        cases.extend(SUITES[name]())
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    results = run_cases(cases, seconds=args.seconds, pattern=args.filter)
+    format_table(results, baseline)
+
+    if args.save:
+        save_baseline(args.save, results, args.seconds)
+        print(f"\nSaved {len(results)} results to {args.save}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for name, field, old, new, change in regressions:
+                print(f"  {name} {field}: {old:,} -> {new:,} ({change:+.0%})")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Benchmark cases for token minting, payload building, config loading and
+whole requests
+
+Every case runs against BENCH_ENV and, for requests, an in-process upstream
+fake, so the numbers measure this backend's own CPU cost and do not depend on
+the network or on a real Agora project.
+"""
+
+import itertools
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import BENCH_ENV, Case  # noqa: E402
+from core.agent import create_agent_payload  # noqa: E402
+from core.config import compile_profile, get_constants, initialize_constants  # noqa: E402
+from core.templates import render_agent_payload  # noqa: E402
+from core.tokens import AccessToken, ServiceRtc, ServiceRtm, build_token_with_rtm  # noqa: E402
+from core.transport import Response, Transport  # noqa: E402
+
+
+TTS_VENDORS = ("elevenlabs", "openai", "cartesia", "rime")
+ASR_VENDORS = ("ares", "deepgram")
+AVATAR_VENDORS = (None, "heygen", "anam")
+
+TOKEN = "007eJxTYBBdsample" * 8
+EXPIRE = 24 * 3600
+
+
+class UpstreamFake(Transport):
+    """In-process stand-in for the Agora join and leave endpoints."""
+
+    def __init__(self):
+        self._ids = itertools.count()
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        return Response(200, {}, b'{"agent_id": "bench_%d", "status": "RUNNING"}' % next(self._ids))
+
+
+def access_token_build(channel, uid, app_id=BENCH_ENV["APP_ID"], certificate=BENCH_ENV["APP_CERTIFICATE"]):
+    """A fresh AccessToken per call, as build_token_with_rtm did before TokenMinter."""
+    token = AccessToken(app_id, certificate)
+    rtc_service = ServiceRtc(channel, uid)
+    rtc_service.add_privilege(ServiceRtc.kPrivilegeJoinChannel, EXPIRE)
+    rtc_service.add_privilege(ServiceRtc.kPrivilegePublishAudioStream, EXPIRE)
+    rtc_service.add_privilege(ServiceRtc.kPrivilegePublishVideoStream, EXPIRE)
+    rtc_service.add_privilege(ServiceRtc.kPrivilegePublishDataStream, EXPIRE)
+    token.add_service(rtc_service)
+    rtm_service = ServiceRtm(uid)
+    rtm_service.add_privilege(ServiceRtm.kPrivilegeLogin, EXPIRE)
+    token.add_service(rtm_service)
+    return token.build()
+
+
+def vendor_params(tts, asr, avatar):
+    """Query parameters selecting one TTS/ASR/avatar combination."""
+    params = {"tts_vendor": tts, "asr_vendor": asr, "avatar_enabled": "true" if avatar else "false"}
+    if avatar:
+        params["avatar_vendor"] = avatar
+    return params
+
+
+def token_cases():
+    constants = compile_profile(None, BENCH_ENV)
+    return [
+        Case("tokens/AccessToken.build", lambda i: access_token_build(f"channel{i}", "101")),
+        Case("tokens/build_token_with_rtm", lambda i: build_token_with_rtm(f"channel{i}", "101", constants)),
+    ]
+
+
+def payload_cases():
+    constants = compile_profile(None, BENCH_ENV)
+    cases = []
+    for tts, asr, avatar in itertools.product(TTS_VENDORS, ASR_VENDORS, AVATAR_VENDORS):
+        params = vendor_params(tts, asr, avatar)
+        cases.append(Case(
+            f"payload/create_agent_payload[{tts},{asr},{avatar or 'no-avatar'}]",
+            lambda i, params=params: create_agent_payload(f"channel{i}", constants, params, TOKEN)))
+    cases.append(Case("payload/render_agent_payload",
+                      lambda i: render_agent_payload(f"channel{i}", constants, {}, TOKEN)))
+    return cases
+
+
+def config_cases():
+    return [
+        Case("config/initialize_constants", lambda i: initialize_constants()),
+        Case("config/initialize_constants[profile]", lambda i: initialize_constants("bench")),
+        Case("config/get_constants[profile]", lambda i: get_constants("bench")),
+    ]
+
+
+def _patch_upstream():
+    import core.config
+    import core.transport
+    previous = core.transport._default_transport
+    core.transport._default_transport = UpstreamFake()
+    core.config._registry = None  # compile profiles from BENCH_ENV
+    return previous
+
+
+def _restore_upstream(previous):
+    import core.transport
+    core.transport._default_transport = previous
+
+
+def handler_cases():
+    """
+    Whole /start-agent requests through lambda_handler and the Flask test
+    client. Each call uses a new channel, so tokens are minted every time.
+    """
+    from lambda_handler import lambda_handler
+    from local_server import app
+
+    client = app.test_client()
+    channels = itertools.count()
+    requests = {
+        "connect=false": {"connect": "false"},
+        "connect=true": {},
+        "connect=true,avatar": {"avatar_enabled": "true", "avatar_vendor": "heygen"},
+    }
+
+    def lambda_call(params):
+        return lambda i: lambda_handler(
+            {"queryStringParameters": dict(params, channel=f"lambda{next(channels)}")}, None)
+
+    def flask_call(params):
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return lambda i: client.get(f"/start-agent?channel=flask{next(channels)}&{query}")
+
+    cases = []
+    for label, params in requests.items():
+        cases.append(Case(f"handlers/lambda_handler[{label}]", lambda_call(params),
+                          setup=_patch_upstream, teardown=_restore_upstream))
+    for label, params in requests.items():
+        cases.append(Case(f"handlers/flask_start_agent[{label}]", flask_call(params),
+                          setup=_patch_upstream, teardown=_restore_upstream))
+    return cases
+
+
+SUITES = {
+    "tokens": token_cases,
+    "payload": payload_cases,
+    "config": config_cases,
+    "handlers": handler_cases,
+}
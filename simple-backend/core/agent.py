@@ -3,10 +3,23 @@ Agent payload building and API communication for Agora ConvoAI
 """
 
 import json
-import http.client
+import logging
+import time
 import urllib.parse
 from collections import OrderedDict
 
+from core.breaker import CircuitOpenError, get_breaker
+from core.config import parse_bool, resolve_setting
+from core.log import get_logger, log_event, log_payload
+from core.recorder import get_recorder
+from core.retry import retry_policy_for
+from core.sessions import get_sessions
+from core.singleflight import get_start_flights
+from core.transport import Response, get_transport, get_async_transport
+
+
+logger = get_logger("agent")
+
 
 def build_tts_config(tts_vendor, constants, query_params=None):
     """
@@ -35,8 +48,8 @@ def build_tts_config(tts_vendor, constants, query_params=None):
             "key": constants["TTS_KEY"],
             "model_id": query_params.get('tts_model', constants["ELEVENLABS_MODEL"]),
             "voice_id": voice_id,
-            "stability": float(query_params.get('voice_stability', constants["ELEVENLABS_STABILITY"])),
-            "sample_rate": int(query_params.get('sample_rate', constants["TTS_SAMPLE_RATE"]))
+            "stability": resolve_setting(query_params, 'voice_stability', constants, "ELEVENLABS_STABILITY"),
+            "sample_rate": resolve_setting(query_params, 'sample_rate', constants, "TTS_SAMPLE_RATE")
         }
 
     elif tts_vendor == "openai":
@@ -45,14 +58,14 @@ def build_tts_config(tts_vendor, constants, query_params=None):
             "model": query_params.get('tts_model', constants["OPENAI_TTS_MODEL"]),
             "voice": query_params.get('voice_id', constants["OPENAI_TTS_VOICE"]),
             "response_format": "pcm",
-            "speed": float(query_params.get('voice_speed', constants["TTS_SPEED"]))
+            "speed": resolve_setting(query_params, 'voice_speed', constants, "TTS_SPEED")
         }
 
     elif tts_vendor == "cartesia":
         tts_config["params"] = {
             "api_key": constants["TTS_KEY"],
             "model_id": query_params.get('tts_model', constants["CARTESIA_MODEL"]),
-            "sample_rate": int(query_params.get('sample_rate', constants["TTS_SAMPLE_RATE"])),
+            "sample_rate": resolve_setting(query_params, 'sample_rate', constants, "TTS_SAMPLE_RATE"),
             "voice": {
                 "mode": "id",
                 "id": query_params.get('voice_id', constants["CARTESIA_VOICE_ID"])
@@ -65,8 +78,8 @@ def build_tts_config(tts_vendor, constants, query_params=None):
             "speaker": query_params.get('rime_speaker', constants["RIME_SPEAKER"]),
             "modelId": query_params.get('rime_model_id', constants["RIME_MODEL_ID"]),
             "lang": query_params.get('rime_lang', constants["RIME_LANG"]),
-            "samplingRate": int(query_params.get('rime_sampling_rate', constants["RIME_SAMPLING_RATE"])),
-            "speedAlpha": float(query_params.get('rime_speed_alpha', constants["RIME_SPEED_ALPHA"]))
+            "samplingRate": resolve_setting(query_params, 'rime_sampling_rate', constants, "RIME_SAMPLING_RATE"),
+            "speedAlpha": resolve_setting(query_params, 'rime_speed_alpha', constants, "RIME_SPEED_ALPHA")
         }
     else:
         raise ValueError(f"Unsupported TTS vendor: {tts_vendor}")
@@ -141,7 +154,7 @@ def build_avatar_config(avatar_enabled, avatar_vendor, constants, channel, agent
                 "agora_token": agent_video_token,
                 "agora_channel": channel,
                 "agora_uid": constants["AGENT_VIDEO_UID"],
-                "activity_idle_timeout": int(query_params.get('heygen_idle_timeout', constants["HEYGEN_ACTIVITY_IDLE_TIMEOUT"]))
+                "activity_idle_timeout": resolve_setting(query_params, 'heygen_idle_timeout', constants, "HEYGEN_ACTIVITY_IDLE_TIMEOUT")
             }
         }
     elif avatar_vendor == "anam":
@@ -204,10 +217,10 @@ def create_agent_payload(channel, constants, query_params=None, agent_video_toke
     failure_message = query_params.get('failure_message', constants["DEFAULT_FAILURE_MESSAGE"])
 
     # Get other settings
-    max_history = int(query_params.get('max_history', constants["MAX_HISTORY"]))
-    idle_timeout = int(query_params.get('idle_timeout', constants["IDLE_TIMEOUT"]))
-    vad_silence_duration = int(query_params.get('vad_silence_duration_ms', constants["VAD_SILENCE_DURATION_MS"]))
-    enable_aivad = query_params.get('enable_aivad', constants["ENABLE_AIVAD"]).lower() == "true"
+    max_history = resolve_setting(query_params, 'max_history', constants, "MAX_HISTORY")
+    idle_timeout = resolve_setting(query_params, 'idle_timeout', constants, "IDLE_TIMEOUT")
+    vad_silence_duration = resolve_setting(query_params, 'vad_silence_duration_ms', constants, "VAD_SILENCE_DURATION_MS")
+    enable_aivad = resolve_setting(query_params, 'enable_aivad', constants, "ENABLE_AIVAD")
 
     # Build LLM configuration
     llm_config = {
@@ -229,7 +242,7 @@ def create_agent_payload(channel, constants, query_params=None, agent_video_toke
     }
 
     # Get avatar settings early to determine remote_rtc_uids and token
-    avatar_enabled = query_params.get('avatar_enabled', constants["AVATAR_ENABLED"]).lower() == "true"
+    avatar_enabled = resolve_setting(query_params, 'avatar_enabled', constants, "AVATAR_ENABLED")
     avatar_vendor = query_params.get('avatar_vendor', constants["AVATAR_VENDOR"])
 
     # Determine token value
@@ -311,22 +324,30 @@ def create_agent_payload(channel, constants, query_params=None, agent_video_toke
     return payload
 
 
-def send_agent_to_channel(channel, agent_payload, constants):
+def build_join_request(channel, agent_payload, constants):
     """
-    Sends an agent to the specified Agora RTC channel by calling the REST API.
+    Builds the join request for the Agora ConvoAI REST API.
 
     Args:
         channel: The channel name
-        agent_payload: The complete agent payload to send
+        agent_payload: The complete agent payload dictionary, or a
+            RenderedPayload from core.templates
         constants: Dictionary of constants
 
     Returns:
-        Dictionary with the status code, response body, and success flag
+        Tuple of (url, body, headers)
     """
+    if isinstance(agent_payload, dict):
+        payload_json = json.dumps(agent_payload, indent=2)
+        avatar_vendor = agent_payload.get("properties", {}).get("avatar", {}).get("vendor")
+        advanced_features = agent_payload['properties']['advanced_features']
+    else:
+        payload_json = agent_payload.json
+        avatar_vendor = agent_payload.avatar_vendor
+        advanced_features = agent_payload.advanced_features
+
     # Check if using Anam BETA avatar
-    is_anam_beta = (
-        agent_payload.get("properties", {}).get("avatar", {}).get("vendor") == "anam"
-    )
+    is_anam_beta = avatar_vendor == "anam"
 
     if is_anam_beta:
         # Use BETA endpoint for Anam avatar
@@ -338,117 +359,539 @@ def send_agent_to_channel(channel, agent_payload, constants):
         beta_creds = constants.get("ANAM_BETA_CREDENTIALS")
         import base64
         auth_header = "Basic " + base64.b64encode(beta_creds.encode()).decode()
-
-        print(f"🎭 Using Anam BETA endpoint: {agent_api_url}")
     else:
         # Use regular endpoint
         agent_api_url = f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/join"
         auth_header = constants["AGENT_AUTH_HEADER"]
 
-    url_parts = urllib.parse.urlparse(agent_api_url)
-    host = url_parts.netloc
-    path = url_parts.path
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": auth_header
+    }
+
+    log_event(logger, logging.INFO, "Sending agent to Agora ConvoAI", channel=channel, url=agent_api_url,
+              anam_beta=is_anam_beta, enable_rtm=advanced_features['enable_rtm'],
+              enable_bhvs=advanced_features['enable_bhvs'])
+
+    log_payload(logger, "Join payload", payload_json, channel=channel)
+
+    return agent_api_url, payload_json, headers
+
+
+def build_hangup_request(agent_id, constants):
+    """
+    Builds the leave request for the Agora ConvoAI REST API.
 
-    conn = http.client.HTTPSConnection(host, timeout=30)
+    Args:
+        agent_id: The unique identifier for the agent to hang up
+        constants: Dictionary of constants
+
+    Returns:
+        Tuple of (url, body, headers)
+    """
+    hangup_api_url = f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/agents/{agent_id}/leave"
 
     headers = {
         "Content-Type": "application/json",
-        "Authorization": auth_header
+        "Authorization": constants["AGENT_AUTH_HEADER"]
     }
 
-    payload_json = json.dumps(agent_payload, indent=2)
-
-    print(f"Sending agent to Agora ConvoAI:")
-    print(f"URL: {agent_api_url}")
-    print(f"🔧 enable_rtm: {agent_payload['properties']['advanced_features']['enable_rtm']}")
-    print(f"🔧 enable_bhvs: {agent_payload['properties']['advanced_features']['enable_bhvs']}")
-
-    # Optional curl dump (disabled by default to avoid exposing API keys)
-    enable_curl_dump = constants.get("ENABLE_CURL_DUMP", "false").lower() == "true"
-
-    if enable_curl_dump:
-        # Print equivalent curl command for debugging
-        payload_compact = json.dumps(agent_payload)
-        curl_cmd = f"curl -X POST '{agent_api_url}' \\\n  -H 'Authorization: {auth_header}' \\\n  -H 'Content-Type: application/json' \\\n  -d '{payload_compact}'"
-        print(f"\n📋 Equivalent curl command:\n{curl_cmd}\n")
-
-        # Write curl command to file with timestamp
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        curl_file_path = f"/tmp/agora_curl_{timestamp}.sh"
-
-        # Write prettified version to file
-        payload_pretty = json.dumps(agent_payload, indent=2)
-        curl_file_content = f"""#!/bin/bash
-# Agora ConvoAI Request
-# Timestamp: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-# Channel: {channel}
-
-curl -X POST '{agent_api_url}' \\
-  -H 'Authorization: {auth_header}' \\
-  -H 'Content-Type: application/json' \\
-  -d '{payload_pretty}'
-"""
+    return hangup_api_url, "", headers
 
-        with open(curl_file_path, 'w') as f:
-            f.write(curl_file_content)
 
-        print(f"📝 Curl command saved to: {curl_file_path}")
+def agent_result(response):
+    """
+    Converts a transport response into the agent result dictionary.
 
-    print(f"Payload: {payload_json}")
+    Args:
+        response: Response with status and body bytes
 
-    conn.request("POST", path, payload_json, headers)
+    Returns:
+        Dictionary with the status code, response body, and success flag
+    """
+    return {
+        "status_code": response.status,
+        "response": response.body.decode('utf-8'),
+        "success": response.status == 200
+    }
 
-    response = conn.getresponse()
-    status_code = response.status
-    response_text = response.read().decode('utf-8')
 
-    print(f"Response status: {status_code}")
-    print(f"Response body: {response_text}")
+def _recording_enabled(constants):
+    enabled = getattr(constants, "enable_curl_dump", None)
+    if enabled is None:
+        enabled = parse_bool(constants.get("ENABLE_CURL_DUMP") or "false")
+    return enabled
 
-    conn.close()
 
+def _record(method, url, body, headers, channel, started, response=None, error=None):
+    get_recorder().record(
+        method, url, headers, body, channel=channel,
+        status=response.status if response is not None else None,
+        response=response.body.decode('utf-8', 'replace') if response is not None else None,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        error=f"{type(error).__name__}: {error}" if error is not None else None
+    )
+
+
+def _log_retry(url, channel, attempt, delay, response, error):
+    log_event(logger, logging.WARNING, "Retrying Agora request", url=url, channel=channel, attempt=attempt,
+              status=response.status if response is not None else None,
+              error=f"{type(error).__name__}: {error}" if error is not None else None,
+              delay_s=round(delay, 3))
+
+
+def _attempt(transport, method, url, body, headers, timeout, record, channel):
+    """
+    One request through a blocking transport, gated by the upstream's circuit
+    breaker and recorded when record is set.
+
+    Raises:
+        CircuitOpenError: If the upstream's circuit is open
+    """
+    breaker = get_breaker(url)
+    breaker.allow()
+    started = time.perf_counter()
+    try:
+        response = transport.request(method, url, body, headers, timeout=timeout)
+    except Exception as e:
+        breaker.record(False, time.perf_counter() - started)
+        if record:
+            _record(method, url, body, headers, channel, started, error=e)
+        raise
+    except BaseException:
+        # Interrupted: not the upstream's fault, but free a half-open probe slot
+        breaker.release()
+        raise
+    breaker.record(response.status < 500, time.perf_counter() - started)
+    if record:
+        _record(method, url, body, headers, channel, started, response=response)
+    return response
+
+
+async def _attempt_async(transport, method, url, body, headers, timeout, record, channel):
+    """Async counterpart of _attempt."""
+    breaker = get_breaker(url)
+    breaker.allow()
+    started = time.perf_counter()
+    try:
+        response = await transport.request_async(method, url, body, headers, timeout=timeout)
+    except Exception as e:
+        breaker.record(False, time.perf_counter() - started)
+        if record:
+            _record(method, url, body, headers, channel, started, error=e)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record(response.status < 500, time.perf_counter() - started)
+    if record:
+        _record(method, url, body, headers, channel, started, response=response)
+    return response
+
+
+def _post(transport, url, body, headers, constants, channel=None):
+    """
+    POSTs through a blocking transport under the profile's retry policy,
+    recording each attempt when ENABLE_CURL_DUMP is on.
+
+    Returns:
+        Tuple of (response, attempts)
+    """
+    record = _recording_enabled(constants)
+    return retry_policy_for(constants).run(
+        lambda timeout: _attempt(transport, "POST", url, body, headers, timeout, record, channel),
+        on_retry=lambda *args: _log_retry(url, channel, *args))
+
+
+async def _post_async(transport, url, body, headers, constants, channel=None):
+    """Async counterpart of _post."""
+    record = _recording_enabled(constants)
+    return await retry_policy_for(constants).run_async(
+        lambda timeout: _attempt_async(transport, "POST", url, body, headers, timeout, record, channel),
+        on_retry=lambda *args: _log_retry(url, channel, *args))
+
+
+def build_list_request(join_url, channel, headers):
+    """
+    Builds the request listing running agents on a channel, used to find the
+    agent created by an earlier attempt of a retried join.
+
+    Args:
+        join_url: The .../{appid}/join URL the join was sent to
+        channel: The channel name
+        headers: The join request headers
+
+    Returns:
+        Tuple of (url, headers)
+    """
+    base = join_url[:-len("/join")]
+    query = urllib.parse.urlencode({"channel": channel, "state": 2})
+    return f"{base}/agents?{query}", {"Authorization": headers["Authorization"]}
+
+
+def existing_agent_response(response, channel):
+    """
+    Turns a list-agents response into a join-style 200 response for the most
+    recently started agent on the channel.
+
+    Args:
+        response: Response from the list request
+        channel: The channel name
+
+    Returns:
+        Response, or None if no running agent was found
+    """
+    if response.status != 200:
+        return None
+    try:
+        agents = json.loads(response.body).get("data", {}).get("list", [])
+    except (ValueError, AttributeError):
+        return None
+    agents = [agent for agent in agents if agent.get("channel", channel) == channel and agent.get("agent_id")]
+    if not agents:
+        return None
+    agent = max(agents, key=lambda agent: agent.get("start_ts", 0))
+    body = json.dumps({
+        "agent_id": agent["agent_id"],
+        "create_ts": agent.get("start_ts"),
+        "status": agent.get("status", "RUNNING")
+    }).encode("utf-8")
+    return Response(200, {"Content-Type": "application/json"}, body)
+
+
+def _join_result(channel, response, attempts, recovered=None):
+    """
+    Builds the join result. A 409 on a retried join means an earlier attempt
+    already created the agent (the agent name is the channel), so the
+    existing agent is returned instead of a conflict.
+    """
+    result = agent_result(recovered or response)
+    if attempts > 1:
+        result["attempts"] = attempts
+    if recovered is not None:
+        result["recovered_existing_agent"] = True
+    _log_join_result(channel, result)
+    return result
+
+
+def circuit_open_result(error):
+    """
+    Builds the fast-fail result returned instead of calling an upstream whose
+    circuit is open.
+
+    Args:
+        error: The CircuitOpenError
+
+    Returns:
+        Dictionary shaped like agent_result with a 503 status
+    """
+    retry_after = round(error.retry_after, 1)
+    log_event(logger, logging.WARNING, "Circuit open, failing fast", upstream=error.upstream,
+              retry_after_s=retry_after)
     return {
-        "status_code": status_code,
-        "response": response_text,
-        "success": status_code == 200
+        "status_code": 503,
+        "response": json.dumps({"reason": "CircuitOpen", "upstream": error.upstream,
+                                "retry_after": retry_after}),
+        "success": False,
+        "circuit_open": True,
+        "retry_after": retry_after
     }
 
 
-def hangup_agent(agent_id, constants):
+def _hangup_result(agent_id, response, attempts):
+    """
+    Builds the leave result. A 404 on a retried leave means an earlier
+    attempt already stopped the agent.
+    """
+    result = agent_result(response)
+    if attempts > 1:
+        result["attempts"] = attempts
+        if response.status == 404:
+            result["success"] = True
+            result["already_stopped"] = True
+    if result["success"]:
+        get_sessions().remove(agent_id)
+    log_event(logger, logging.INFO, "Agent hangup", agent_id=agent_id, status=result["status_code"])
+    return result
+
+
+def _register_session(channel, agent_payload, constants, result):
+    """Adds a successful join to the session registry."""
+    try:
+        agent_id = json.loads(result["response"]).get("agent_id")
+    except (ValueError, AttributeError):
+        return
+    if not agent_id:
+        return
+    if isinstance(agent_payload, dict):
+        idle_timeout = agent_payload.get("properties", {}).get("idle_timeout")
+    else:
+        idle_timeout = agent_payload.idle_timeout
+    get_sessions().add(agent_id, channel, getattr(constants, "profile", None), idle_timeout)
+
+
+def _log_join_result(channel, result):
+    if result["success"]:
+        log_event(logger, logging.INFO, "Join response", channel=channel, status=result["status_code"])
+    else:
+        log_event(logger, logging.WARNING, "Join failed", channel=channel, status=result["status_code"],
+                  body=result["response"][:500])
+    log_payload(logger, "Join response body", result["response"], channel=channel)
+
+
+def send_agent_to_channel(channel, agent_payload, constants, transport=None):
+    """
+    Sends an agent to the specified Agora RTC channel by calling the REST API.
+
+    Args:
+        channel: The channel name
+        agent_payload: The complete agent payload dictionary or RenderedPayload
+        constants: Dictionary of constants
+        transport: Optional blocking transport (defaults to the shared pool)
+
+    Returns:
+        Dictionary with the status code, response body, and success flag
+    """
+    transport = transport or get_transport()
+    url, body, headers = build_join_request(channel, agent_payload, constants)
+    try:
+        response, attempts = _post(transport, url, body, headers, constants, channel)
+
+        recovered = None
+        if response.status == 409 and attempts > 1:
+            list_url, list_headers = build_list_request(url, channel, headers)
+            listed = _attempt(transport, "GET", list_url, None, list_headers,
+                              retry_policy_for(constants).attempt_timeout, _recording_enabled(constants), channel)
+            recovered = existing_agent_response(listed, channel)
+    except CircuitOpenError as e:
+        return circuit_open_result(e)
+    result = _join_result(channel, response, attempts, recovered)
+    if result["success"]:
+        _register_session(channel, agent_payload, constants, result)
+    return result
+
+
+def send_agent_to_channel_once(channel, agent_payload, constants, transport=None):
+    """
+    send_agent_to_channel with single-flight semantics: concurrent starts for
+    the same (profile, channel) share one join, and every caller receives its
+    result. Results shared with a caller that did not make the join are
+    marked coalesced.
+
+    Args:
+        channel: The channel name
+        agent_payload: The complete agent payload dictionary or RenderedPayload
+        constants: Dictionary of constants
+        transport: Optional blocking transport (defaults to the shared pool)
+
+    Returns:
+        Dictionary with the status code, response body, and success flag
+    """
+    result, shared = get_start_flights().do(
+        (getattr(constants, "profile", None), channel),
+        lambda: send_agent_to_channel(channel, agent_payload, constants, transport=transport))
+    return dict(result, coalesced=True) if shared else result
+
+
+async def send_agent_to_channel_once_async(channel, agent_payload, constants, transport=None):
+    """
+    Async counterpart of send_agent_to_channel_once.
+
+    Args:
+        channel: The channel name
+        agent_payload: The complete agent payload dictionary or RenderedPayload
+        constants: Dictionary of constants
+        transport: Optional transport (defaults to the running loop's AsyncioTransport)
+
+    Returns:
+        Dictionary with the status code, response body, and success flag
+    """
+    result, shared = await get_start_flights().do_async(
+        (getattr(constants, "profile", None), channel),
+        lambda: send_agent_to_channel_async(channel, agent_payload, constants, transport=transport))
+    return dict(result, coalesced=True) if shared else result
+
+
+async def send_agent_to_channel_async(channel, agent_payload, constants, transport=None):
+    """
+    Async counterpart of send_agent_to_channel.
+
+    Args:
+        channel: The channel name
+        agent_payload: The complete agent payload dictionary or RenderedPayload
+        constants: Dictionary of constants
+        transport: Optional transport (defaults to the running loop's AsyncioTransport)
+
+    Returns:
+        Dictionary with the status code, response body, and success flag
+    """
+    transport = transport or get_async_transport()
+    url, body, headers = build_join_request(channel, agent_payload, constants)
+    try:
+        response, attempts = await _post_async(transport, url, body, headers, constants, channel)
+
+        recovered = None
+        if response.status == 409 and attempts > 1:
+            list_url, list_headers = build_list_request(url, channel, headers)
+            listed = await _attempt_async(transport, "GET", list_url, None, list_headers,
+                                          retry_policy_for(constants).attempt_timeout,
+                                          _recording_enabled(constants), channel)
+            recovered = existing_agent_response(listed, channel)
+    except CircuitOpenError as e:
+        return circuit_open_result(e)
+    result = _join_result(channel, response, attempts, recovered)
+    if result["success"]:
+        _register_session(channel, agent_payload, constants, result)
+    return result
+
+
+def hangup_agent(agent_id, constants, transport=None):
     """
     Sends a hangup request to disconnect the agent.
 
     Args:
         agent_id: The unique identifier for the agent to hang up
         constants: Dictionary of constants
+        transport: Optional blocking transport (defaults to the shared pool)
 
     Returns:
         Dictionary with the status code, response body, and success flag
     """
-    hangup_api_url = f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/agents/{agent_id}/leave"
+    url, body, headers = build_hangup_request(agent_id, constants)
+    try:
+        response, attempts = _post(transport or get_transport(), url, body, headers, constants)
+    except CircuitOpenError as e:
+        return circuit_open_result(e)
+    return _hangup_result(agent_id, response, attempts)
 
-    url_parts = urllib.parse.urlparse(hangup_api_url)
-    host = url_parts.netloc
-    path = url_parts.path
 
-    conn = http.client.HTTPSConnection(host, timeout=30)
+async def hangup_agent_async(agent_id, constants, transport=None):
+    """
+    Async counterpart of hangup_agent.
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": constants["AGENT_AUTH_HEADER"]
-    }
+    Args:
+        agent_id: The unique identifier for the agent to hang up
+        constants: Dictionary of constants
+        transport: Optional transport (defaults to the running loop's AsyncioTransport)
+
+    Returns:
+        Dictionary with the status code, response body, and success flag
+    """
+    url, body, headers = build_hangup_request(agent_id, constants)
+    try:
+        response, attempts = await _post_async(transport or get_async_transport(), url, body, headers, constants)
+    except CircuitOpenError as e:
+        return circuit_open_result(e)
+    return _hangup_result(agent_id, response, attempts)
 
-    conn.request("POST", path, "", headers)
 
-    response = conn.getresponse()
-    status_code = response.status
-    response_text = response.read().decode('utf-8')
+def _channel_list_request(channel, constants):
+    join_url = f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/join"
+    return build_list_request(join_url, channel, {"Authorization": constants["AGENT_AUTH_HEADER"]})
 
-    conn.close()
 
+def _agent_not_found(channel):
     return {
-        "status_code": status_code,
-        "response": response_text,
-        "success": status_code == 200
+        "status_code": 404,
+        "response": json.dumps({"reason": "AgentNotFound", "channel": channel}),
+        "success": False
     }
+
+
+def find_agent_id(channel, constants, transport=None):
+    """
+    Finds the agent running on a channel: from the session registry, or by
+    listing the channel's running agents when this process did not start it.
+
+    Args:
+        channel: The channel name
+        constants: Dictionary of constants
+        transport: Optional blocking transport (defaults to the shared pool)
+
+    Returns:
+        The agent id, or None if no running agent was found
+
+    Raises:
+        CircuitOpenError: If the list call is needed and the circuit is open
+    """
+    session = get_sessions().for_channel(channel)
+    if session is not None:
+        return session.agent_id
+    list_url, list_headers = _channel_list_request(channel, constants)
+    listed = _attempt(transport or get_transport(), "GET", list_url, None, list_headers,
+                      retry_policy_for(constants).attempt_timeout, _recording_enabled(constants), channel)
+    found = existing_agent_response(listed, channel)
+    return json.loads(found.body)["agent_id"] if found is not None else None
+
+
+async def find_agent_id_async(channel, constants, transport=None):
+    """
+    Async counterpart of find_agent_id.
+
+    Args:
+        channel: The channel name
+        constants: Dictionary of constants
+        transport: Optional transport (defaults to the running loop's AsyncioTransport)
+
+    Returns:
+        The agent id, or None if no running agent was found
+
+    Raises:
+        CircuitOpenError: If the list call is needed and the circuit is open
+    """
+    session = get_sessions().for_channel(channel)
+    if session is not None:
+        return session.agent_id
+    list_url, list_headers = _channel_list_request(channel, constants)
+    listed = await _attempt_async(transport or get_async_transport(), "GET", list_url, None, list_headers,
+                                  retry_policy_for(constants).attempt_timeout, _recording_enabled(constants), channel)
+    found = existing_agent_response(listed, channel)
+    return json.loads(found.body)["agent_id"] if found is not None else None
+
+
+def hangup_channel(channel, constants, transport=None):
+    """
+    Hangs up the agent running on a channel.
+
+    Args:
+        channel: The channel name
+        constants: Dictionary of constants
+        transport: Optional blocking transport (defaults to the shared pool)
+
+    Returns:
+        Dictionary with the status code, response body, success flag and the
+        agent_id (404 if no running agent was found)
+    """
+    try:
+        agent_id = find_agent_id(channel, constants, transport)
+    except CircuitOpenError as e:
+        return circuit_open_result(e)
+    if agent_id is None:
+        return _agent_not_found(channel)
+    result = hangup_agent(agent_id, constants, transport)
+    result["agent_id"] = agent_id
+    return result
+
+
+async def hangup_channel_async(channel, constants, transport=None):
+    """
+    Async counterpart of hangup_channel.
+
+    Args:
+        channel: The channel name
+        constants: Dictionary of constants
+        transport: Optional transport (defaults to the running loop's AsyncioTransport)
+
+    Returns:
+        Dictionary with the status code, response body, success flag and the
+        agent_id (404 if no running agent was found)
+    """
+    try:
+        agent_id = await find_agent_id_async(channel, constants, transport)
+    except CircuitOpenError as e:
+        return circuit_open_result(e)
+    if agent_id is None:
+        return _agent_not_found(channel)
+    result = await hangup_agent_async(agent_id, constants, transport)
+    result["agent_id"] = agent_id
+    return result
@@ -0,0 +1,271 @@
+"""
+Circuit breakers for the Agora REST upstreams
+
+One breaker per upstream (scheme and host of the base URL), so the regular
+API and the Anam BETA endpoint trip independently. A breaker opens when the
+error rate or the slow-call rate over a rolling window crosses its threshold,
+fails calls fast while open, and lets a probe through after a cool-down
+(half-open) to decide whether to close again.
+
+Environment:
+    CIRCUIT_WINDOW: Rolling window in seconds (default 30)
+    CIRCUIT_MIN_CALLS: Calls in the window before it can trip (default 10)
+    CIRCUIT_ERROR_RATE: Failure ratio that trips the breaker (default 0.5)
+    CIRCUIT_SLOW_SECONDS: Calls slower than this count as slow (default 5)
+    CIRCUIT_SLOW_RATE: Slow-call ratio that trips the breaker (default 0.8)
+    CIRCUIT_OPEN_SECONDS: Cool-down before a probe is allowed (default 15)
+"""
+
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from collections import deque
+
+from core.log import get_logger, log_event
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = get_logger("breaker")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit is open.
+
+    Attributes:
+        upstream: The upstream key
+        retry_after: Seconds until a probe will be allowed
+    """
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"Circuit open for {upstream}; retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker over a rolling window of 1-second buckets.
+
+    Args:
+        name: Upstream key, e.g. "https://api.agora.io"
+        window: Rolling window length in seconds
+        min_calls: Calls required in the window before the breaker can trip
+        error_rate: Failure ratio (0-1) that opens the circuit
+        slow_seconds: Duration above which a call counts as slow
+        slow_rate: Slow-call ratio (0-1) that opens the circuit
+        open_seconds: Time the circuit stays open before a half-open probe
+        half_open_calls: Concurrent probe calls allowed while half-open
+    """
+
+    def __init__(self, name, window=30, min_calls=10, error_rate=0.5, slow_seconds=5.0,
+                 slow_rate=0.8, open_seconds=15.0, half_open_calls=1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.clock = time.monotonic
+
+        self.state = CLOSED
+        self._buckets = deque()  # [second, calls, failures, slow, total_seconds]
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def _trim(self, now):
+        horizon = int(now) - self.window
+        while self._buckets and self._buckets[0][0] <= horizon:
+            self._buckets.popleft()
+
+    def _totals(self):
+        calls = failures = slow = 0
+        total_seconds = 0.0
+        for _, bucket_calls, bucket_failures, bucket_slow, bucket_seconds in self._buckets:
+            calls += bucket_calls
+            failures += bucket_failures
+            slow += bucket_slow
+            total_seconds += bucket_seconds
+        return calls, failures, slow, total_seconds
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.stats["opened"] += 1
+        log_event(logger, logging.WARNING, "Circuit opened", upstream=self.name, reason=reason,
+                  open_s=self.open_seconds)
+
+    def allow(self):
+        """
+        Reserves a call. Must be followed by record() when it is allowed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with its
+                probe slots taken
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = self.clock()
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - now
+                if remaining > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self._probes >= self.half_open_calls:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.open_seconds)
+            self._probes += 1
+
+    def record(self, success, seconds):
+        """
+        Records the outcome of an allowed call.
+
+        Args:
+            success: False for upstream failures (5xx, resets, timeouts)
+            seconds: Call duration
+        """
+        with self._lock:
+            now = self.clock()
+            slow = seconds > self.slow_seconds
+
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if success and not slow:
+                    self.state = CLOSED
+                    self._buckets.clear()
+                    log_event(logger, logging.INFO, "Circuit closed", upstream=self.name)
+                else:
+                    self._open(now, "probe failed")
+                    return
+
+            second = int(now)
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append([second, 0, 0, 0, 0.0])
+            bucket = self._buckets[-1]
+            bucket[1] += 1
+            bucket[2] += 0 if success else 1
+            bucket[3] += 1 if slow else 0
+            bucket[4] += seconds
+            self._trim(now)
+
+            if self.state == CLOSED:
+                calls, failures, slow_calls, _ = self._totals()
+                if calls < self.min_calls:
+                    return
+                if failures / calls >= self.error_rate:
+                    self._open(now, f"error rate {failures}/{calls}")
+                elif slow_calls / calls >= self.slow_rate:
+                    self._open(now, f"slow calls {slow_calls}/{calls}")
+
+    def release(self):
+        """
+        Gives back an allowed call that ended without an outcome (e.g. it was
+        cancelled), freeing its half-open probe slot.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def snapshot(self):
+        """Returns the state and rolling-window counters as a dictionary."""
+        with self._lock:
+            now = self.clock()
+            self._trim(now)
+            calls, failures, slow, total_seconds = self._totals()
+            state = self.state
+            retry_after = None
+            if state == OPEN:
+                retry_after = max(0.0, self._opened_at + self.open_seconds - now)
+                if retry_after == 0:
+                    state = HALF_OPEN
+            return {
+                "state": state,
+                "window_seconds": self.window,
+                "calls": calls,
+                "failures": failures,
+                "slow_calls": slow,
+                "error_rate": round(failures / calls, 3) if calls else 0.0,
+                "avg_ms": round(total_seconds / calls * 1000, 2) if calls else None,
+                "retry_after": round(retry_after, 2) if retry_after else None,
+                "opened": self.stats["opened"],
+                "rejected": self.stats["rejected"]
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def upstream_key(url):
+    """
+    Returns the breaker key for a URL: its scheme and host.
+
+    Args:
+        url: Any URL on the upstream
+
+    Returns:
+        String such as "https://api.agora.io"
+    """
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_breaker(url):
+    """
+    Returns the shared CircuitBreaker for the URL's upstream, creating it
+    from the CIRCUIT_* environment variables on first use.
+
+    Args:
+        url: Any URL on the upstream
+
+    Returns:
+        CircuitBreaker instance
+    """
+    key = upstream_key(url)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                environ = os.environ
+                breaker = _breakers[key] = CircuitBreaker(
+                    key,
+                    window=int(environ.get("CIRCUIT_WINDOW", 30)),
+                    min_calls=int(environ.get("CIRCUIT_MIN_CALLS", 10)),
+                    error_rate=float(environ.get("CIRCUIT_ERROR_RATE", 0.5)),
+                    slow_seconds=float(environ.get("CIRCUIT_SLOW_SECONDS", 5)),
+                    slow_rate=float(environ.get("CIRCUIT_SLOW_RATE", 0.8)),
+                    open_seconds=float(environ.get("CIRCUIT_OPEN_SECONDS", 15)),
+                )
+    return breaker
+
+
+def breaker_states():
+    """
+    Returns a snapshot of every upstream breaker.
+
+    Returns:
+        Dictionary mapping upstream key to its snapshot
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def reset_breakers():
+    """Forgets every breaker (they are recreated on next use)."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,233 @@
+"""
+Bulk agent start with bounded parallelism
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import get_constants
+from core.agent import hangup_channel, send_agent_to_channel_once
+from core.endpoints import join_and_mint, prepare_start, start_response
+from core.metrics import StageTimer
+from core.sessions import get_sessions
+
+
+# Upper bounds for a single bulk request
+MAX_BULK_AGENTS = 500
+MAX_BULK_CONCURRENCY = 32
+DEFAULT_BULK_CONCURRENCY = 8
+
+
+def normalize_overrides(overrides):
+    """
+    Converts JSON override values into the string form used by query parameters.
+
+    Args:
+        overrides: Dictionary of override values (bools, numbers or strings)
+
+    Returns:
+        Dictionary of string values
+    """
+    normalized = {}
+    for key, value in (overrides or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        normalized[key] = str(value)
+    return normalized
+
+
+def validate_bulk_request(body):
+    """
+    Validates a bulk start request body.
+
+    Args:
+        body: Parsed JSON body
+
+    Returns:
+        Error message string, or None if the request is valid
+    """
+    if not isinstance(body, dict):
+        return "Request body must be a JSON object"
+    agents = body.get("agents")
+    if not isinstance(agents, list) or not agents:
+        return "Request body must include a non-empty 'agents' list"
+    if len(agents) > MAX_BULK_AGENTS:
+        return f"Too many agents: {len(agents)} (max {MAX_BULK_AGENTS})"
+    if not all(isinstance(item, dict) for item in agents):
+        return "Each entry in 'agents' must be an object"
+    if "defaults" in body and not isinstance(body["defaults"], dict):
+        return "'defaults' must be an object"
+    concurrency = body.get("concurrency", DEFAULT_BULK_CONCURRENCY)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return "'concurrency' must be a positive integer"
+    return None
+
+
+def start_agent_item(index, item, transport=None, app_id_as_token=False):
+    """
+    Starts one agent from a bulk request, exactly like a single /start-agent
+    (same tokens, payload and metrics). Never raises.
+
+    Args:
+        index: Position of the item in the request
+        item: Dictionary of channel, profile and override parameters
+        transport: Optional blocking transport for the join call
+        app_id_as_token: Without APP_CERTIFICATE, return the APP_ID as the
+            token (the Lambda handler's behaviour, see prepare_start)
+
+    Returns:
+        Dictionary with the per-item result
+    """
+    started = time.perf_counter()
+    result = {"index": index, "channel": item.get("channel"), "profile": item.get("profile")}
+
+    try:
+        start = prepare_start(item, StageTimer(), warm_pool=False, app_id_as_token=app_id_as_token)
+        result["channel"] = start.channel
+        agent_response = None
+        if start.needs_join:
+            agent_response = join_and_mint(start, lambda: send_agent_to_channel_once(
+                start.channel, start.agent_payload, start.constants, transport=transport))
+        status, body = start_response(start, agent_response)
+
+        if status != 200:
+            result.update({"success": False, "error": body["error"]})
+        else:
+            result.update({
+                "success": body["agent_response"]["success"],
+                "token": body["token"],
+                "uid": body["uid"],
+                "appid": body["appid"],
+                "agent_rtm_uid": body["agent_rtm_uid"],
+                "agent_response": body["agent_response"]
+            })
+    except Exception as e:
+        result.update({"success": False, "error": f"{type(e).__name__}: {e}"})
+
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def start_agents(items, defaults=None, concurrency=DEFAULT_BULK_CONCURRENCY, transport=None,
+                 app_id_as_token=False):
+    """
+    Starts many agents concurrently. One item failing does not affect the rest.
+
+    Args:
+        items: List of dictionaries with optional channel, profile and overrides
+        defaults: Optional overrides applied to every item (item values win)
+        concurrency: Maximum number of joins in flight
+        transport: Optional blocking transport for the join calls
+        app_id_as_token: Without APP_CERTIFICATE, return the APP_ID as the token
+
+    Returns:
+        Dictionary with per-item results (in request order) and a summary
+    """
+    started = time.perf_counter()
+    defaults = normalize_overrides(defaults)
+    merged = [dict(defaults, **normalize_overrides(item)) for item in items]
+    concurrency = max(1, min(int(concurrency), MAX_BULK_CONCURRENCY, len(merged)))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(start_agent_item, index, item, transport, app_id_as_token)
+            for index, item in enumerate(merged)
+        ]
+        results = [future.result() for future in futures]
+
+    durations = [r["duration_ms"] for r in results]
+    succeeded = sum(1 for r in results if r["success"])
+
+    return {
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "concurrency": concurrency,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "item_ms": {
+                "min": min(durations),
+                "avg": round(sum(durations) / len(durations), 2),
+                "max": max(durations)
+            }
+        }
+    }
+
+
+def validate_bulk_hangup(body):
+    """
+    Validates a bulk hangup request body.
+
+    Args:
+        body: Parsed JSON body
+
+    Returns:
+        Error message string, or None if the request is valid
+    """
+    if not isinstance(body, dict):
+        return "Request body must be a JSON object"
+    channels = body.get("channels")
+    if channels is None:
+        if "profile" not in body:
+            return "Request body must include a 'channels' list or a 'profile'"
+    elif not isinstance(channels, list) or not channels:
+        return "'channels' must be a non-empty list"
+    elif len(channels) > MAX_BULK_AGENTS:
+        return f"Too many channels: {len(channels)} (max {MAX_BULK_AGENTS})"
+    elif not all(isinstance(channel, str) and channel for channel in channels):
+        return "Each entry in 'channels' must be a non-empty string"
+    concurrency = body.get("concurrency", DEFAULT_BULK_CONCURRENCY)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return "'concurrency' must be a positive integer"
+    return None
+
+
+def hangup_agents(channels=None, profile=None, concurrency=DEFAULT_BULK_CONCURRENCY, transport=None):
+    """
+    Hangs up the agents on many channels concurrently. Without channels, every
+    agent this process started with the profile is hung up.
+
+    Args:
+        channels: Optional list of channel names
+        profile: Profile name for env var overrides (None for the base config)
+        concurrency: Maximum leaves in flight
+        transport: Optional blocking transport for the leave calls
+
+    Returns:
+        Dictionary with per-channel results (in request order) and a summary
+    """
+    started = time.perf_counter()
+    constants = get_constants(profile)
+    if channels is None:
+        channels = [session.channel for session in get_sessions().for_profile(constants.profile)]
+    if not channels:
+        return {"results": [], "summary": {"total": 0, "succeeded": 0, "failed": 0, "concurrency": 0,
+                                           "duration_ms": 0.0}}
+    concurrency = max(1, min(int(concurrency), MAX_BULK_CONCURRENCY, len(channels)))
+
+    def hangup_item(index, channel):
+        try:
+            agent_response = hangup_channel(channel, constants, transport=transport)
+        except Exception as e:
+            return {"index": index, "channel": channel, "success": False, "error": f"{type(e).__name__}: {e}"}
+        return {"index": index, "channel": channel, "agent_id": agent_response.get("agent_id"),
+                "success": agent_response["success"], "agent_response": agent_response}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(hangup_item, index, channel) for index, channel in enumerate(channels)]
+        results = [future.result() for future in futures]
+
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "concurrency": concurrency,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
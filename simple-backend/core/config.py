@@ -2,7 +2,18 @@
 Configuration and environment variable management with profile support
 """
 
+import logging
 import os
+import signal
+import threading
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from core.log import get_logger, log_event
+
+
+logger = get_logger("config")
 
 
 def get_env_var(var_name, profile=None, default_value=None):
@@ -33,110 +44,532 @@ def get_env_var(var_name, profile=None, default_value=None):
     return default_value
 
 
+# Settings read from the environment: (name, default). Profile overrides
+# use PROFILE_NAME, e.g. AVATAR_TTS_VENDOR for profile=avatar.
+ENV_SETTINGS = [
+    # Required Agora settings (no defaults)
+    ("APP_ID", None),
+    ("APP_CERTIFICATE", ''),
+    ("AGENT_AUTH_HEADER", None),
+    # ConvoAI REST API (override to point at a local stand-in, see tools/)
+    ("AGENT_API_BASE_URL", "https://api.agora.io/api/conversational-ai-agent/v2/projects"),
+
+    # LLM settings
+    ("LLM_URL", "https://api.openai.com/v1/chat/completions"),
+    ("LLM_API_KEY", None),
+    ("LLM_MODEL", "gpt-4o-mini"),
+
+    # TTS settings (vendor required, no default)
+    ("TTS_VENDOR", None),
+    ("TTS_KEY", None),
+    ("TTS_VOICE_ID", None),
+    ("TTS_SAMPLE_RATE", "24000"),
+    ("TTS_SPEED", "1.0"),
+
+    # ElevenLabs specific defaults
+    ("ELEVENLABS_MODEL", "eleven_flash_v2_5"),
+    ("ELEVENLABS_STABILITY", "0.5"),
+
+    # OpenAI TTS specific defaults
+    ("OPENAI_TTS_MODEL", "tts-1"),
+    ("OPENAI_TTS_VOICE", "alloy"),
+
+    # Cartesia specific defaults
+    ("CARTESIA_MODEL", "sonic-3"),
+    ("CARTESIA_VOICE_ID", "71a7ad14-091c-4e8e-a314-022ece01c121"),
+
+    # Rime TTS specific settings
+    ("RIME_API_KEY", None),
+    ("RIME_SPEAKER", "astra"),
+    ("RIME_MODEL_ID", "mistv2"),
+    ("RIME_LANG", "eng"),
+    ("RIME_SAMPLING_RATE", "16000"),
+    ("RIME_SPEED_ALPHA", "1.0"),
+
+    # ASR settings (default to ares - no API key needed)
+    ("ASR_VENDOR", "ares"),
+    ("ASR_LANGUAGE", "en-US"),
+
+    # Deepgram specific settings (if using deepgram ASR)
+    ("DEEPGRAM_KEY", None),
+    ("DEEPGRAM_MODEL", "nova-3"),
+    ("DEEPGRAM_LANGUAGE", "en"),
+
+    # VAD settings
+    ("VAD_SILENCE_DURATION_MS", "300"),
+    ("ENABLE_AIVAD", "true"),
+
+    # Agent settings
+    ("IDLE_TIMEOUT", "120"),
+    ("MAX_HISTORY", "32"),
+
+    # Agora REST retries: total attempts, per-attempt timeout and total
+    # budget in seconds
+    ("AGENT_RETRY_ATTEMPTS", "3"),
+    ("AGENT_RETRY_TIMEOUT", "10"),
+    ("AGENT_RETRY_DEADLINE", "30"),
+
+    # Worker processes for very large POST /tokens batches (0 = disabled)
+    ("TOKEN_BATCH_PROCESSES", "0"),
+
+    # Debug settings
+    ("ENABLE_CURL_DUMP", "false"),
+
+    # Avatar settings (off by default)
+    ("AVATAR_ENABLED", "false"),
+    ("AVATAR_VENDOR", "heygen"),
+
+    # HeyGen specific settings
+    ("HEYGEN_API_KEY", None),
+    ("HEYGEN_AVATAR_ID", "Wayne_20240711"),
+    ("HEYGEN_QUALITY", "high"),
+    ("HEYGEN_ACTIVITY_IDLE_TIMEOUT", "120"),
+
+    # Anam Avatar BETA settings
+    ("ANAM_API_KEY", None),
+    ("ANAM_AVATAR_ID", None),
+    ("ANAM_BASE_URL", "https://api.anam.ai/v1"),
+    ("ANAM_BETA_APP_ID", None),
+    ("ANAM_BETA_CREDENTIALS", None),
+    ("ANAM_BETA_ENDPOINT", "https://api-test.agora.io/api/conversational-ai-agent/v2/projects"),
+
+    # Default prompt and messages
+    ("DEFAULT_PROMPT",
+        "You are a virtual companion. The user can both talk and type to you and you will be sent text. "
+        "Say you can hear them if asked. They can also see you as a digital human. "
+        "Keep responses to around 10 to 20 words or shorter. Be upbeat and try and keep conversation "
+        "going by learning more about the user."),
+    ("DEFAULT_GREETING", "hi there"),
+    ("DEFAULT_FAILURE_MESSAGE", "Sorry, something went wrong"),
+]
+
+# Settings that are not read from the environment
+FIXED_SETTINGS = {
+    # Fixed UIDs
+    "AGENT_UID": "100",
+    "USER_UID": "101",
+    "AGENT_VIDEO_UID": "102",
+
+    # Token expiration (in seconds)
+    "TOKEN_EXPIRE": 24 * 3600,  # 24 hours
+    "PRIVILEGE_EXPIRE": 24 * 3600,  # 24 hours
+}
+
+# Settings that must be set for an agent to start
+REQUIRED_SETTINGS = ("APP_ID", "AGENT_AUTH_HEADER", "LLM_API_KEY", "TTS_VENDOR")
+
+
 def initialize_constants(profile=None):
     """
     Initialize all constants with profile support and sensible defaults.
 
+    Reads the environment on every call. Request handlers should use
+    get_constants(), which returns a precompiled profile.
+
     Args:
         profile: Optional profile suffix for environment variables
 
     Returns:
         Dictionary of constants
     """
-    constants = {
-        # Required Agora settings (no defaults)
-        "APP_ID": get_env_var('APP_ID', profile),
-        "APP_CERTIFICATE": get_env_var('APP_CERTIFICATE', profile, ''),
-        "AGENT_AUTH_HEADER": get_env_var('AGENT_AUTH_HEADER', profile),
-        "AGENT_API_BASE_URL": "https://api.agora.io/api/conversational-ai-agent/v2/projects",
-
-        # Fixed UIDs
-        "AGENT_UID": "100",
-        "USER_UID": "101",
-        "AGENT_VIDEO_UID": "102",
-
-        # Token expiration (in seconds)
-        "TOKEN_EXPIRE": 24 * 3600,  # 24 hours
-        "PRIVILEGE_EXPIRE": 24 * 3600,  # 24 hours
-
-        # LLM settings
-        "LLM_URL": get_env_var('LLM_URL', profile, "https://api.openai.com/v1/chat/completions"),
-        "LLM_API_KEY": get_env_var('LLM_API_KEY', profile),
-        "LLM_MODEL": get_env_var('LLM_MODEL', profile, "gpt-4o-mini"),
-
-        # TTS settings (vendor required, no default)
-        "TTS_VENDOR": get_env_var('TTS_VENDOR', profile),
-        "TTS_KEY": get_env_var('TTS_KEY', profile),
-        "TTS_VOICE_ID": get_env_var('TTS_VOICE_ID', profile),
-        "TTS_SAMPLE_RATE": get_env_var('TTS_SAMPLE_RATE', profile, "24000"),
-        "TTS_SPEED": get_env_var('TTS_SPEED', profile, "1.0"),
-
-        # ElevenLabs specific defaults
-        "ELEVENLABS_MODEL": get_env_var('ELEVENLABS_MODEL', profile, "eleven_flash_v2_5"),
-        "ELEVENLABS_STABILITY": get_env_var('ELEVENLABS_STABILITY', profile, "0.5"),
-
-        # OpenAI TTS specific defaults
-        "OPENAI_TTS_MODEL": get_env_var('OPENAI_TTS_MODEL', profile, "tts-1"),
-        "OPENAI_TTS_VOICE": get_env_var('OPENAI_TTS_VOICE', profile, "alloy"),
-
-        # Cartesia specific defaults
-        "CARTESIA_MODEL": get_env_var('CARTESIA_MODEL', profile, "sonic-3"),
-        "CARTESIA_VOICE_ID": get_env_var('CARTESIA_VOICE_ID', profile, "71a7ad14-091c-4e8e-a314-022ece01c121"),
-
-        # Rime TTS specific settings
-        "RIME_API_KEY": get_env_var('RIME_API_KEY', profile),
-        "RIME_SPEAKER": get_env_var('RIME_SPEAKER', profile, "astra"),
-        "RIME_MODEL_ID": get_env_var('RIME_MODEL_ID', profile, "mistv2"),
-        "RIME_LANG": get_env_var('RIME_LANG', profile, "eng"),
-        "RIME_SAMPLING_RATE": get_env_var('RIME_SAMPLING_RATE', profile, "16000"),
-        "RIME_SPEED_ALPHA": get_env_var('RIME_SPEED_ALPHA', profile, "1.0"),
-
-        # ASR settings (default to ares - no API key needed)
-        "ASR_VENDOR": get_env_var('ASR_VENDOR', profile, "ares"),
-        "ASR_LANGUAGE": get_env_var('ASR_LANGUAGE', profile, "en-US"),
-
-        # Deepgram specific settings (if using deepgram ASR)
-        "DEEPGRAM_KEY": get_env_var('DEEPGRAM_KEY', profile),
-        "DEEPGRAM_MODEL": get_env_var('DEEPGRAM_MODEL', profile, "nova-3"),
-        "DEEPGRAM_LANGUAGE": get_env_var('DEEPGRAM_LANGUAGE', profile, "en"),
-
-        # VAD settings
-        "VAD_SILENCE_DURATION_MS": get_env_var('VAD_SILENCE_DURATION_MS', profile, "300"),
-        "ENABLE_AIVAD": get_env_var('ENABLE_AIVAD', profile, "true"),
-
-        # Agent settings
-        "IDLE_TIMEOUT": get_env_var('IDLE_TIMEOUT', profile, "120"),
-        "MAX_HISTORY": get_env_var('MAX_HISTORY', profile, "32"),
-
-        # Debug settings
-        "ENABLE_CURL_DUMP": get_env_var('ENABLE_CURL_DUMP', profile, "false"),
-
-        # Avatar settings (off by default)
-        "AVATAR_ENABLED": get_env_var('AVATAR_ENABLED', profile, "false"),
-        "AVATAR_VENDOR": get_env_var('AVATAR_VENDOR', profile, "heygen"),
-
-        # HeyGen specific settings
-        "HEYGEN_API_KEY": get_env_var('HEYGEN_API_KEY', profile),
-        "HEYGEN_AVATAR_ID": get_env_var('HEYGEN_AVATAR_ID', profile, "Wayne_20240711"),
-        "HEYGEN_QUALITY": get_env_var('HEYGEN_QUALITY', profile, "high"),
-        "HEYGEN_ACTIVITY_IDLE_TIMEOUT": get_env_var('HEYGEN_ACTIVITY_IDLE_TIMEOUT', profile, "120"),
-
-        # Anam Avatar BETA settings
-        "ANAM_API_KEY": get_env_var('ANAM_API_KEY', profile),
-        "ANAM_AVATAR_ID": get_env_var('ANAM_AVATAR_ID', profile),
-        "ANAM_BASE_URL": get_env_var('ANAM_BASE_URL', profile, "https://api.anam.ai/v1"),
-        "ANAM_BETA_APP_ID": get_env_var('ANAM_BETA_APP_ID', profile),
-        "ANAM_BETA_CREDENTIALS": get_env_var('ANAM_BETA_CREDENTIALS', profile),
-        "ANAM_BETA_ENDPOINT": get_env_var('ANAM_BETA_ENDPOINT', profile, "https://api-test.agora.io/api/conversational-ai-agent/v2/projects"),
-
-        # Default prompt and messages
-        "DEFAULT_PROMPT": get_env_var('DEFAULT_PROMPT', profile,
-            "You are a virtual companion. The user can both talk and type to you and you will be sent text. "
-            "Say you can hear them if asked. They can also see you as a digital human. "
-            "Keep responses to around 10 to 20 words or shorter. Be upbeat and try and keep conversation "
-            "going by learning more about the user."),
-        "DEFAULT_GREETING": get_env_var('DEFAULT_GREETING', profile, "hi there"),
-        "DEFAULT_FAILURE_MESSAGE": get_env_var('DEFAULT_FAILURE_MESSAGE', profile, "Sorry, something went wrong"),
+    constants = dict(FIXED_SETTINGS)
+    for name, default in ENV_SETTINGS:
+        constants[name] = get_env_var(name, profile, default)
+    return constants
+
+
+def parse_bool(value):
+    """Parses the "true"/"false" strings used for flags (case-insensitive)."""
+    return str(value).lower() == "true"
+
+
+# Typed attributes compiled once per profile: setting name -> parser
+TYPED_SETTINGS = {
+    "TTS_SAMPLE_RATE": int,
+    "TTS_SPEED": float,
+    "ELEVENLABS_STABILITY": float,
+    "RIME_SAMPLING_RATE": int,
+    "RIME_SPEED_ALPHA": float,
+    "VAD_SILENCE_DURATION_MS": int,
+    "ENABLE_AIVAD": parse_bool,
+    "IDLE_TIMEOUT": int,
+    "MAX_HISTORY": int,
+    "TOKEN_BATCH_PROCESSES": int,
+    "AGENT_RETRY_ATTEMPTS": int,
+    "AGENT_RETRY_TIMEOUT": float,
+    "AGENT_RETRY_DEADLINE": float,
+    "ENABLE_CURL_DUMP": parse_bool,
+    "AVATAR_ENABLED": parse_bool,
+    "HEYGEN_ACTIVITY_IDLE_TIMEOUT": int,
+}
+
+
+class ProfileConfig(Mapping):
+    """
+    Immutable, compiled constants for one profile.
+
+    Behaves like the initialize_constants() dictionary (raw string values by
+    setting name) and also exposes each TYPED_SETTINGS entry as a parsed
+    lowercase attribute, e.g. config.idle_timeout == 120. A value that fails
+    to parse is left as None, and resolve_setting() re-raises the parse error
+    when it is used.
+    """
+
+    __slots__ = (
+        "profile", "_values", "missing", "invalid", "has_certificate",
+    ) + tuple(name.lower() for name in TYPED_SETTINGS)
+
+    def __init__(self, profile, values):
+        invalid = []
+        for name, parser in TYPED_SETTINGS.items():
+            try:
+                typed = parser(values[name])
+            except (TypeError, ValueError):
+                typed = None
+                invalid.append(name)
+            object.__setattr__(self, name.lower(), typed)
+
+        certificate = values["APP_CERTIFICATE"]
+        object.__setattr__(self, "profile", profile)
+        object.__setattr__(self, "_values", MappingProxyType(values))
+        object.__setattr__(self, "missing", tuple(name for name in REQUIRED_SETTINGS if not values.get(name)))
+        object.__setattr__(self, "invalid", tuple(invalid))
+        object.__setattr__(self, "has_certificate", bool(certificate and certificate.strip()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProfileConfig is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ProfileConfig is immutable")
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"ProfileConfig(profile={self.profile!r})"
+
+
+def resolve_setting(query_params, param, constants, name):
+    """
+    Returns a typed setting: the query parameter override if present,
+    otherwise the value compiled into a ProfileConfig (or parsed from a
+    plain constants dictionary).
+
+    Args:
+        query_params: Query parameter overrides
+        param: Query parameter name, e.g. 'idle_timeout'
+        constants: ProfileConfig or dictionary of constants
+        name: Setting name, e.g. 'IDLE_TIMEOUT'
+
+    Returns:
+        The parsed value
+    """
+    parser = TYPED_SETTINGS[name]
+    if param in query_params:
+        return parser(query_params[param])
+    if isinstance(constants, ProfileConfig):
+        value = getattr(constants, name.lower())
+        if value is not None:
+            return value
+    return parser(constants[name])
+
+
+def _setting_string(value):
+    """Converts a JSON/TOML value into the string form environment values use."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def compile_profile(profile=None, environ=None, overrides=None):
+    """
+    Builds the ProfileConfig for a profile from an environment snapshot.
+
+    Each setting resolves as: overrides, PROFILE_NAME, NAME, default.
+
+    Args:
+        profile: Optional profile prefix (uppercased automatically)
+        environ: Environment mapping (defaults to os.environ)
+        overrides: Optional dictionary of setting values, e.g. from a
+            profile store
+
+    Returns:
+        ProfileConfig instance
+    """
+    environ = os.environ if environ is None else environ
+    prefix = f"{profile.upper()}_" if profile else None
+    overrides = overrides or {}
+
+    values = dict(FIXED_SETTINGS)
+    for name, default in ENV_SETTINGS:
+        value = overrides.get(name)
+        if value is not None:
+            values[name] = _setting_string(value)
+            continue
+        value = environ.get(prefix + name) if prefix else None
+        if value is None:
+            value = environ.get(name)
+        values[name] = default if value is None else value
+    return ProfileConfig(profile.upper() if profile else None, values)
+
+
+def discover_profiles(environ=None):
+    """
+    Finds every profile prefix in the environment, e.g. AVATAR from
+    AVATAR_TTS_VENDOR. Names that are themselves settings are ignored, and
+    the longest matching setting wins (AVATAR_ANAM_BETA_APP_ID -> AVATAR).
+
+    Args:
+        environ: Environment mapping (defaults to os.environ)
+
+    Returns:
+        Sorted list of uppercase profile names
+    """
+    environ = os.environ if environ is None else environ
+    names = {name for name, _ in ENV_SETTINGS}
+    suffixes = sorted(("_" + name for name in names), key=len, reverse=True)
+
+    profiles = set()
+    for env_name in environ:
+        if env_name in names:
+            continue
+        for suffix in suffixes:
+            if env_name.endswith(suffix) and len(env_name) > len(suffix):
+                profiles.add(env_name[:-len(suffix)])
+                break
+    return sorted(profiles)
+
+
+class ProfileRegistry:
+    """
+    Every discovered profile compiled once from an environment snapshot.
+
+    Unknown profiles resolve to the base config, since they have no
+    PROFILE_* overrides and would compile to the same values.
+
+    When PROFILE_STORE names a JSON, TOML or SQLite file, profiles found
+    there are compiled lazily on first use (see core.profile_store) and take
+    precedence over environment-only profiles.
+
+    Args:
+        environ: Environment mapping (defaults to a snapshot of os.environ)
+        store: Optional ProfileStore (defaults to opening PROFILE_STORE)
+    """
+
+    def __init__(self, environ=None, generation=0, store=None):
+        environ = dict(os.environ if environ is None else environ)
+        self.environ = environ
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.base = compile_profile(None, environ)
+        self.profiles = {name: compile_profile(name, environ) for name in discover_profiles(environ)}
+        if store is None and environ.get("PROFILE_STORE"):
+            from core.profile_store import open_profile_store
+            store = open_profile_store(
+                environ["PROFILE_STORE"], int(environ.get("PROFILE_STORE_CACHE_SIZE") or 1024))
+        self.store = store
+
+    def get(self, profile=None):
+        """
+        Returns the compiled config for a profile.
+
+        Args:
+            profile: Optional profile name (case-insensitive)
+
+        Returns:
+            ProfileConfig instance
+        """
+        if not profile:
+            return self.base
+        name = profile.upper()
+        if self.store is not None:
+            config = self.store.get(name, self.environ)
+            if config is not None:
+                return config
+        return self.profiles.get(name, self.base)
+
+    def has_profile(self, profile):
+        """
+        Returns True if the profile is declared in the environment or the
+        profile store (get falls back to the base config for any other name).
+
+        Args:
+            profile: Profile name (case-insensitive; empty means the base config)
+        """
+        if not profile:
+            return True
+        name = profile.upper()
+        if name in self.profiles:
+            return True
+        return self.store is not None and self.store.get(name, self.environ) is not None
+
+    def validate(self):
+        """
+        Lists configuration problems per profile.
+
+        Returns:
+            Dictionary mapping profile name ('' for base) to a list of messages
+        """
+        problems = {}
+        for config in [self.base] + list(self.profiles.values()):
+            messages = [f"missing {name}" for name in config.missing]
+            messages += [f"invalid {name}={config[name]!r}" for name in config.invalid]
+            if messages:
+                problems[config.profile or ''] = messages
+        return problems
+
+
+_registry = None
+_registry_lock = threading.Lock()
+# Profile store replaced by the last reload, closed by the next one
+_retired_store = None
+
+
+def get_registry():
+    """
+    Returns the process-wide ProfileRegistry, compiling it on first use.
+
+    Returns:
+        ProfileRegistry instance
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ProfileRegistry()
+    return _registry
+
+
+def get_constants(profile=None):
+    """
+    Returns the precompiled constants for a profile (a single lookup).
+
+    Args:
+        profile: Optional profile name
+
+    Returns:
+        ProfileConfig instance
+    """
+    return (_registry or get_registry()).get(profile)
+
+
+def reload_profiles(environ=None):
+    """
+    Recompiles every profile and swaps the new registry in atomically.
+
+    The new registry is fully built before a single reference assignment
+    publishes it, so readers never take a lock and never see a partially
+    applied config. Requests already holding a ProfileConfig finish with it.
+
+    The replaced registry's profile store is closed one reload later, so a
+    request that read the old registry just before the swap can still finish
+    its lookup.
+
+    Args:
+        environ: Environment mapping (defaults to a snapshot of os.environ)
+
+    Returns:
+        Dictionary with the new generation, profile names and problems
+    """
+    global _registry, _retired_store
+    with _registry_lock:
+        previous = _registry
+        generation = previous.generation + 1 if previous is not None else 1
+        registry = ProfileRegistry(environ, generation=generation)
+        _registry = registry
+        stale, _retired_store = _retired_store, previous.store if previous is not None else None
+    if stale is not None:
+        stale.close()
+
+    return {
+        "generation": registry.generation,
+        "profiles": list(registry.profiles),
+        "problems": registry.validate()
     }
 
-    return constants
+
+def install_reload_signal(before_reload=None):
+    """
+    Reloads profiles on SIGHUP. The reload runs on a background thread so the
+    interrupted thread returns immediately.
+
+    Must be called from the main thread.
+
+    Args:
+        before_reload: Optional callable run before recompiling, e.g. to
+            re-read a .env file into os.environ
+
+    Returns:
+        True if the handler was installed, False where SIGHUP is unavailable
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return False
+
+    def reload():
+        if before_reload is not None:
+            before_reload()
+        result = reload_profiles()
+        log_event(logger, logging.INFO, "Config reloaded", generation=result['generation'],
+                  profiles=result['profiles'])
+
+    def handler(signum, frame):
+        threading.Thread(target=reload, name="config-reload", daemon=True).start()
+
+    signal.signal(signal.SIGHUP, handler)
+    return True
+
+
+class FileWatcher:
+    """
+    Polls a file's modification time and size and calls on_change when
+    either changes. Runs on a daemon thread.
+
+    Args:
+        path: File to watch
+        on_change: Callable invoked (from the watcher thread) after a change
+        interval: Seconds between checks
+    """
+
+    def __init__(self, path, on_change, interval=2.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._signature = self._stat()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self):
+        """Runs on_change if the file changed since the last check."""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        self.on_change()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Config reload failed")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,302 @@
+"""
+Framework-independent request handling shared by the HTTP servers
+
+local_server.py (Flask, blocking) and asgi_app.py (ASGI, asyncio) differ only
+in how they make the Agora calls. Everything else (profile lookup, tokens,
+payload, response bodies, metrics) lives here, so both serve identical
+/start-agent and /health responses. lambda_handler.py starts agents through
+the same functions.
+
+A join only needs the agent video token, and only for an avatar. The other
+tokens are minted while the join waits on Agora (join_and_mint and
+join_and_mint_async) and reported as the concurrent "deferred_tokens" stage.
+"""
+
+import asyncio
+import time
+
+from core.breaker import breaker_states
+from core.config import get_constants, get_registry, resolve_setting
+from core.metrics import observe_start
+from core.sessions import get_sessions
+from core.singleflight import get_start_flights
+from core.templates import render_agent_payload
+from core.tokens import build_token_cached, get_token_cache, mint_during
+from core.utils import generate_random_channel
+from core.warmpool import get_warm_pools, take_warm_channel
+
+
+class StartRequest:
+    """
+    A /start-agent request with everything computed up to the Agora join.
+
+    Attributes:
+        timer: StageTimer for the request
+        query_params: Request query parameters
+        constants: ProfileConfig for the requested profile
+        channel: Channel name (requested, taken from the warm pool or generated)
+        token_only: True for connect=false
+        app_id: APP_ID returned to the client (the Anam beta APP_ID for Anam avatars)
+        user_token: {"token", "uid"} for the client (None until minted)
+        agent_video_token: {"token", "uid"} for the avatar (None until minted)
+        agent_payload: RenderedPayload, or None for token-only and invalid requests
+        error: Payload validation error, or None
+    """
+
+    __slots__ = ("timer", "query_params", "constants", "channel", "token_only", "app_id",
+                 "user_token", "agent_video_token", "agent_payload", "error")
+
+    @property
+    def needs_join(self):
+        """True if the agent should be sent to the channel."""
+        return self.agent_payload is not None
+
+    @property
+    def has_deferred_tokens(self):
+        """True if tokens are left to mint after the payload was built."""
+        return self.user_token is None or self.agent_video_token is None
+
+    def mint_deferred_tokens(self):
+        """Mints the tokens prepare_start left for later."""
+        constants, profile = self.constants, self.query_params.get('profile')
+        if self.agent_video_token is None:
+            self.agent_video_token = build_token_cached(self.channel, constants["AGENT_VIDEO_UID"], constants, profile)
+        if self.user_token is None:
+            self.user_token = build_token_cached(self.channel, constants["USER_UID"], constants, profile)
+
+
+def token_generation_method(has_certificate):
+    return "v007 tokens with RTC+RTM services" if has_certificate else "APP_ID only (no APP_CERTIFICATE)"
+
+
+def prepare_start(query_params, timer, warm_pool=True, app_id_as_token=False, anam_app_id=True):
+    """
+    Does the CPU-bound part of a /start-agent request: config lookup, warm
+    channel or token minting, and payload rendering. Laps "config", "tokens"
+    and "payload" on the timer. For a join, only the tokens the payload
+    needs are minted; the rest are left for join_and_mint.
+
+    Args:
+        query_params: Request query parameters
+        timer: StageTimer for the request
+        warm_pool: Serve eligible requests from the warm channel pool
+        app_id_as_token: Without APP_CERTIFICATE, return the APP_ID as the
+            token instead of an empty one (the Lambda handler's behaviour)
+        anam_app_id: Return the Anam beta APP_ID for Anam avatars
+
+    Returns:
+        StartRequest; send start.agent_payload to start.channel if
+        start.needs_join, then build the response with start_response
+    """
+    start = StartRequest()
+    start.timer = timer
+    start.query_params = query_params
+    start.agent_payload = start.error = None
+
+    # Look up the precompiled constants for the profile
+    profile = query_params.get('profile')
+    constants = start.constants = get_constants(profile)
+    timer.lap("config")
+
+    # Use a pre-warmed channel (tokens and payload ready) when the request allows it
+    warm = take_warm_channel(constants, query_params) if warm_pool else None
+
+    # Get or generate channel
+    channel = start.channel = warm.channel if warm else query_params.get('channel') or generate_random_channel(10)
+
+    # Check if token-only mode
+    start.token_only = query_params.get('connect', 'true').lower() == 'false'
+
+    # Use BETA APP_ID for Anam avatar, regular APP_ID otherwise
+    avatar_enabled = resolve_setting(query_params, 'avatar_enabled', constants, "AVATAR_ENABLED")
+    avatar_vendor = query_params.get('avatar_vendor', constants["AVATAR_VENDOR"])
+    is_anam_avatar = anam_app_id and avatar_enabled and avatar_vendor == "anam"
+    start.app_id = constants["ANAM_BETA_APP_ID"] if is_anam_avatar else constants["APP_ID"]
+
+    # Generate tokens (for a join, just the avatar's token; the rest are minted during the join)
+    start.user_token = start.agent_video_token = None
+    if warm:
+        start.user_token, start.agent_video_token = warm.user_token, warm.agent_video_token
+    elif constants.has_certificate:
+        if start.token_only or avatar_enabled:
+            start.agent_video_token = build_token_cached(channel, constants["AGENT_VIDEO_UID"], constants, profile)
+        if start.token_only:
+            start.user_token = build_token_cached(channel, constants["USER_UID"], constants, profile)
+    else:
+        token = constants["APP_ID"] if app_id_as_token else ""
+        start.user_token = {"token": token, "uid": constants["USER_UID"]}
+        start.agent_video_token = {"token": token, "uid": constants["AGENT_VIDEO_UID"]}
+    timer.lap("tokens")
+
+    if start.token_only:
+        return start
+
+    # Create the agent payload
+    try:
+        start.agent_payload = warm.agent_payload if warm else render_agent_payload(
+            channel=channel,
+            constants=constants,
+            query_params=query_params,
+            agent_video_token=start.agent_video_token["token"] if start.agent_video_token else ""
+        )
+    except ValueError as e:
+        start.error = str(e)
+        return start
+    timer.lap("payload")
+    return start
+
+
+def observe_join_failure(start, error):
+    """Records a join that raised (e.g. the upstream was unreachable after retries)."""
+    start.timer.lap("upstream")
+    observe_start(start.timer, start.constants, start.query_params, start.agent_payload,
+                  error=("upstream", type(error).__name__))
+
+
+def join_and_mint(start, join):
+    """
+    Makes the blocking join while the deferred tokens are minted on a
+    minting thread. Laps "upstream" and records "deferred_tokens". A join
+    that raises is recorded as an upstream error before it propagates.
+
+    Args:
+        start: StartRequest from prepare_start
+        join: Zero-argument callable sending start.agent_payload
+
+    Returns:
+        The join result
+    """
+    try:
+        if not start.has_deferred_tokens:
+            agent_response = join()
+            start.timer.lap("upstream")
+            return agent_response
+        agent_response, mint_seconds = mint_during(join, start.mint_deferred_tokens)
+    except Exception as e:
+        observe_join_failure(start, e)
+        raise
+    start.timer.lap("upstream")
+    start.timer.record("deferred_tokens", mint_seconds)
+    return agent_response
+
+
+async def join_and_mint_async(start, join):
+    """
+    Async counterpart of join_and_mint: starts the join task, lets it write
+    its request, then mints the deferred tokens on the event loop while the
+    response is awaited.
+
+    Args:
+        start: StartRequest from prepare_start
+        join: Zero-argument callable returning the join coroutine
+
+    Returns:
+        The join result
+    """
+    try:
+        if not start.has_deferred_tokens:
+            agent_response = await join()
+            start.timer.lap("upstream")
+            return agent_response
+        pending = asyncio.ensure_future(join())
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        try:
+            start.mint_deferred_tokens()
+        except BaseException:
+            pending.cancel()
+            raise
+        mint_seconds = time.perf_counter() - started
+        agent_response = await pending
+    except Exception as e:
+        observe_join_failure(start, e)
+        raise
+    start.timer.lap("upstream")
+    start.timer.record("deferred_tokens", mint_seconds)
+    return agent_response
+
+
+def start_response(start, agent_response=None):
+    """
+    Builds the /start-agent response and records the request's metrics.
+
+    Args:
+        start: StartRequest from prepare_start
+        agent_response: Join result, if start.needs_join
+
+    Returns:
+        Tuple of (status code, response body)
+    """
+    constants, query_params, channel = start.constants, start.query_params, start.channel
+    has_certificate = constants.has_certificate
+
+    if start.error is not None:
+        observe_start(start.timer, constants, query_params, error=("payload", "invalid_config"))
+        return 400, {"error": start.error}
+
+    body = {
+        "audio_scenario": "10",
+        "token": start.user_token["token"],
+        "uid": start.user_token["uid"],
+        "channel": channel,
+        "appid": start.app_id,
+        "user_token": start.user_token,
+        "agent_video_token": start.agent_video_token,
+        "agent": {
+            "uid": constants["AGENT_UID"]
+        },
+        "agent_rtm_uid": f"{constants['AGENT_UID']}-{channel}",
+        "enable_string_uid": False,
+    }
+
+    # Token-only mode response
+    if start.token_only:
+        observe_start(start.timer, constants, query_params)
+        body["token_generation_method"] = token_generation_method(has_certificate)
+        body["agent_response"] = {
+            "status_code": 200,
+            "response": {"message": "Token-only mode: tokens generated successfully", "mode": "token_only", "connect": False},
+            "success": True
+        }
+        return 200, body
+
+    observe_start(start.timer, constants, query_params, start.agent_payload, agent_response)
+    body["agent_response"] = agent_response
+
+    # Add debug info if requested
+    if 'debug' in query_params:
+        body["debug"] = {
+            "agent_payload": start.agent_payload.to_dict(),
+            "channel": channel,
+            "api_url": f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/join",
+            "token_generation_method": token_generation_method(has_certificate),
+            "has_app_certificate": has_certificate
+        }
+    return 200, body
+
+
+def health_response(query_params):
+    """
+    Builds the /health response. Status is "degraded" while any upstream
+    circuit is open; with ?strict that is reported as 503.
+
+    Args:
+        query_params: Request query parameters
+
+    Returns:
+        Tuple of (status code, response body)
+    """
+    store = get_registry().store
+    upstreams = breaker_states()
+    degraded = any(state["state"] == "open" for state in upstreams.values())
+    body = {
+        "status": "degraded" if degraded else "ok",
+        "service": "agora-convoai-backend",
+        "token_cache": get_token_cache().stats(),
+        "profile_store": store.stats() if store is not None else None,
+        "upstreams": upstreams,
+        "sessions": get_sessions().stats(),
+        "single_flight": get_start_flights().stats(),
+        "warm_pool": get_warm_pools().stats()
+    }
+    return (503 if degraded and 'strict' in query_params else 200), body
@@ -0,0 +1,304 @@
+"""
+Structured, redacting logging for core modules
+
+Records go through a QueueHandler to a background QueueListener, so request
+threads only enqueue. Formatting, redaction and payload serialization happen
+on the writer thread. On AWS Lambda a synchronous handler is used instead,
+because background threads are frozen between invocations.
+
+Environment:
+    LOG_LEVEL: DEBUG, INFO (default), WARNING or ERROR
+    LOG_FORMAT: text (default) or json (default on Lambda)
+    LOG_MAX_BODY: Payloads longer than this many characters are sampled and
+        truncated (default 4096)
+    LOG_LARGE_SAMPLE_RATE: Fraction of large payloads that are logged
+        (default 0.1)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+
+ROOT_LOGGER = "convoai"
+REDACTED = "[redacted]"
+
+# Secret fields in join payloads, as paths from the payload root
+REDACT_PATHS = (
+    ("properties", "llm", "api_key"),
+    ("properties", "tts", "params", "key"),
+    ("properties", "tts", "params", "api_key"),
+    ("properties", "asr", "params", "key"),
+    ("properties", "avatar", "params", "api_key"),
+    ("properties", "avatar", "params", "anam_api_key"),
+    ("properties", "avatar", "params", "agora_token"),
+)
+
+# Header names that are always redacted (compared lowercase)
+REDACT_HEADERS = frozenset({"authorization"})
+
+
+def compile_redaction(paths):
+    """
+    Turns field paths into a nested lookup tree, e.g.
+    (("a", "b"), ("a", "c")) -> {"a": {"b": None, "c": None}}.
+
+    Args:
+        paths: Iterable of key tuples
+
+    Returns:
+        Dictionary tree where None marks a field to redact
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = None
+    return tree
+
+
+_REDACT_TREE = compile_redaction(REDACT_PATHS)
+
+
+def redact(value, tree=_REDACT_TREE):
+    """
+    Returns a copy of value with the fields in tree replaced by REDACTED.
+    Only dictionaries on a redaction path are copied.
+
+    Args:
+        value: Parsed JSON value
+        tree: Tree from compile_redaction (defaults to REDACT_PATHS)
+
+    Returns:
+        The redacted value
+    """
+    if not isinstance(value, dict):
+        return value
+    redacted = None
+    for key, subtree in tree.items():
+        if key not in value:
+            continue
+        if redacted is None:
+            redacted = dict(value)
+        redacted[key] = REDACTED if subtree is None else redact(value[key], subtree)
+    return value if redacted is None else redacted
+
+
+def redact_headers(headers):
+    """
+    Returns a copy of a header dictionary with credentials redacted.
+
+    Args:
+        headers: Dictionary of header names to values
+
+    Returns:
+        Dictionary with REDACT_HEADERS values replaced
+    """
+    return {name: REDACTED if name.lower() in REDACT_HEADERS else value
+            for name, value in (headers or {}).items()}
+
+
+class LazyPayload:
+    """
+    A JSON payload attached to a log record. Parsing, redaction and
+    truncation are deferred until the writer thread formats the record.
+
+    Args:
+        text: Serialized JSON (str or bytes)
+        limit: Maximum characters to keep once rendered
+    """
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text, limit):
+        self.text = text
+        self.limit = limit
+
+    def render(self):
+        """Returns the redacted payload (parsed), or truncated text if it is not JSON."""
+        text = self.text.decode("utf-8", "replace") if isinstance(self.text, bytes) else self.text
+        try:
+            value = redact(json.loads(text))
+        except ValueError:
+            value = text
+        else:
+            if len(text) <= self.limit:
+                return value
+            value = json.dumps(value)
+        if len(value) > self.limit:
+            value = f"{value[:self.limit]}... ({len(value) - self.limit} more chars)"
+        return value
+
+
+def _render_fields(record):
+    fields = getattr(record, "fields", None) or {}
+    return {key: value.render() if isinstance(value, LazyPayload) else value
+            for key, value in fields.items()}
+
+
+class TextFormatter(logging.Formatter):
+    """Formats records as: time LEVEL logger message key=value ..."""
+
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        for key, value in _render_fields(record).items():
+            if not isinstance(value, str):
+                value = json.dumps(value, separators=(",", ":"), default=str)
+            line += f" {key}={value}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_render_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    # The default prepare() formats the record on the calling thread so it can
+    # be pickled. The queue never leaves the process, so pass records as-is.
+    def prepare(self, record):
+        return record
+
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener = None
+_settings = {"max_body": 4096, "large_sample_rate": 0.1}
+
+
+def is_lambda():
+    """Returns True when running inside AWS Lambda."""
+    return bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def configure_logging(level=None, fmt=None, use_queue=None, stream=None):
+    """
+    Configures the "convoai" logger tree. Called automatically by
+    get_logger(); call it directly to override the environment.
+
+    Args:
+        level: Level name (defaults to LOG_LEVEL or INFO)
+        fmt: "text" or "json" (defaults to LOG_FORMAT, json on Lambda)
+        use_queue: Write from a background thread (defaults to True except
+            on Lambda)
+        stream: Output stream (defaults to stdout)
+
+    Returns:
+        The configured root "convoai" logger
+    """
+    global _configured, _listener
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER)
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        level = (level or os.environ.get("LOG_LEVEL") or "INFO").upper()
+        fmt = (fmt or os.environ.get("LOG_FORMAT") or ("json" if is_lambda() else "text")).lower()
+        use_queue = (not is_lambda()) if use_queue is None else use_queue
+        _settings["max_body"] = int(os.environ.get("LOG_MAX_BODY", 4096))
+        _settings["large_sample_rate"] = float(os.environ.get("LOG_LARGE_SAMPLE_RATE", 0.1))
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        if use_queue:
+            records = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(records, writer)
+            _listener.start()
+            root.addHandler(_InProcessQueueHandler(records))
+        else:
+            root.addHandler(writer)
+
+        root.setLevel(level)
+        root.propagate = False
+        _configured = True
+        return root
+
+
+def flush_logging():
+    """Writes out every queued record (stops and restarts the writer thread)."""
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+@atexit.register
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def get_logger(name):
+    """
+    Returns a logger under the "convoai" tree, configuring logging on first use.
+
+    Args:
+        name: Module name, e.g. "agent"
+
+    Returns:
+        logging.Logger instance
+    """
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def log_event(logger, level, message, **fields):
+    """
+    Logs a message with structured fields. Nothing is built when the level
+    is disabled.
+
+    Args:
+        logger: Logger from get_logger
+        level: logging level, e.g. logging.INFO
+        message: Short event description
+        **fields: Values rendered as key=value (text) or JSON keys
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields})
+
+
+def log_payload(logger, message, payload, **fields):
+    """
+    Logs a serialized JSON payload at DEBUG level, redacted on the writer
+    thread. Payloads longer than LOG_MAX_BODY are logged only for a
+    LOG_LARGE_SAMPLE_RATE fraction of calls, and truncated.
+
+    Args:
+        logger: Logger from get_logger
+        message: Short event description
+        payload: Serialized JSON (str or bytes)
+        **fields: Additional structured fields
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    max_body = _settings["max_body"]
+    if len(payload) > max_body and random.random() >= _settings["large_sample_rate"]:
+        return
+    fields["payload"] = LazyPayload(payload, max_body)
+    logger.debug(message, extra={"fields": fields})
+
@@ -0,0 +1,314 @@
+"""
+Request stage timers and Prometheus metrics
+
+StageTimer measures the stages of one /start-agent request (config, tokens,
+payload, upstream) with a perf_counter lap per stage. observe_start() feeds
+the laps into histograms labelled by profile, TTS/ASR/avatar vendor and
+upstream status, and render_metrics() produces the Prometheus text format
+for GET /metrics. Cache and circuit breaker counters are read from their
+modules at scrape time, so the request path pays nothing for them.
+
+Environment:
+    METRICS_LOG: "true" to also log each request's timings as a structured
+        line (for Lambda, where there is nothing to scrape)
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+
+from core.breaker import breaker_states
+from core.config import get_registry
+from core.log import get_logger, log_event
+from core.templates import get_template_cache
+from core.tokens import get_token_cache
+from core.warmpool import get_warm_pools
+
+
+logger = get_logger("metrics")
+
+# Seconds; covers cached token/payload work up to slow upstream joins
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Label values outside these sets are reported as "other" to bound cardinality
+TTS_VENDORS = frozenset({"elevenlabs", "openai", "cartesia", "rime"})
+ASR_VENDORS = frozenset({"ares", "deepgram"})
+AVATAR_VENDORS = frozenset({"heygen", "anam"})
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with labels.
+
+    Args:
+        name: Metric name (should end in _total)
+        help: Help text
+        labelnames: Tuple of label names
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Histogram:
+    """
+    Histogram with labels. Each observation increments one bucket; the
+    cumulative counts are only computed when rendering.
+
+    Args:
+        name: Metric name (should end in _seconds for durations)
+        help: Help text
+        labelnames: Tuple of label names
+        buckets: Sorted upper bounds
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket"
+                             f"{_format_labels(self.labelnames + ('le',), labels + (_format_value(bound),))}"
+                             f" {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(round(series[-1], 6))}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "convoai_stage_duration_seconds", "Time spent in each /start-agent stage",
+    ("stage", "profile", "tts_vendor", "asr_vendor", "avatar_vendor", "status"))
+REQUESTS = Counter("convoai_requests_total", "Requests handled", ("endpoint", "status"))
+ERRORS = Counter("convoai_errors_total", "Failed requests by stage and reason", ("stage", "reason"))
+
+_METRICS = (STAGE_SECONDS, REQUESTS, ERRORS)
+
+
+class StageTimer:
+    """
+    Lap timer for the stages of one request.
+
+    Stages that ran alongside another stage (see record) are not laps: their
+    time is also counted in the stage they overlapped, so the stages can add
+    up to more than the total.
+
+    Example:
+        timer = StageTimer()
+        constants = get_constants(profile)
+        timer.lap("config")
+    """
+
+    __slots__ = ("started", "last", "stages", "concurrent")
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.stages = {}
+        self.concurrent = set()
+
+    def lap(self, stage):
+        """Attributes the time since the previous lap to stage. Returns the duration."""
+        now = time.perf_counter()
+        seconds = now - self.last
+        self.last = now
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        return seconds
+
+    def record(self, stage, seconds):
+        """Adds a stage that ran concurrently with the laps, without moving the lap point."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.concurrent.add(stage)
+
+    def total(self):
+        """Seconds since the timer started."""
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """
+        Formats the stages as a Server-Timing header value in milliseconds,
+        e.g. "config;dur=0.05, tokens;dur=0.31, total;dur=0.4". Concurrent
+        stages are described as such, e.g. 'deferred_tokens;dur=0.3;desc="concurrent"'.
+        """
+        entries = [f"{stage};dur={seconds * 1000:.2f}" + (';desc="concurrent"' if stage in self.concurrent else "")
+                   for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.total() * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def _label(value, known):
+    if not value:
+        return "none"
+    return value if value in known else "other"
+
+
+def _profile_label(constants):
+    """
+    Profiles declared in the environment (or WARM_POOL_PROFILES) keep their
+    name; profiles only found in a profile store, which may hold thousands,
+    are reported as "store".
+    """
+    profile = getattr(constants, "profile", None)
+    if not profile:
+        return "default"
+    if profile in get_registry().profiles or profile in get_warm_pools().profiles:
+        return profile
+    return "store"
+
+
+def start_labels(constants, query_params, agent_payload=None, agent_response=None):
+    """
+    Returns the (profile, tts_vendor, asr_vendor, avatar_vendor, status)
+    label values for a /start-agent request.
+    """
+    avatar_vendor = getattr(agent_payload, "avatar_vendor", None) if agent_payload is not None else None
+    return (
+        _profile_label(constants),
+        _label(query_params.get("tts_vendor", constants.get("TTS_VENDOR")), TTS_VENDORS),
+        _label(query_params.get("asr_vendor", constants.get("ASR_VENDOR")), ASR_VENDORS),
+        _label(avatar_vendor, AVATAR_VENDORS),
+        str(agent_response["status_code"]) if agent_response is not None else "none",
+    )
+
+
+def observe_start(timer, constants, query_params, agent_payload=None, agent_response=None,
+                  endpoint="start-agent", error=None):
+    """
+    Records a finished /start-agent request: one histogram sample per stage
+    plus the total, the request counter and any error.
+
+    Args:
+        timer: StageTimer for the request
+        constants: ProfileConfig or dictionary of constants
+        query_params: Request query parameters
+        agent_payload: RenderedPayload, if one was built
+        agent_response: Agent result dictionary, if a join was made
+        endpoint: Endpoint label for the request counter
+        error: Optional (stage, reason) for a request rejected before the join
+    """
+    labels = start_labels(constants, query_params, agent_payload, agent_response)
+    for stage, seconds in timer.stages.items():
+        STAGE_SECONDS.observe(seconds, stage, *labels)
+    total = timer.total()
+    STAGE_SECONDS.observe(total, "total", *labels)
+
+    status = labels[-1]
+    if error is not None:
+        ERRORS.inc(*error)
+        status = "error"
+    elif agent_response is not None and not agent_response["success"]:
+        ERRORS.inc("upstream", "circuit_open" if agent_response.get("circuit_open") else status)
+    REQUESTS.inc(endpoint, status)
+
+    if os.environ.get("METRICS_LOG", "false").lower() == "true":
+        log_event(logger, logging.INFO, "Request timings", endpoint=endpoint, profile=labels[0],
+                  tts_vendor=labels[1], asr_vendor=labels[2], avatar_vendor=labels[3], status=status,
+                  total_ms=round(total * 1000, 2),
+                  **{f"{stage}_ms": round(seconds * 1000, 2) for stage, seconds in timer.stages.items()})
+
+
+def _collected():
+    """
+    Yields (name, type, help, [(labelnames, labelvalues, value)]) for values
+    owned by other modules, read at scrape time.
+    """
+    caches = [("token", get_token_cache().stats()), ("template", get_template_cache().stats())]
+    for profile, stats in get_warm_pools().stats().items():
+        caches.append((f"warm_pool:{profile or 'default'}", stats))
+    yield ("convoai_cache_hits_total", "counter", "Cache hits",
+           [(("cache",), (name, ), stats["hits"]) for name, stats in caches])
+    yield ("convoai_cache_misses_total", "counter", "Cache misses",
+           [(("cache",), (name, ), stats["misses"]) for name, stats in caches])
+
+    states = breaker_states()
+    yield ("convoai_upstream_circuit_open", "gauge", "1 while the upstream circuit is open",
+           [(("upstream",), (upstream,), int(state["state"] == "open")) for upstream, state in states.items()])
+    yield ("convoai_upstream_circuit_rejected_total", "counter", "Calls failed fast by an open circuit",
+           [(("upstream",), (upstream,), state["rejected"]) for upstream, state in states.items()])
+
+
+def render_metrics():
+    """
+    Renders every metric in the Prometheus text exposition format (0.0.4).
+
+    Returns:
+        The exposition text
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    for name, metric_type, help, samples in _collected():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(f"{name}{_format_labels(names, values)} {_format_value(value)}"
+                     for names, values, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,211 @@
+"""
+Keep-alive HTTP(S) connection pool for Agora REST calls
+
+Connections are pooled per (scheme, host) at module level, so they are reused
+across Flask requests and across warm AWS Lambda invocations.
+"""
+
+import http.client
+import select
+import ssl
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+
+
+PoolResponse = namedtuple("PoolResponse", ["status", "headers", "body"])
+
+# Errors that mean a reused keep-alive connection was closed by the server
+# before our request reached it. Safe to retry once on a fresh connection.
+RESET_ERRORS = (
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+    http.client.RemoteDisconnected,
+)
+
+
+class ConnectionPool:
+    """
+    Per-host pool of idle keep-alive connections.
+
+    Args:
+        max_size: Maximum idle connections kept per host
+        idle_timeout: Seconds an idle connection may sit in the pool
+        timeout: Default socket timeout for new connections
+        ssl_context: Optional SSL context for HTTPS connections
+    """
+
+    def __init__(self, max_size=10, idle_timeout=60, timeout=30, ssl_context=None):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "stale": 0, "retried": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _new_connection(self, scheme, host, timeout):
+        self._count("created")
+        if scheme == "http":
+            return http.client.HTTPConnection(host, timeout=timeout)
+        context = self.ssl_context or ssl.create_default_context()
+        return http.client.HTTPSConnection(host, timeout=timeout, context=context)
+
+    @staticmethod
+    def _is_stale(conn):
+        """An idle connection is stale if its socket is gone or readable (EOF)."""
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _acquire(self, key, timeout):
+        """
+        Returns (connection, reused) for the given (scheme, host) key.
+        Expired and stale idle connections are closed on the way.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used > self.idle_timeout or self._is_stale(conn):
+                    self.stats["stale"] += 1
+                    conn.close()
+                    continue
+                self.stats["reused"] += 1
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._new_connection(key[0], key[1], timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) >= self.max_size:
+                conn.close()
+                return
+            idle.append((conn, time.monotonic()))
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        """
+        Sends a request over a pooled connection.
+
+        A reset on a reused connection is retried once on a fresh connection,
+        since the server may have closed it while it sat idle.
+
+        Args:
+            method: HTTP method
+            url: Absolute http:// or https:// URL
+            body: Optional request body (str or bytes)
+            headers: Optional dictionary of request headers
+            timeout: Socket timeout in seconds (defaults to pool timeout)
+
+        Returns:
+            PoolResponse with status, headers and body bytes
+        """
+        url_parts = urllib.parse.urlsplit(url)
+        key = (url_parts.scheme, url_parts.netloc)
+        path = url_parts.path or "/"
+        if url_parts.query:
+            path = f"{path}?{url_parts.query}"
+        timeout = self.timeout if timeout is None else timeout
+
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body, headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except RESET_ERRORS:
+                conn.close()
+                if reused:
+                    self._count("retried")
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+
+            return PoolResponse(response.status, dict(response.getheaders()), data)
+
+    def prewarm(self, url, count=1, timeout=None):
+        """
+        Opens connections to the URL's host ahead of the first request, so no
+        request pays for DNS, TCP and the TLS handshake.
+
+        Args:
+            url: Any URL on the host
+            count: Idle connections wanted for the host
+            timeout: Connect timeout in seconds (defaults to pool timeout)
+
+        Returns:
+            Number of connections opened
+
+        Raises:
+            OSError: If a connection cannot be opened
+        """
+        url_parts = urllib.parse.urlsplit(url)
+        key = (url_parts.scheme, url_parts.netloc)
+        timeout = self.timeout if timeout is None else timeout
+        opened = 0
+        for _ in range(min(count, self.max_size) - self.idle_count(*key)):
+            conn = self._new_connection(key[0], key[1], timeout)
+            try:
+                conn.connect()
+            except BaseException:
+                conn.close()
+                raise
+            self._release(key, conn)
+            opened += 1
+        return opened
+
+    def idle_count(self, scheme=None, host=None):
+        """Returns the number of idle connections, optionally for one host."""
+        with self._lock:
+            if scheme is not None:
+                return len(self._idle.get((scheme, host), []))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close(self):
+        """Closes every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    Returns:
+        The shared ConnectionPool instance
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ConnectionPool()
+    return _default_pool
@@ -0,0 +1,195 @@
+"""
+File-backed profile store (JSON, TOML or SQLite) for large numbers of profiles
+
+Each profile is a set of setting overrides, e.g.
+    {"profiles": {"ACME": {"TTS_VENDOR": "rime", "DEFAULT_GREETING": "Hi!"}}}
+
+Profiles are compiled lazily on first use and kept in an LRU. Settings a
+profile does not define fall back to PROFILE_NAME / NAME environment
+variables and then to the built-in defaults, exactly like env-only profiles.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# Unknown names are remembered in their own, smaller LRU so that lookups of
+# missing profiles cannot evict compiled ones
+MISSING_CACHE_SIZE = 256
+
+
+class ProfileStore:
+    """
+    Base class: subclasses implement load(name) and names().
+
+    Args:
+        path: Path of the backing file
+        cache_size: Maximum number of compiled profiles kept in memory
+    """
+
+    def __init__(self, path, cache_size=1024):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._missing = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, name):
+        """Returns the raw overrides for an uppercase profile name, or None."""
+        raise NotImplementedError
+
+    def names(self):
+        """Returns every profile name in the store."""
+        raise NotImplementedError
+
+    def get(self, name, environ):
+        """
+        Returns the compiled ProfileConfig for a profile, or None if the store
+        does not have it. The most recent unknown names are cached separately,
+        so repeated lookups of them stay O(1).
+
+        Args:
+            name: Uppercase profile name
+            environ: Environment mapping used for fallbacks
+
+        Returns:
+            ProfileConfig instance or None
+        """
+        with self._lock:
+            for cache in (self._cache, self._missing):
+                if name in cache:
+                    cache.move_to_end(name)
+                    self.hits += 1
+                    return cache[name]
+            self.misses += 1
+
+        from core.config import compile_profile
+        overrides = self.load(name)
+        config = None if overrides is None else compile_profile(name, environ, overrides)
+
+        with self._lock:
+            cache, size = (self._missing, MISSING_CACHE_SIZE) if config is None else (self._cache, self.cache_size)
+            cache[name] = config
+            cache.move_to_end(name)
+            while len(cache) > size:
+                cache.popitem(last=False)
+        return config
+
+    def close(self):
+        """Drops the compiled profiles (subclasses also release the backing file)."""
+        with self._lock:
+            self._cache.clear()
+            self._missing.clear()
+
+    def stats(self):
+        """Returns cache size and hit/miss counters."""
+        with self._lock:
+            return {
+                "path": self.path,
+                "cached": len(self._cache),
+                "cached_missing": len(self._missing),
+                "cache_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+def _normalize(profiles):
+    """Uppercases profile names and setting names."""
+    return {
+        str(name).upper(): {str(key).upper(): value for key, value in settings.items()}
+        for name, settings in profiles.items()
+    }
+
+
+class MappingProfileStore(ProfileStore):
+    """
+    Store backed by a JSON or TOML document. The document is parsed once into
+    a name -> overrides index; profiles are compiled only when requested.
+    """
+
+    def __init__(self, path, profiles, cache_size=1024):
+        super().__init__(path, cache_size)
+        self._index = _normalize(profiles)
+
+    def load(self, name):
+        return self._index.get(name)
+
+    def names(self):
+        return list(self._index)
+
+
+class SqliteProfileStore(ProfileStore):
+    """
+    Store backed by an SQLite database with a table
+        profiles(name TEXT PRIMARY KEY COLLATE NOCASE, settings TEXT)
+    where settings is a JSON object. Each lookup is one primary-key search,
+    so nothing is loaded until it is used. Without COLLATE NOCASE the
+    names must be stored in uppercase.
+    """
+
+    def __init__(self, path, cache_size=1024):
+        super().__init__(path, cache_size)
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._db_lock = threading.Lock()
+
+    def load(self, name):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT settings FROM profiles WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        return {key.upper(): value for key, value in json.loads(row[0]).items()}
+
+    def names(self):
+        with self._db_lock:
+            return [row[0].upper() for row in self._db.execute("SELECT name FROM profiles")]
+
+    def close(self):
+        super().close()
+        with self._db_lock:
+            self._db.close()
+
+
+def open_profile_store(path, cache_size=1024):
+    """
+    Opens a profile store, choosing the format from the file extension
+    (.json, .toml, .db/.sqlite/.sqlite3).
+
+    JSON and TOML documents may hold profiles at the top level or under a
+    "profiles" key.
+
+    Args:
+        path: Path of the store file
+        cache_size: Maximum number of compiled profiles kept in memory
+
+    Returns:
+        ProfileStore instance
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        return SqliteProfileStore(path, cache_size)
+
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+    elif extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML profile stores require Python 3.11+ (tomllib)") from None
+        with open(path, "rb") as f:
+            document = tomllib.load(f)
+    else:
+        raise ValueError(f"Unsupported profile store format: {path}")
+
+    profiles = document.get("profiles", document)
+    if not isinstance(profiles, dict) or not all(isinstance(v, dict) for v in profiles.values()):
+        raise ValueError(f"Profile store {path} must map profile names to objects")
+    return MappingProfileStore(path, profiles, cache_size)
@@ -0,0 +1,254 @@
+"""
+In-memory recorder for outbound Agora REST requests
+
+Replaces the per-request /tmp curl dumps. When ENABLE_CURL_DUMP is on, each
+join and leave call is appended to a bounded ring buffer. Recording only
+keeps references to the request and response; redaction, JSON parsing and
+curl rendering happen when an entry is read or flushed, never on the
+request path.
+
+Environment:
+    DEBUG_RECORDER_SIZE: Requests kept in memory (default 200)
+    DEBUG_RECORDER_DIR: Optional directory; entries are appended there as
+        JSON lines by a background thread, rotating at 1 MB (5 backups)
+"""
+
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+
+from core.log import redact, redact_headers
+
+
+DEFAULT_RECORDER_SIZE = 200
+MAX_RESPONSE_CHARS = 2048
+
+
+class RecordedRequest:
+    """One outbound request and its outcome."""
+
+    __slots__ = ("id", "ts", "method", "url", "channel", "headers", "body",
+                 "status", "response", "duration_ms", "error")
+
+    def __init__(self, id, method, url, headers, body, channel=None, status=None,
+                 response=None, duration_ms=None, error=None):
+        self.id = id
+        self.ts = time.time()
+        self.method = method
+        self.url = url
+        self.channel = channel
+        self.headers = headers
+        self.body = body
+        self.status = status
+        self.response = response
+        self.duration_ms = duration_ms
+        self.error = error
+
+    def _redacted_body(self):
+        body = self.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        if not body:
+            return None
+        try:
+            return redact(json.loads(body))
+        except ValueError:
+            return body
+
+    def to_dict(self):
+        """
+        Returns the entry as a JSON-serializable dictionary with secrets redacted.
+        """
+        return {
+            "id": self.id,
+            "ts": round(self.ts, 3),
+            "method": self.method,
+            "url": self.url,
+            "channel": self.channel,
+            "headers": redact_headers(self.headers),
+            "body": self._redacted_body(),
+            "status": self.status,
+            "response": self.response,
+            "duration_ms": self.duration_ms,
+            "error": self.error
+        }
+
+    def to_curl(self):
+        """
+        Renders the request as a bash script. Secrets stay redacted; the
+        Authorization header is read from $AGENT_AUTH_HEADER when run.
+        """
+        lines = [
+            "#!/bin/bash",
+            "# Agora ConvoAI Request",
+            f"# Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.ts))}",
+            f"# Channel: {self.channel}",
+            "",
+            f"curl -X {self.method} '{self.url}' \\",
+            "  -H \"Authorization: $AGENT_AUTH_HEADER\" \\",
+            "  -H 'Content-Type: application/json'",
+        ]
+        body = self._redacted_body()
+        if body is not None:
+            text = json.dumps(body, indent=2) if not isinstance(body, str) else body
+            lines[-1] += " \\"
+            lines.append("  -d '" + text.replace("'", "'\\''") + "'")
+        return "\n".join(lines) + "\n"
+
+
+class RequestRecorder:
+    """
+    Ring buffer of the most recent outbound requests.
+
+    Args:
+        capacity: Number of requests kept; older entries are dropped
+    """
+
+    def __init__(self, capacity=DEFAULT_RECORDER_SIZE):
+        self.capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def record(self, method, url, headers, body, channel=None, status=None,
+               response=None, duration_ms=None, error=None):
+        """
+        Appends a request. Stores references only, so this is O(1).
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            headers: Request headers (redacted when read)
+            body: Request body (str or bytes, redacted when read)
+            channel: Optional channel name
+            status: Response status code, if a response arrived
+            response: Response body text (truncated)
+            duration_ms: Round-trip time in milliseconds
+            error: Error description if the request raised
+
+        Returns:
+            The RecordedRequest
+        """
+        if response is not None and len(response) > MAX_RESPONSE_CHARS:
+            response = response[:MAX_RESPONSE_CHARS]
+        with self._lock:
+            entry = RecordedRequest(next(self._ids), method, url, headers, body, channel,
+                                    status, response, duration_ms, error)
+            self._entries.append(entry)
+        return entry
+
+    def get(self, entry_id):
+        """Returns the entry with the given id, or None if it was dropped."""
+        with self._lock:
+            for entry in self._entries:
+                if entry.id == entry_id:
+                    return entry
+        return None
+
+    def page(self, limit=50, before=None):
+        """
+        Returns recorded requests newest first.
+
+        Args:
+            limit: Maximum entries to return
+            before: Only return entries with an id lower than this
+
+        Returns:
+            Dictionary with redacted requests and the cursor for the next page
+        """
+        with self._lock:
+            entries = [entry for entry in reversed(self._entries) if before is None or entry.id < before]
+        page = entries[:limit]
+        return {
+            "requests": [entry.to_dict() for entry in page],
+            "next_before": page[-1].id if len(entries) > limit else None,
+            "capacity": self.capacity
+        }
+
+    def since(self, entry_id):
+        """Returns entries with an id greater than entry_id, oldest first."""
+        with self._lock:
+            return [entry for entry in self._entries if entry.id > entry_id]
+
+    def clear(self):
+        """Drops every recorded request."""
+        with self._lock:
+            self._entries.clear()
+
+
+class RecordFlusher:
+    """
+    Background thread appending new recorder entries as redacted JSON lines
+    to a rotating file.
+
+    Args:
+        recorder: RequestRecorder to read from
+        directory: Directory for requests.jsonl and its rotated backups
+        interval: Seconds between flushes
+        max_bytes: Size at which the file is rotated
+        backups: Number of rotated files kept
+    """
+
+    def __init__(self, recorder, directory, interval=5.0, max_bytes=1024 * 1024, backups=5):
+        os.makedirs(directory, exist_ok=True)
+        self.recorder = recorder
+        self.path = os.path.join(directory, "requests.jsonl")
+        self.interval = interval
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, delay=True)
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._last_id = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-recorder-flush", daemon=True)
+
+    def flush(self):
+        """Writes entries recorded since the last flush. Returns how many were written."""
+        entries = self.recorder.since(self._last_id)
+        for entry in entries:
+            message = json.dumps(entry.to_dict(), default=str)
+            self._handler.emit(logging.makeLogRecord({"msg": message}))
+        if entries:
+            self._last_id = entries[-1].id
+        return len(entries)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+        self._handler.close()
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """
+    Returns the process-wide RequestRecorder, sized from DEBUG_RECORDER_SIZE
+    on first use. Starts a RecordFlusher when DEBUG_RECORDER_DIR is set.
+
+    Returns:
+        The shared RequestRecorder instance
+    """
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                recorder = RequestRecorder(int(os.environ.get("DEBUG_RECORDER_SIZE", DEFAULT_RECORDER_SIZE)))
+                directory = os.environ.get("DEBUG_RECORDER_DIR")
+                if directory:
+                    RecordFlusher(recorder, directory).start()
+                _recorder = recorder
+    return _recorder
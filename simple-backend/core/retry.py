@@ -0,0 +1,227 @@
+"""
+Retry policy for Agora REST calls
+
+Jittered exponential backoff within a total deadline budget. A response
+status or exception is retried only if it is classified as transient, and a
+Retry-After header from the server takes precedence over the computed delay.
+"""
+
+import asyncio
+import email.utils
+import http.client
+import random
+import time
+
+from core.config import TYPED_SETTINGS
+
+
+# Statuses worth another attempt: throttling and upstream/gateway failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Exceptions worth another attempt: the connection failed or timed out
+RETRY_EXCEPTIONS = (
+    ConnectionError,        # refused, reset, aborted, broken pipe
+    TimeoutError,           # socket and asyncio timeouts
+    http.client.IncompleteRead,
+    asyncio.IncompleteReadError,
+)
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parses a Retry-After header (delta seconds or an HTTP date).
+
+    Args:
+        value: Header value, or None
+        now: Current wall-clock time (defaults to time.time())
+
+    Returns:
+        Seconds to wait (never negative), or None if absent or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def header(headers, name):
+    """Case-insensitive header lookup. Returns None if the header is absent."""
+    name = name.lower()
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class RetryExhausted(TimeoutError):
+    """Raised when the deadline leaves no time for even one attempt."""
+
+
+class RetryPolicy:
+    """
+    Decides whether and when to retry a request.
+
+    Args:
+        max_attempts: Total attempts including the first (1 disables retries)
+        attempt_timeout: Timeout for a single attempt, in seconds
+        deadline: Total time budget for all attempts and waits, in seconds
+        base_delay: Backoff for the first retry, doubled on each retry
+        max_delay: Upper bound for a single backoff
+        retry_statuses: Response statuses that are retried
+        retry_exceptions: Exception types that are retried
+    """
+
+    def __init__(self, max_attempts=3, attempt_timeout=10.0, deadline=30.0, base_delay=0.25,
+                 max_delay=4.0, retry_statuses=RETRY_STATUSES, retry_exceptions=RETRY_EXCEPTIONS):
+        self.max_attempts = max(1, max_attempts)
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.retry_exceptions = retry_exceptions
+        self.clock = time.monotonic
+        self.sleep = time.sleep
+        self.sleep_async = asyncio.sleep
+        self.random = random.random
+
+    def backoff(self, retry_number):
+        """
+        Returns the full-jitter delay before a retry: uniform in
+        [0, min(max_delay, base_delay * 2 ** (retry_number - 1))].
+
+        Args:
+            retry_number: 1 for the first retry, 2 for the second, ...
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry_number - 1)))
+        return ceiling * self.random()
+
+    def is_retryable(self, response=None, error=None):
+        """Returns True if the response status or exception is transient."""
+        if error is not None:
+            return isinstance(error, self.retry_exceptions)
+        return response.status in self.retry_statuses
+
+    def _next_delay(self, attempt, response, remaining):
+        """
+        Returns the delay before the next attempt, or None to stop retrying.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if response is not None:
+            retry_after = parse_retry_after(header(response.headers, "Retry-After"))
+            if retry_after is not None:
+                delay = retry_after
+        # Only retry if the wait leaves time for a useful attempt
+        if delay >= remaining:
+            return None
+        return delay
+
+    def run(self, attempt_fn, on_retry=None):
+        """
+        Calls attempt_fn(timeout) until it succeeds, fails permanently, or the
+        attempt or time budget is used up.
+
+        Args:
+            attempt_fn: Callable taking the attempt timeout and returning a
+                response with .status and .headers (or raising)
+            on_retry: Optional callable (attempt, delay, response, error)
+                invoked before each wait
+
+        Returns:
+            Tuple of (response, attempts)
+
+        Raises:
+            The last exception if the final attempt raised
+        """
+        started = self.clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self.deadline - (self.clock() - started)
+            if remaining <= 0:
+                raise RetryExhausted(f"Deadline of {self.deadline}s exhausted after {attempt - 1} attempts")
+            response, error = None, None
+            try:
+                response = attempt_fn(min(self.attempt_timeout, remaining))
+            except Exception as e:
+                if not self.is_retryable(error=e):
+                    raise
+                error = e
+            else:
+                if not self.is_retryable(response=response):
+                    return response, attempt
+
+            delay = self._next_delay(attempt, response, self.deadline - (self.clock() - started))
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response, attempt
+            if on_retry is not None:
+                on_retry(attempt, delay, response, error)
+            self.sleep(delay)
+
+    async def run_async(self, attempt_fn, on_retry=None):
+        """
+        Async counterpart of run: attempt_fn(timeout) returns an awaitable.
+        """
+        started = self.clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self.deadline - (self.clock() - started)
+            if remaining <= 0:
+                raise RetryExhausted(f"Deadline of {self.deadline}s exhausted after {attempt - 1} attempts")
+            response, error = None, None
+            try:
+                response = await attempt_fn(min(self.attempt_timeout, remaining))
+            except Exception as e:
+                if not self.is_retryable(error=e):
+                    raise
+                error = e
+            else:
+                if not self.is_retryable(response=response):
+                    return response, attempt
+
+            delay = self._next_delay(attempt, response, self.deadline - (self.clock() - started))
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response, attempt
+            if on_retry is not None:
+                on_retry(attempt, delay, response, error)
+            await self.sleep_async(delay)
+
+
+def retry_policy_for(constants):
+    """
+    Builds the RetryPolicy for a profile from AGENT_RETRY_ATTEMPTS,
+    AGENT_RETRY_TIMEOUT and AGENT_RETRY_DEADLINE.
+
+    Args:
+        constants: ProfileConfig or dictionary of constants (plain
+            dictionaries without these keys get the defaults)
+
+    Returns:
+        RetryPolicy instance
+    """
+    def setting(name, default):
+        value = getattr(constants, name.lower(), None)
+        if value is None:
+            value = TYPED_SETTINGS[name](constants.get(name) or default)
+        return value
+
+    return RetryPolicy(
+        max_attempts=setting("AGENT_RETRY_ATTEMPTS", 3),
+        attempt_timeout=setting("AGENT_RETRY_TIMEOUT", 10.0),
+        deadline=setting("AGENT_RETRY_DEADLINE", 30.0),
+    )
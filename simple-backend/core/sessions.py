@@ -0,0 +1,186 @@
+"""
+In-process registry of running agents
+
+Successful joins are registered here so hangup and status calls can find the
+agent by channel (or list a profile's agents) without the client keeping the
+agent_id. Entries expire after the agent's idle_timeout and the oldest entries
+are evicted once the registry is full. The registry is per process; a miss is
+not proof that no agent is running.
+
+Environment:
+    SESSION_REGISTRY_SIZE: Maximum sessions kept (default 10000)
+"""
+
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_REGISTRY_SIZE = 10000
+
+
+class AgentSession:
+    """One running agent."""
+
+    __slots__ = ("agent_id", "channel", "profile", "started", "expires_at")
+
+    def __init__(self, agent_id, channel, profile, started, expires_at):
+        self.agent_id = agent_id
+        self.channel = channel
+        self.profile = profile
+        self.started = started
+        self.expires_at = expires_at
+
+    def to_dict(self):
+        return {
+            "agent_id": self.agent_id,
+            "channel": self.channel,
+            "profile": self.profile,
+            "started": round(self.started, 3),
+            "expires_at": round(self.expires_at, 3) if self.expires_at is not None else None
+        }
+
+
+class SessionRegistry:
+    """
+    Sessions indexed by agent id, channel and profile.
+
+    Args:
+        max_size: Maximum sessions kept; the oldest are evicted first
+    """
+
+    def __init__(self, max_size=DEFAULT_REGISTRY_SIZE):
+        self.max_size = max_size
+        self.clock = time.time
+        self._sessions = OrderedDict()   # agent_id -> session, oldest first
+        self._by_channel = {}            # channel -> session
+        self._by_profile = {}            # profile -> {agent_id: session}
+        self._expiry = []                # heap of (expires_at, agent_id)
+        self._lock = threading.Lock()
+        self.stats_counters = {"registered": 0, "expired": 0, "evicted": 0, "removed": 0}
+
+    def _discard(self, session):
+        del self._sessions[session.agent_id]
+        if self._by_channel.get(session.channel) is session:
+            del self._by_channel[session.channel]
+        profile_sessions = self._by_profile.get(session.profile)
+        if profile_sessions is not None:
+            profile_sessions.pop(session.agent_id, None)
+            if not profile_sessions:
+                del self._by_profile[session.profile]
+
+    def _expire(self, now):
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires_at, agent_id = heapq.heappop(expiry)
+            session = self._sessions.get(agent_id)
+            # Skip heap entries left behind by removed or re-registered sessions
+            if session is not None and session.expires_at == expires_at:
+                self._discard(session)
+                self.stats_counters["expired"] += 1
+
+    def _compact(self):
+        self._expiry = [(session.expires_at, session.agent_id) for session in self._sessions.values()
+                        if session.expires_at is not None]
+        heapq.heapify(self._expiry)
+
+    def add(self, agent_id, channel, profile=None, idle_timeout=None):
+        """
+        Registers a running agent. An earlier session with the same agent id
+        or channel is replaced (the agent name is the channel, so Agora runs
+        at most one agent per channel).
+
+        Args:
+            agent_id: Agent id from the join response
+            channel: The channel name
+            profile: Profile used for the join (None for the base config)
+            idle_timeout: Seconds until the session expires (None or 0 for never)
+
+        Returns:
+            The AgentSession
+        """
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            for previous in (self._sessions.get(agent_id), self._by_channel.get(channel)):
+                if previous is not None and previous.agent_id in self._sessions:
+                    self._discard(previous)
+
+            expires_at = now + idle_timeout if idle_timeout else None
+            session = AgentSession(agent_id, channel, profile, now, expires_at)
+            self._sessions[agent_id] = session
+            self._by_channel[channel] = session
+            self._by_profile.setdefault(profile, {})[agent_id] = session
+            if expires_at is not None:
+                heapq.heappush(self._expiry, (expires_at, agent_id))
+                if len(self._expiry) > 2 * self.max_size:
+                    self._compact()
+            self.stats_counters["registered"] += 1
+
+            while len(self._sessions) > self.max_size:
+                self._discard(next(iter(self._sessions.values())))
+                self.stats_counters["evicted"] += 1
+            return session
+
+    def get(self, agent_id):
+        """Returns the session for an agent id, or None."""
+        with self._lock:
+            self._expire(self.clock())
+            return self._sessions.get(agent_id)
+
+    def for_channel(self, channel):
+        """Returns the session running on a channel, or None."""
+        with self._lock:
+            self._expire(self.clock())
+            return self._by_channel.get(channel)
+
+    def for_profile(self, profile):
+        """Returns the sessions started with a profile, oldest first."""
+        with self._lock:
+            self._expire(self.clock())
+            return list(self._by_profile.get(profile, {}).values())
+
+    def all(self):
+        """Returns every live session, oldest first."""
+        with self._lock:
+            self._expire(self.clock())
+            return list(self._sessions.values())
+
+    def remove(self, agent_id):
+        """
+        Forgets an agent (after a hangup).
+
+        Returns:
+            The removed session, or None if it was not registered
+        """
+        with self._lock:
+            session = self._sessions.get(agent_id)
+            if session is not None:
+                self._discard(session)
+                self.stats_counters["removed"] += 1
+            return session
+
+    def stats(self):
+        """Returns the size and counters as a dictionary."""
+        with self._lock:
+            self._expire(self.clock())
+            return dict(self.stats_counters, size=len(self._sessions), max_size=self.max_size)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_sessions():
+    """
+    Returns the process-wide SessionRegistry, sized from
+    SESSION_REGISTRY_SIZE on first use.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SessionRegistry(int(os.environ.get("SESSION_REGISTRY_SIZE", DEFAULT_REGISTRY_SIZE)))
+    return _registry
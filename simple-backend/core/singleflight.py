@@ -0,0 +1,138 @@
+"""
+Single-flight call coalescing
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the function, later callers wait for it and receive the same
+result or exception. Used to collapse duplicate /start-agent requests for one
+channel (double clicks, client retries) into a single Agora join.
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls by key, from threads (do) or coroutines
+    (do_async).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self.stats_counters = {"executed": 0, "shared": 0}
+
+    def do(self, key, fn):
+        """
+        Runs fn() unless a call with the same key is already in flight, in
+        which case waits for that call instead.
+
+        Args:
+            key: Hashable key, e.g. (profile, channel)
+            fn: Zero-argument callable
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            received another caller's result
+
+        Raises:
+            Whatever fn raised, in the leader and every waiter
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats_counters["shared"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats_counters["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a new flight; waiters already hold the call
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key, fn):
+        """
+        Async counterpart of do: runs fn() in a task unless a call with the
+        same key is already in flight on the event loop, in which case awaits
+        that task instead. A cancelled caller stops waiting but does not
+        cancel the shared call.
+
+        Args:
+            key: Hashable key, e.g. (profile, channel)
+            fn: Zero-argument callable returning an awaitable
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            received another caller's result
+
+        Raises:
+            Whatever fn raised, in the leader and every waiter
+        """
+        with self._lock:
+            task = self._async_calls.get(key)
+            if task is not None:
+                self.stats_counters["shared"] += 1
+                leader = False
+            else:
+                task = self._async_calls[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda done: self._async_done(key, done))
+                self.stats_counters["executed"] += 1
+                leader = True
+
+        # The call runs in its own task, so cancelling any caller (the leader
+        # included) leaves it running for the others
+        return await asyncio.shield(task), not leader
+
+    def _async_done(self, key, task):
+        # Later callers start a new flight
+        with self._lock:
+            if self._async_calls.get(key) is task:
+                del self._async_calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved even if every caller was cancelled
+
+    def in_flight(self):
+        """Returns the number of keys currently executing."""
+        with self._lock:
+            return len(self._calls) + len(self._async_calls)
+
+    def stats(self):
+        """Returns the counters and in-flight count as a dictionary."""
+        with self._lock:
+            return dict(self.stats_counters, in_flight=len(self._calls) + len(self._async_calls))
+
+
+_start_flights = SingleFlight()
+
+
+def get_start_flights():
+    """Returns the process-wide SingleFlight for agent starts."""
+    return _start_flights
@@ -0,0 +1,242 @@
+"""
+Precompiled agent payload templates
+
+For a given profile and set of overrides, only the channel and the avatar
+video token change between join requests. A PayloadTemplate serializes the
+payload once with placeholder strings in those positions, so rendering is a
+join of pre-serialized segments and JSON-escaped values. The output is
+identical to json.dumps(create_agent_payload(...), indent=2).
+"""
+
+import json
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+
+from core.agent import create_agent_payload
+from core.config import ProfileConfig
+
+
+# Query parameters read by create_agent_payload and its builders. Only these
+# take part in the template cache key, so unrelated parameters (channel,
+# profile, debug, ...) do not fragment the cache.
+PAYLOAD_PARAMS = frozenset({
+    "tts_vendor", "asr_vendor", "voice_id", "tts_model", "voice_stability", "sample_rate",
+    "voice_speed", "rime_speaker", "rime_model_id", "rime_lang", "rime_sampling_rate",
+    "rime_speed_alpha", "asr_language", "deepgram_model", "deepgram_language",
+    "llm_url", "llm_api_key", "llm_model", "prompt", "greeting", "failure_message",
+    "max_history", "idle_timeout", "vad_silence_duration_ms", "enable_aivad",
+    "avatar_enabled", "avatar_vendor", "heygen_avatar_id", "heygen_quality",
+    "heygen_idle_timeout", "anam_uid", "anam_api_key", "anam_base_url", "anam_avatar_id",
+})
+
+DEFAULT_TEMPLATE_CACHE_SIZE = 256
+
+# Placeholders are plain ASCII so json.dumps copies them through unchanged
+_CHANNEL = f"__tpl_channel_{secrets.token_hex(8)}__"
+_TOKEN = f"__tpl_token_{secrets.token_hex(8)}__"
+_PLACEHOLDER_RE = re.compile(f"({_CHANNEL}|{_TOKEN})")
+
+
+def _escape(value):
+    """Returns a string as JSON string content, escaped exactly as json.dumps would."""
+    return json.dumps(value)[1:-1]
+
+
+class RenderedPayload:
+    """
+    A serialized join payload, accepted by send_agent_to_channel in place of
+    the payload dictionary.
+
+    Attributes:
+        json: The payload serialized with indent=2
+        avatar_vendor: Vendor of the avatar block, or None without an avatar
+        advanced_features: The properties.advanced_features dictionary
+        idle_timeout: The properties.idle_timeout value
+    """
+
+    __slots__ = ("json", "avatar_vendor", "advanced_features", "idle_timeout")
+
+    def __init__(self, json_text, avatar_vendor, advanced_features, idle_timeout=None):
+        self.json = json_text
+        self.avatar_vendor = avatar_vendor
+        self.advanced_features = advanced_features
+        self.idle_timeout = idle_timeout
+
+    def to_dict(self):
+        """Parses the payload back into an OrderedDict (for debug output)."""
+        return json.loads(self.json, object_pairs_hook=OrderedDict)
+
+
+class PayloadTemplate:
+    """
+    Pre-serialized payload with the channel and avatar token spliced in per
+    render.
+
+    Args:
+        constants: ProfileConfig or dictionary of constants
+        query_params: Query parameter overrides
+        has_token: Whether renders will pass a non-empty agent video token
+            (an empty token changes the Anam avatar block)
+    """
+
+    __slots__ = ("constants", "segments", "slots", "avatar_vendor", "advanced_features", "idle_timeout")
+
+    def __init__(self, constants, query_params, has_token):
+        payload = create_agent_payload(
+            channel=_CHANNEL,
+            constants=constants,
+            query_params=query_params,
+            agent_video_token=_TOKEN if has_token else ""
+        )
+        text = json.dumps(payload, indent=2)
+
+        # Alternating segments and placeholders: seg, ph, seg, ph, ..., seg
+        parts = _PLACEHOLDER_RE.split(text)
+
+        self.constants = constants
+        self.segments = tuple(parts[0::2])
+        self.slots = tuple("channel" if part == _CHANNEL else "token" for part in parts[1::2])
+        properties = payload["properties"]
+        self.avatar_vendor = properties.get("avatar", {}).get("vendor")
+        self.advanced_features = properties["advanced_features"]
+        self.idle_timeout = properties.get("idle_timeout")
+
+    def render(self, channel, agent_video_token=""):
+        """
+        Renders the payload for one request.
+
+        Args:
+            channel: The channel name
+            agent_video_token: Token for the avatar video stream
+
+        Returns:
+            RenderedPayload instance
+        """
+        values = {"channel": _escape(channel), "token": _escape(agent_video_token or "")}
+        segments = self.segments
+        parts = [segments[0]]
+        for index, slot in enumerate(self.slots):
+            parts.append(values[slot])
+            parts.append(segments[index + 1])
+        return RenderedPayload("".join(parts), self.avatar_vendor, self.advanced_features, self.idle_timeout)
+
+
+def override_fingerprint(query_params):
+    """
+    Returns a hashable fingerprint of the overrides that affect the payload.
+
+    Args:
+        query_params: Query parameter overrides
+
+    Returns:
+        Sorted tuple of (name, value) pairs
+    """
+    return tuple(sorted(
+        (key, str(value)) for key, value in (query_params or {}).items() if key in PAYLOAD_PARAMS))
+
+
+class TemplateCache:
+    """
+    LRU of compiled templates keyed by (profile config, override fingerprint,
+    token presence). Entries hold their ProfileConfig, so a config replaced
+    by a reload simply stops being looked up and ages out.
+
+    Args:
+        max_size: Maximum number of templates kept (0 disables caching)
+    """
+
+    def __init__(self, max_size=DEFAULT_TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, constants, query_params, has_token):
+        """
+        Returns the compiled template, compiling it on a miss.
+
+        Plain constants dictionaries are mutable, so only ProfileConfig
+        instances are cached.
+
+        Args:
+            constants: ProfileConfig or dictionary of constants
+            query_params: Query parameter overrides
+            has_token: Whether a non-empty agent video token will be passed
+
+        Returns:
+            PayloadTemplate instance
+        """
+        fingerprint = override_fingerprint(query_params)
+        if not isinstance(constants, ProfileConfig) or self.max_size <= 0:
+            return PayloadTemplate(constants, dict(fingerprint), has_token)
+
+        key = (id(constants), fingerprint, has_token)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None and template.constants is constants:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        template = PayloadTemplate(constants, dict(fingerprint), has_token)
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def stats(self):
+        """Returns cache size and hit/miss counters."""
+        with self._lock:
+            return {"size": len(self._templates), "max_size": self.max_size,
+                    "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Drops every compiled template."""
+        with self._lock:
+            self._templates.clear()
+
+
+_template_cache = None
+
+
+def get_template_cache():
+    """
+    Returns the process-wide TemplateCache, sized from TEMPLATE_CACHE_SIZE on
+    first use.
+
+    Returns:
+        The shared TemplateCache instance
+    """
+    global _template_cache
+    if _template_cache is None:
+        _template_cache = TemplateCache(
+            max_size=int(os.environ.get('TEMPLATE_CACHE_SIZE', DEFAULT_TEMPLATE_CACHE_SIZE)))
+    return _template_cache
+
+
+def render_agent_payload(channel, constants, query_params=None, agent_video_token=None):
+    """
+    Cached equivalent of create_agent_payload that returns the serialized
+    payload.
+
+    Args:
+        channel: The channel name
+        constants: ProfileConfig or dictionary of constants
+        query_params: Optional query parameters for overrides
+        agent_video_token: Token for avatar video (if avatar enabled)
+
+    Returns:
+        RenderedPayload instance
+
+    Raises:
+        ValueError: If the configuration is invalid (as create_agent_payload)
+    """
+    template = get_template_cache().get(constants, query_params or {}, bool(agent_video_token))
+    return template.render(channel, agent_video_token)
@@ -7,10 +7,17 @@ from hashlib import sha256
 import base64
 import struct
 import zlib
+import os
 import secrets
+import threading
 import time
+import logging
 from collections import OrderedDict
 
+from core.log import get_logger, log_event
+
+
+logger = get_logger("tokens")
 
 def get_version():
     """Returns the token version string."""
@@ -147,6 +154,174 @@ class AccessToken:
         return get_version() + base64.b64encode(zlib.compress(pack_string(signature) + signing_info)).decode('utf-8')
 
 
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_TOKEN_HEADER = struct.Struct('<IIIH')  # issue_ts, expire, salt, service count
+
+
+class SaltPool:
+    """
+    Thread-safe source of token salts (1..99999999) drawn from os.urandom in
+    blocks, instead of creating a SystemRandom per token.
+    """
+
+    def __init__(self, block_size=1024):
+        self._unpack = struct.Struct(f'<{block_size}I').unpack
+        self._block_bytes = 4 * block_size
+        self._salts = []
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if not self._salts:
+                self._salts = [1 + value % 99999999 for value in self._unpack(os.urandom(self._block_bytes))]
+            return self._salts.pop()
+
+
+_salt_pool = SaltPool()
+
+
+class TokenMinter:
+    """
+    Reusable, thread-safe v007 RTC+RTM token builder bound to one app id and
+    certificate.
+
+    Produces the same bytes as AccessToken with ServiceRtc (join, publish
+    audio/video/data) and ServiceRtm (login) for the same salt and issue_ts,
+    but keeps the encoded keys, privilege maps and signing key derivation
+    across calls.
+
+    Args:
+        app_id: 32-character hex App ID
+        app_certificate: 32-character hex App Certificate
+        privilege_expire: Lifetime of the RTC privileges in seconds
+        token_expire: Lifetime of the RTM login privilege in seconds
+        expire: Token expire field (AccessToken default is 900)
+    """
+
+    def __init__(self, app_id, app_certificate, privilege_expire=24 * 3600, token_expire=24 * 3600, expire=900):
+        self.app_id = app_id
+        # Seconds a token stays usable: the token expire field and both
+        # privilege lifetimes all have to be valid
+        self.lifetime = min(expire, privilege_expire, token_expire)
+        self._app_cert = app_certificate.encode('utf-8')
+        self._app_id_packed = pack_string(app_id)
+        self._expire = expire
+        self._version = get_version()
+
+        self._rtc_prefix = _U16.pack(ServiceRtc.kServiceType) + pack_map_uint32({
+            ServiceRtc.kPrivilegeJoinChannel: privilege_expire,
+            ServiceRtc.kPrivilegePublishAudioStream: privilege_expire,
+            ServiceRtc.kPrivilegePublishVideoStream: privilege_expire,
+            ServiceRtc.kPrivilegePublishDataStream: privilege_expire,
+        })
+        self._rtm_prefix = _U16.pack(ServiceRtm.kServiceType) + pack_map_uint32({
+            ServiceRtm.kPrivilegeLogin: token_expire,
+        })
+
+        # HMAC(issue_ts, certificate) only changes once a second
+        self._ts_signing = (None, None)
+
+    def _ts_key(self, issue_ts):
+        cached_ts, key = self._ts_signing
+        if cached_ts != issue_ts:
+            key = hmac.digest(_U32.pack(issue_ts), self._app_cert, 'sha256')
+            self._ts_signing = (issue_ts, key)
+        return key
+
+    def _signing_key(self, issue_ts, salt):
+        return hmac.digest(_U32.pack(salt), self._ts_key(issue_ts), 'sha256')
+
+    def _header(self, issue_ts, salt):
+        return self._app_id_packed + _TOKEN_HEADER.pack(issue_ts, self._expire, salt, 2)
+
+    def _services(self, channel, uid):
+        if isinstance(channel, str):
+            channel = channel.encode('utf-8')
+        account = str(uid).encode('utf-8')
+        rtc_uid = b'' if uid == 0 else account
+        return b''.join([
+            self._rtc_prefix, _U16.pack(len(channel)), channel, _U16.pack(len(rtc_uid)), rtc_uid,
+            self._rtm_prefix, _U16.pack(len(account)), account,
+        ])
+
+    def _encode(self, signature, signing_info):
+        content = b''.join([_U16.pack(len(signature)), signature, signing_info])
+        return self._version + base64.b64encode(zlib.compress(content)).decode('utf-8')
+
+    def mint(self, channel, uid, issue_ts=None, salt=None):
+        """
+        Mints one RTC+RTM token.
+
+        Args:
+            channel: The channel name
+            uid: The user's account/UID
+            issue_ts: Optional issue timestamp (defaults to now)
+            salt: Optional salt (defaults to the pooled entropy source)
+
+        Returns:
+            Token string
+        """
+        issue_ts = issue_ts or int(time.time())
+        salt = salt or _salt_pool.next()
+        signing_info = self._header(issue_ts, salt) + self._services(channel, uid)
+        signature = hmac.digest(self._signing_key(issue_ts, salt), signing_info, 'sha256')
+        return self._encode(signature, signing_info)
+
+    def mint_many(self, pairs, issue_ts=None, salt=None):
+        """
+        Mints tokens for many (channel, uid) pairs sharing one issue_ts and salt,
+        so the signing key is derived once and its keyed HMAC is copied per token.
+
+        Args:
+            pairs: Iterable of (channel, uid) tuples
+            issue_ts: Optional issue timestamp (defaults to now)
+            salt: Optional salt (defaults to the pooled entropy source)
+
+        Returns:
+            List of token strings in input order
+        """
+        issue_ts = issue_ts or int(time.time())
+        salt = salt or _salt_pool.next()
+        header = self._header(issue_ts, salt)
+        signer = hmac.new(self._signing_key(issue_ts, salt), digestmod=sha256)
+
+        tokens = []
+        for channel, uid in pairs:
+            signing_info = header + self._services(channel, uid)
+            mac = signer.copy()
+            mac.update(signing_info)
+            tokens.append(self._encode(mac.digest(), signing_info))
+        return tokens
+
+
+_minters = {}
+_minters_lock = threading.Lock()
+MAX_MINTERS = 64
+
+
+def get_minter(constants):
+    """
+    Returns the shared TokenMinter for the app id, certificate and expiries
+    in constants, creating it on first use.
+
+    Args:
+        constants: Dictionary of constants
+
+    Returns:
+        TokenMinter instance
+    """
+    key = (constants["APP_ID"], constants["APP_CERTIFICATE"],
+           constants["PRIVILEGE_EXPIRE"], constants["TOKEN_EXPIRE"])
+    minter = _minters.get(key)
+    if minter is None:
+        with _minters_lock:
+            if len(_minters) >= MAX_MINTERS:
+                _minters.clear()
+            minter = _minters[key] = TokenMinter(*key)
+    return minter
+
+
 def build_token_with_rtm(channel_name, account, constants):
     """
     Builds a token with both RTC and RTM privileges using v007 token system.
@@ -163,19 +338,285 @@ def build_token_with_rtm(channel_name, account, constants):
     if not constants["APP_CERTIFICATE"]:
         return {"token": constants["APP_ID"], "uid": account}
 
-    token = AccessToken(constants["APP_ID"], constants["APP_CERTIFICATE"])
+    # Match AccessToken.build(), which returns '' for malformed credentials
+    if not _is_uuid(constants["APP_ID"]) or not _is_uuid(constants["APP_CERTIFICATE"]):
+        return {"token": "", "uid": account}
+
+    return {"token": get_minter(constants).mint(channel_name, account), "uid": account}
+
+
+def _is_uuid(data):
+    if len(data) != 32:
+        return False
+    try:
+        bytes.fromhex(data)
+    except ValueError:
+        return False
+    return True
+
+
+class TokenCache:
+    """
+    Bounded, thread-safe LRU cache of minted tokens keyed by
+    (profile, app id, certificate, channel, uid).
+
+    A cached token is returned while at least min_remaining seconds of its
+    lifetime are left; otherwise a fresh one is minted and cached.
+
+    Args:
+        max_size: Maximum number of cached tokens (least recently used evicted)
+        min_remaining: Minimum remaining lifetime in seconds for a cache hit
+    """
+
+    def __init__(self, max_size=10000, min_remaining=300):
+        self.max_size = max_size
+        self.min_remaining = min_remaining
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_mint(self, channel, uid, constants, profile=None, min_remaining=None):
+        """
+        Returns a cached token with enough lifetime left, or mints a new one.
+
+        Args:
+            channel: The channel name
+            uid: The user's account/UID
+            constants: Dictionary of constants
+            profile: Optional profile name (part of the cache key)
+            min_remaining: Optional per-call override of the re-mint threshold
+
+        Returns:
+            Token string
+        """
+        key = (profile, constants["APP_ID"], constants["APP_CERTIFICATE"], channel, str(uid))
+        threshold = self.min_remaining if min_remaining is None else min_remaining
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] - now >= threshold:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        minter = get_minter(constants)
+        issue_ts = int(now)
+        token = minter.mint(channel, uid, issue_ts=issue_ts)
+
+        with self._lock:
+            self._entries[key] = (token, issue_ts + minter.lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return token
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns size, capacity and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """
+    Returns the process-wide TokenCache, sized from TOKEN_CACHE_SIZE and
+    TOKEN_CACHE_MIN_REMAINING on first use.
+
+    Returns:
+        The shared TokenCache instance
+    """
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(
+            max_size=int(os.environ.get('TOKEN_CACHE_SIZE', 10000)),
+            min_remaining=int(os.environ.get('TOKEN_CACHE_MIN_REMAINING', 300))
+        )
+    return _token_cache
+
+
+def build_token_cached(channel_name, account, constants, profile=None):
+    """
+    Same as build_token_with_rtm, but reuses a still-valid token for the same
+    profile, channel and uid. Disabled when TOKEN_CACHE_SIZE is 0.
+
+    Args:
+        channel_name: The channel name
+        account: The user's account/UID
+        constants: Dictionary of constants
+        profile: Optional profile name
+
+    Returns:
+        Dictionary containing token and uid
+    """
+    cache = get_token_cache()
+    if (cache.max_size <= 0 or not constants["APP_CERTIFICATE"]
+            or not _is_uuid(constants["APP_ID"]) or not _is_uuid(constants["APP_CERTIFICATE"])):
+        return build_token_with_rtm(channel_name, account, constants)
+
+    return {"token": cache.get_or_mint(channel_name, account, constants, profile), "uid": account}
+
+
+# Threads minting tokens while the request thread waits on an Agora join
+MINT_THREADS = 4
+
+_mint_executor = None
+_mint_executor_lock = threading.Lock()
+
+
+def get_mint_executor():
+    """Returns the process-wide thread pool used by mint_during."""
+    global _mint_executor
+    if _mint_executor is None:
+        with _mint_executor_lock:
+            if _mint_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _mint_executor = ThreadPoolExecutor(max_workers=MINT_THREADS, thread_name_prefix="mint")
+    return _mint_executor
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def mint_during(join, mint):
+    """
+    Calls join() (a blocking Agora call) while mint() runs on a minting
+    thread, so tokens the join does not need are minted while it waits on
+    the network. The join starts first: the minting thread gets the
+    interpreter once the calling thread blocks on the socket.
+
+    Args:
+        join: Zero-argument callable making the upstream call
+        mint: Zero-argument callable minting the remaining tokens
+
+    Returns:
+        Tuple of (join's result, seconds mint() took)
+
+    Raises:
+        Whatever join() raised, else whatever mint() raised. If both fail,
+        the join's error is raised and the mint's is logged.
+    """
+    pending = get_mint_executor().submit(_timed, mint)
+    try:
+        result = join()
+    except BaseException:
+        # Wait for the mint so its failure is not silently dropped
+        try:
+            pending.result()
+        except Exception as e:
+            log_event(logger, logging.WARNING, "Token minting failed during a failed join",
+                      error=f"{type(e).__name__}: {e}")
+        raise
+    return result, pending.result()
+
+
+# Batches at least this large are split across the process pool (if enabled)
+PROCESS_POOL_THRESHOLD = 2000
+MAX_TOKEN_BATCH = 10000
+
+# One pool per size (TOKEN_BATCH_PROCESSES is per profile). Pools are never
+# shut down, so a batch can't lose its pool to a batch with another size.
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+
 
-    # RTC Service
-    rtc_service = ServiceRtc(channel_name, account)
-    rtc_service.add_privilege(ServiceRtc.kPrivilegeJoinChannel, constants["PRIVILEGE_EXPIRE"])
-    rtc_service.add_privilege(ServiceRtc.kPrivilegePublishAudioStream, constants["PRIVILEGE_EXPIRE"])
-    rtc_service.add_privilege(ServiceRtc.kPrivilegePublishVideoStream, constants["PRIVILEGE_EXPIRE"])
-    rtc_service.add_privilege(ServiceRtc.kPrivilegePublishDataStream, constants["PRIVILEGE_EXPIRE"])
-    token.add_service(rtc_service)
+def _mint_chunk(app_id, app_certificate, privilege_expire, token_expire, pairs):
+    """Mints a chunk of tokens with one minter (runs in worker processes)."""
+    return TokenMinter(app_id, app_certificate, privilege_expire, token_expire).mint_many(pairs)
 
-    # RTM Service
-    rtm_service = ServiceRtm(account)
-    rtm_service.add_privilege(ServiceRtm.kPrivilegeLogin, constants["TOKEN_EXPIRE"])
-    token.add_service(rtm_service)
 
-    return {"token": token.build(), "uid": account}
+def _get_process_pool(processes):
+    with _process_pools_lock:
+        pool = _process_pools.get(processes)
+        if pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = _process_pools[processes] = ProcessPoolExecutor(max_workers=processes)
+        return pool
+
+
+def build_tokens_batch(pairs, constants, processes=0):
+    """
+    Builds RTC+RTM tokens for many (channel, uid) pairs in one call.
+
+    Produces the same tokens as build_token_with_rtm, but amortises key
+    encoding, signing key derivation and privilege packing across the batch.
+
+    Args:
+        pairs: List of (channel, uid) tuples
+        constants: Dictionary of constants
+        processes: Number of worker processes for batches of at least
+            PROCESS_POOL_THRESHOLD pairs (0 disables the process pool)
+
+    Returns:
+        List of dictionaries containing channel, uid and token, in input order
+    """
+    pairs = list(pairs)
+
+    # Return APP_ID as token if APP_CERTIFICATE is empty
+    if not constants["APP_CERTIFICATE"]:
+        return [{"channel": channel, "uid": uid, "token": constants["APP_ID"]} for channel, uid in pairs]
+
+    if not _is_uuid(constants["APP_ID"]) or not _is_uuid(constants["APP_CERTIFICATE"]):
+        return [{"channel": channel, "uid": uid, "token": ""} for channel, uid in pairs]
+
+    args = (constants["APP_ID"], constants["APP_CERTIFICATE"],
+            constants["PRIVILEGE_EXPIRE"], constants["TOKEN_EXPIRE"])
+
+    if processes and processes > 1 and len(pairs) >= PROCESS_POOL_THRESHOLD:
+        chunk_size = -(-len(pairs) // processes)
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        pool = _get_process_pool(processes)
+        futures = [pool.submit(_mint_chunk, *args, chunk) for chunk in chunks]
+        tokens = [token for future in futures for token in future.result()]
+    else:
+        tokens = get_minter(constants).mint_many(pairs)
+
+    return [{"channel": channel, "uid": uid, "token": token} for (channel, uid), token in zip(pairs, tokens)]
+
+
+def validate_token_batch(body):
+    """
+    Validates a batch token request body.
+
+    Args:
+        body: Parsed JSON body
+
+    Returns:
+        Error message string, or None if the request is valid
+    """
+    if not isinstance(body, dict):
+        return "Request body must be a JSON object"
+    items = body.get("tokens")
+    if not isinstance(items, list) or not items:
+        return "Request body must include a non-empty 'tokens' list"
+    if len(items) > MAX_TOKEN_BATCH:
+        return f"Too many tokens: {len(items)} (max {MAX_TOKEN_BATCH})"
+    for item in items:
+        if not isinstance(item, dict) or not item.get("channel") or item.get("uid") in (None, ""):
+            return "Each entry in 'tokens' must be an object with 'channel' and 'uid'"
+        if not isinstance(item["channel"], str):
+            return "Each entry's 'channel' in 'tokens' must be a string"
+        if isinstance(item["uid"], bool) or not isinstance(item["uid"], (int, str)):
+            return "Each entry's 'uid' in 'tokens' must be an integer or a string"
+    return None
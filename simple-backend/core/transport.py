@@ -0,0 +1,276 @@
+"""
+Pluggable HTTP transports for Agora REST calls
+
+Transports expose ``request`` (blocking) and ``request_async`` (coroutine):
+- PooledTransport: blocking, backed by the keep-alive pool in core.pool
+- AsyncioTransport: native asyncio HTTP/1.1 client with keep-alive
+- FakeTransport: in-memory, records requests and replays scripted responses
+"""
+
+import asyncio
+import ssl
+import threading
+import time
+import urllib.parse
+import weakref
+
+from core.pool import PoolResponse, RESET_ERRORS, get_pool
+
+
+Response = PoolResponse
+
+
+class Transport:
+    """Base transport. Subclasses implement request, request_async or both."""
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        raise NotImplementedError
+
+    async def request_async(self, method, url, body=None, headers=None, timeout=None):
+        # Blocking transports run on the default executor so the loop stays free
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.request(method, url, body, headers, timeout))
+
+
+class PooledTransport(Transport):
+    """
+    Blocking transport over a ConnectionPool.
+
+    Args:
+        pool: ConnectionPool to use (defaults to the shared process pool)
+    """
+
+    def __init__(self, pool=None):
+        self._pool = pool
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        return (self._pool or get_pool()).request(method, url, body, headers, timeout)
+
+
+class AsyncioTransport(Transport):
+    """
+    Non-blocking HTTP/1.1 client on asyncio streams with per-host keep-alive.
+
+    Connections belong to the event loop they were opened on, so use one
+    instance per loop (see get_async_transport).
+
+    Args:
+        max_size: Maximum idle connections kept per host
+        idle_timeout: Seconds an idle connection may sit in the pool
+        timeout: Default timeout for a whole request
+        ssl_context: Optional SSL context for HTTPS connections
+    """
+
+    def __init__(self, max_size=100, idle_timeout=60, timeout=30, ssl_context=None):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._idle = {}
+        self.stats = {"created": 0, "reused": 0, "stale": 0, "retried": 0}
+
+    def _acquire_idle(self, key):
+        now = time.monotonic()
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer, last_used = idle.pop()
+            if now - last_used > self.idle_timeout or reader.at_eof() or writer.is_closing():
+                self.stats["stale"] += 1
+                writer.close()
+                continue
+            self.stats["reused"] += 1
+            return reader, writer
+        return None
+
+    def _release(self, key, reader, writer):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) >= self.max_size:
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    async def _open(self, scheme, host, port):
+        self.stats["created"] += 1
+        context = None
+        if scheme == "https":
+            context = self.ssl_context or ssl.create_default_context()
+        return await asyncio.open_connection(host, port, ssl=context)
+
+    @staticmethod
+    async def _exchange(reader, writer, method, netloc, path, body, headers):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {netloc}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before response")
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip()] = value.strip()
+
+        lowered = {name.lower(): value.lower() for name, value in response_headers.items()}
+        will_close = version == "HTTP/1.0" or lowered.get("connection") == "close"
+        code = int(status)
+
+        if method == "HEAD" or code < 200 or code in (204, 304):
+            # No body, whatever the headers say
+            data = b""
+        elif lowered.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b"".join(chunks)
+        elif "content-length" in lowered:
+            data = await reader.readexactly(int(lowered["content-length"]))
+        elif will_close:
+            # Body delimited by the server closing the connection
+            data = await reader.read()
+        else:
+            # No framing on a kept-alive connection: the body can't be
+            # delimited, so don't reuse the connection
+            data = b""
+            will_close = True
+
+        return Response(code, response_headers, data), will_close
+
+    async def request_async(self, method, url, body=None, headers=None, timeout=None):
+        url_parts = urllib.parse.urlsplit(url)
+        scheme = url_parts.scheme
+        port = url_parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, url_parts.netloc)
+        path = url_parts.path or "/"
+        if url_parts.query:
+            path = f"{path}?{url_parts.query}"
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        body = body or b""
+        timeout = self.timeout if timeout is None else timeout
+        # One deadline covers connecting, retrying on a stale connection and
+        # the exchange, so a request never takes longer than timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            idle = self._acquire_idle(key)
+            reused = idle is not None
+            try:
+                reader, writer = idle or await asyncio.wait_for(
+                    self._open(scheme, url_parts.hostname, port), deadline - loop.time())
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Timed out connecting to {url_parts.netloc}") from None
+            try:
+                response, will_close = await asyncio.wait_for(
+                    self._exchange(reader, writer, method, url_parts.netloc, path, body, headers or {}),
+                    deadline - loop.time())
+            except RESET_ERRORS + (asyncio.IncompleteReadError,):
+                writer.close()
+                if reused:
+                    self.stats["retried"] += 1
+                    continue
+                raise
+            except asyncio.TimeoutError:
+                writer.close()
+                raise TimeoutError(f"Timed out waiting for {url_parts.netloc}") from None
+            except BaseException:
+                writer.close()
+                raise
+
+            if will_close:
+                writer.close()
+            else:
+                self._release(key, reader, writer)
+            return response
+
+    async def close(self):
+        """Closes every idle connection."""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, writer, _ in connections:
+                writer.close()
+
+
+class FakeTransport(Transport):
+    """
+    In-memory transport for tests and offline runs.
+
+    Args:
+        handler: Optional callable (method, url, body, headers) returning a
+            Response or a (status, body) tuple. Takes priority over scripted
+            responses.
+        delay: Seconds to wait before answering (async waits without blocking)
+    """
+
+    def __init__(self, handler=None, delay=0):
+        self.handler = handler
+        self.delay = delay
+        self.requests = []
+        self.scripted = []
+        self._lock = threading.Lock()
+
+    def script(self, status, body="", headers=None):
+        """Queues a response to return for the next request."""
+        self.scripted.append(Response(status, headers or {}, body.encode("utf-8") if isinstance(body, str) else body))
+
+    def _respond(self, method, url, body, headers):
+        with self._lock:
+            self.requests.append({"method": method, "url": url, "body": body, "headers": dict(headers or {})})
+            scripted = self.scripted.pop(0) if self.scripted else None
+        if self.handler is not None:
+            result = self.handler(method, url, body, headers)
+            if isinstance(result, Response):
+                return result
+            status, data = result
+            return Response(status, {}, data.encode("utf-8") if isinstance(data, str) else data)
+        return scripted or Response(200, {}, b'{"agent_id": "fake_agent", "status": "RUNNING"}')
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._respond(method, url, body, headers)
+
+    async def request_async(self, method, url, body=None, headers=None, timeout=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self._respond(method, url, body, headers)
+
+
+_default_transport = PooledTransport()
+_async_transports = weakref.WeakKeyDictionary()
+
+
+def get_transport():
+    """
+    Returns the default blocking transport (the shared connection pool).
+
+    Returns:
+        The process-wide PooledTransport
+    """
+    return _default_transport
+
+
+def get_async_transport():
+    """
+    Returns the AsyncioTransport bound to the running event loop.
+
+    Returns:
+        AsyncioTransport for the current loop, created on first use
+    """
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.get(loop)
+    if transport is None:
+        transport = _async_transports[loop] = AsyncioTransport()
+    return transport
@@ -19,22 +19,29 @@ def generate_random_channel(length=10):
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
 
-def json_response(status_code, body):
+def json_response(status_code, body, server_timing=None):
     """
     Creates a properly formatted JSON response for API Gateway.
 
     Args:
         status_code: HTTP status code
         body: Dictionary to be serialized to JSON
+        server_timing: Optional Server-Timing header value (see
+            core.metrics.StageTimer.server_timing)
 
     Returns:
         Dictionary formatted for API Gateway response
     """
     import json
+    headers = {
+        "Content-Type": "application/json"
+    }
+    if server_timing:
+        headers["Server-Timing"] = server_timing
+        # Lets cross-origin pages read the timings (Resource Timing API)
+        headers["Timing-Allow-Origin"] = "*"
     return {
         "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json"
-        },
+        "headers": headers,
         "body": json.dumps(body)
     }
@@ -0,0 +1,266 @@
+"""
+Pre-warmed channel pool
+
+For requests without a channel, /start-agent can hand out a channel whose
+tokens are already minted and whose join payload is already rendered, leaving
+only the Agora join on the critical path. The base config and each profile
+in WARM_POOL_PROFILES get their own pool, refilled by a background thread up
+to the target depth; other profiles are never pooled, so the pools stay
+bounded however many profiles a store holds. Entries are dropped
+before their tokens get close to expiry, and a pool built from an old config
+is discarded after a reload.
+
+Environment:
+    WARM_POOL_SIZE: Warm channels kept per profile (default 0, disabled)
+    WARM_POOL_MAX_AGE: Seconds a warm channel is kept (default 300)
+    WARM_POOL_PROFILES: Comma-separated profiles to pool (and warm at
+        startup) in addition to the base config
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from core.config import ProfileConfig
+from core.log import get_logger, log_event
+from core.templates import PAYLOAD_PARAMS, render_agent_payload
+from core.tokens import build_token_cached, get_minter, get_token_cache
+from core.utils import generate_random_channel
+
+
+logger = get_logger("warmpool")
+
+
+class WarmChannel:
+    """A channel with its tokens and rendered join payload."""
+
+    __slots__ = ("channel", "user_token", "agent_video_token", "agent_payload", "expires_at")
+
+    def __init__(self, channel, user_token, agent_video_token, agent_payload, expires_at):
+        self.channel = channel
+        self.user_token = user_token
+        self.agent_video_token = agent_video_token
+        self.agent_payload = agent_payload
+        self.expires_at = expires_at
+
+
+class WarmPool:
+    """
+    Warm channels for one compiled profile.
+
+    Args:
+        constants: ProfileConfig the channels are prepared with
+        depth: Target number of warm channels
+        max_age: Seconds a warm channel is kept (capped so the tokens keep
+            the token cache's minimum remaining lifetime)
+    """
+
+    def __init__(self, constants, depth, max_age=300):
+        self.constants = constants
+        self.depth = depth
+        self.max_age = max_age
+        self.clock = time.monotonic
+        self._channels = deque()
+        self._lock = threading.Lock()
+        self.stats_counters = {"hits": 0, "misses": 0, "expired": 0, "prepared": 0}
+
+    def _max_age(self):
+        if not self.constants.has_certificate:
+            return self.max_age
+        token_age = get_minter(self.constants).lifetime - get_token_cache().min_remaining
+        return max(0, min(self.max_age, token_age))
+
+    def prepare(self):
+        """
+        Builds one warm channel (as /start-agent would for a new channel).
+
+        Raises:
+            ValueError: If the profile's payload configuration is invalid
+        """
+        constants = self.constants
+        channel = generate_random_channel(10)
+        if constants.has_certificate:
+            user_token = build_token_cached(channel, constants["USER_UID"], constants, constants.profile)
+            agent_video_token = build_token_cached(channel, constants["AGENT_VIDEO_UID"], constants,
+                                                   constants.profile)
+        else:
+            user_token = {"token": "", "uid": constants["USER_UID"]}
+            agent_video_token = {"token": "", "uid": constants["AGENT_VIDEO_UID"]}
+        agent_payload = render_agent_payload(channel, constants, {}, agent_video_token["token"])
+        return WarmChannel(channel, user_token, agent_video_token, agent_payload,
+                           self.clock() + self._max_age())
+
+    def _prune(self, now):
+        channels = self._channels
+        while channels and channels[0].expires_at <= now:
+            channels.popleft()
+            self.stats_counters["expired"] += 1
+
+    def take(self):
+        """Returns the oldest unexpired warm channel, or None if the pool is empty."""
+        with self._lock:
+            self._prune(self.clock())
+            if self._channels:
+                self.stats_counters["hits"] += 1
+                return self._channels.popleft()
+            self.stats_counters["misses"] += 1
+            return None
+
+    def fill(self):
+        """
+        Drops expired channels and prepares new ones up to the target depth.
+
+        Returns:
+            Number of channels added
+        """
+        with self._lock:
+            self._prune(self.clock())
+            needed = self.depth - len(self._channels)
+        added = 0
+        for _ in range(needed):
+            channel = self.prepare()
+            with self._lock:
+                self._channels.append(channel)
+                self.stats_counters["prepared"] += 1
+            added += 1
+        return added
+
+    def stats(self):
+        """Returns the size, depth and counters as a dictionary."""
+        with self._lock:
+            self._prune(self.clock())
+            return dict(self.stats_counters, size=len(self._channels), depth=self.depth)
+
+
+class WarmPools:
+    """
+    One WarmPool per pooled profile and the background thread that refills
+    them.
+
+    Args:
+        depth: Target warm channels per profile (0 disables the pools)
+        max_age: Seconds a warm channel is kept
+        interval: Seconds between refill passes when nothing was taken
+        profiles: Profile names pooled besides the base config
+    """
+
+    def __init__(self, depth, max_age=300, interval=5.0, profiles=()):
+        self.depth = depth
+        self.max_age = max_age
+        self.interval = interval
+        self.profiles = frozenset(name.upper() for name in profiles)
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def pooled(self, constants):
+        """True if warm channels are kept for this config."""
+        return (self.depth > 0 and isinstance(constants, ProfileConfig)
+                and (constants.profile is None or constants.profile in self.profiles))
+
+    def _pool(self, constants):
+        pool = self._pools.get(constants.profile)
+        if pool is None or pool.constants is not constants:
+            # First use, or the config was reloaded: start over with the new config
+            with self._lock:
+                pool = self._pools.get(constants.profile)
+                if pool is None or pool.constants is not constants:
+                    pool = self._pools[constants.profile] = WarmPool(constants, self.depth, self.max_age)
+                    self._start()
+        return pool
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warm-pool-refill", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.fill()
+
+    def fill(self):
+        """Refills every pool once. Returns the number of channels added."""
+        with self._lock:
+            pools = list(self._pools.items())
+        added = 0
+        for profile, pool in pools:
+            try:
+                added += pool.fill()
+            except Exception as e:
+                log_event(logger, logging.WARNING, "Warm pool refill failed", profile=profile,
+                          error=f"{type(e).__name__}: {e}")
+        return added
+
+    def warm(self, constants):
+        """Creates the pool for a pooled profile and schedules a refill."""
+        if self.pooled(constants):
+            self._pool(constants)
+            self._wake.set()
+
+    def take(self, constants):
+        """
+        Takes a warm channel for the profile and schedules a refill.
+
+        Args:
+            constants: ProfileConfig for the request
+
+        Returns:
+            WarmChannel, or None if the profile is not pooled or its pool is empty
+        """
+        if not self.pooled(constants):
+            return None
+        channel = self._pool(constants).take()
+        self._wake.set()
+        return channel
+
+    def stats(self):
+        """Returns per-profile pool stats (profile '' is the base config)."""
+        with self._lock:
+            pools = list(self._pools.items())
+        return {profile or "": pool.stats() for profile, pool in pools}
+
+
+def can_use_warm_channel(query_params):
+    """
+    Returns True if a request can be served from the warm pool: it names no
+    channel and has no override that changes the join payload.
+    """
+    return not query_params.get("channel") and PAYLOAD_PARAMS.isdisjoint(query_params)
+
+
+_pools = None
+_pools_lock = threading.Lock()
+
+
+def get_warm_pools():
+    """
+    Returns the process-wide WarmPools, configured from WARM_POOL_SIZE,
+    WARM_POOL_MAX_AGE and WARM_POOL_PROFILES on first use.
+    """
+    global _pools
+    if _pools is None:
+        with _pools_lock:
+            if _pools is None:
+                profiles = [name.strip() for name in os.environ.get("WARM_POOL_PROFILES", "").split(",")
+                            if name.strip()]
+                _pools = WarmPools(int(os.environ.get("WARM_POOL_SIZE", 0)),
+                                   max_age=float(os.environ.get("WARM_POOL_MAX_AGE", 300)), profiles=profiles)
+    return _pools
+
+
+def take_warm_channel(constants, query_params):
+    """
+    Returns a warm channel for a request that can use one, else None.
+
+    Args:
+        constants: ProfileConfig for the request
+        query_params: Request query parameters
+    """
+    if not can_use_warm_channel(query_params):
+        return None
+    return get_warm_pools().take(constants)
@@ -0,0 +1,95 @@
+"""
+Process warm-up
+
+Does the one-off work of a first request ahead of time: compiles the base
+config and every env profile, creates each profile's token minter and
+renders its join payload template, and opens keep-alive connections to each
+upstream host. Run once per server worker at startup.
+
+Environment:
+    WARMUP_CONNECTIONS: Upstream connections opened per host (default 2,
+        0 to skip)
+    WARM_POOL_PROFILES: Profiles, besides the base config, that get warm
+        channel pools, filled at startup (when WARM_POOL_SIZE is set)
+"""
+
+import logging
+import os
+import time
+
+from core.config import get_constants, get_registry
+from core.log import get_logger, log_event
+from core.pool import get_pool
+from core.templates import render_agent_payload
+from core.tokens import get_minter
+from core.warmpool import get_warm_pools
+
+
+logger = get_logger("warmup")
+
+
+def warm_up(connections=None, connect_timeout=5.0):
+    """
+    Warms this process's caches and connection pool.
+
+    Failures are logged and skipped: a profile with an invalid payload
+    config or an unreachable upstream must not stop the server from starting.
+
+    Args:
+        connections: Connections to open per upstream host (defaults to
+            WARMUP_CONNECTIONS)
+        connect_timeout: Timeout for each upstream connection
+
+    Returns:
+        Dictionary with the profiles warmed, connections opened, problems
+        and duration_ms
+    """
+    started = time.perf_counter()
+    if connections is None:
+        connections = int(os.environ.get("WARMUP_CONNECTIONS", 2))
+
+    registry = get_registry()
+    configs = [registry.base] + list(registry.profiles.values())
+    problems = []
+    hosts = {}
+    for constants in configs:
+        name = constants.profile or "default"
+        if constants.has_certificate:
+            get_minter(constants).mint("warmup", constants["USER_UID"])
+        try:
+            render_agent_payload("warmup", constants, {}, "")
+        except ValueError as e:
+            problems.append(f"{name}: {e}")
+        hosts.setdefault(constants["AGENT_API_BASE_URL"], name)
+
+    opened = 0
+    if connections > 0:
+        for url in hosts:
+            try:
+                opened += get_pool().prewarm(url, connections, connect_timeout)
+            except OSError as e:
+                problems.append(f"{url}: {type(e).__name__}: {e}")
+
+    summary = {
+        "profiles": len(configs),
+        "connections": opened,
+        "problems": problems,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    log_event(logger, logging.WARNING if problems else logging.INFO, "Process warmed", pid=os.getpid(), **summary)
+    return summary
+
+
+def warm_channel_pools():
+    """
+    Starts filling the warm channel pools for the base config and
+    WARM_POOL_PROFILES (no-op unless WARM_POOL_SIZE is set).
+
+    Returns:
+        Warm pool depth (channels kept per profile)
+    """
+    warm_pools = get_warm_pools()
+    if warm_pools.depth > 0:
+        for name in [None, *sorted(warm_pools.profiles)]:
+            warm_pools.warm(get_constants(name))
+    return warm_pools.depth
@@ -0,0 +1,73 @@
+"""
+Gunicorn settings for serving local_server.py in production
+
+    gunicorn -c gunicorn.conf.py
+
+Pre-forks one worker per CPU core. Each worker is a gthread worker: a pool of
+threads, suited to requests that spend most of their time waiting on the
+Agora API. Workers are recycled after a jittered number of requests, and each
+one warms its caches and connection pool before it accepts traffic. A
+SIGHUP to the master re-reads this file and .env and replaces the workers
+gracefully; the new workers load .env afresh.
+
+Environment (also read from .env):
+    PORT: Port to listen on (default 8081)
+    WEB_CONCURRENCY: Worker processes (default: CPU cores)
+    GUNICORN_THREADS: Threads per worker (default 16)
+    GUNICORN_MAX_REQUESTS: Requests before a worker is recycled (default
+        10000, 0 disables recycling)
+    GUNICORN_MAX_REQUESTS_JITTER: Random extra requests so workers do not
+        recycle together (default 1000)
+    GUNICORN_TIMEOUT: Seconds a silent worker may take before it is killed
+        and replaced (default 60, above AGENT_RETRY_DEADLINE)
+    GUNICORN_GRACEFUL_TIMEOUT: Seconds a recycled worker gets to finish its
+        requests (default 30)
+    GUNICORN_KEEPALIVE: Seconds to keep idle client connections (default 5)
+    GUNICORN_ACCESS_LOG: Access log path, "-" for stdout (default off)
+"""
+
+import os
+
+from dotenv import dotenv_values, find_dotenv
+
+# Read .env without exporting it into the master's environment: workers
+# inherit that environment, and local_server.py treats every variable already
+# set when it is imported as set in the shell, which .env reloads never touch
+_env_file = find_dotenv()
+_env_file_values = dotenv_values(_env_file) if _env_file else {}
+
+
+def setting(name, default=None):
+    """Reads a setting from the shell environment, then .env (empty means unset)."""
+    value = os.environ.get(name)
+    if value is None:
+        value = _env_file_values.get(name)
+    return default if value in (None, "") else value
+
+
+wsgi_app = "local_server:app"
+bind = f"0.0.0.0:{setting('PORT', 8081)}"
+
+workers = int(setting("WEB_CONCURRENCY") or os.cpu_count() or 1)
+worker_class = "gthread"
+threads = int(setting("GUNICORN_THREADS", 16))
+
+max_requests = int(setting("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(setting("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+timeout = int(setting("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(setting("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(setting("GUNICORN_KEEPALIVE", 5))
+
+accesslog = setting("GUNICORN_ACCESS_LOG")
+
+# Import the app in each worker, not the master: connection pools, the log
+# queue and the warm pool thread must not be shared across fork
+preload_app = False
+
+
+def post_worker_init(worker):
+    """Warms the worker before it accepts its first request."""
+    from local_server import warm_worker
+    summary = warm_worker()
+    worker.log.info("Worker %s warmed in %s ms: %s config(s), %s upstream connection(s)",
+                    worker.pid, summary["duration_ms"], summary["profiles"], summary["connections"])
@@ -7,10 +7,106 @@ This is a thin wrapper that:
 3. Returns Lambda-formatted response
 """
 
-from core.config import initialize_constants
-from core.tokens import build_token_with_rtm
-from core.agent import create_agent_payload, send_agent_to_channel, hangup_agent
-from core.utils import generate_random_channel, json_response
+import base64
+import json
+import time
+
+from core.config import get_constants, reload_profiles
+from core.tokens import build_tokens_batch, validate_token_batch
+from core.agent import send_agent_to_channel_once, hangup_agent, hangup_channel
+from core.endpoints import join_and_mint, prepare_start, start_response
+from core.recorder import get_recorder
+from core.breaker import breaker_states
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, StageTimer, render_metrics
+from core.bulk import start_agents, validate_bulk_request, DEFAULT_BULK_CONCURRENCY
+from core.utils import json_response
+
+
+def parse_body(event):
+    """
+    Parses the JSON body of an API Gateway event.
+
+    Args:
+        event: Lambda event
+
+    Returns:
+        Parsed body, or None if missing or not valid JSON
+    """
+    body = event.get('body')
+    if not body:
+        return None
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def is_bulk_start(event):
+    """
+    Checks whether the event is a bulk start request: a POST to /start-agents
+    through API Gateway, or a direct invocation with an "agents" list.
+    """
+    if isinstance(event.get('agents'), list):
+        return True
+    path = event.get('rawPath') or event.get('path') or ''
+    return path.rstrip('/').endswith('/start-agents')
+
+
+def handle_bulk_start(event):
+    """
+    Handles a bulk start request with the same body as POST /start-agents.
+    """
+    body = event if isinstance(event.get('agents'), list) else parse_body(event)
+
+    error = validate_bulk_request(body)
+    if error:
+        return json_response(400, {"error": error})
+
+    return json_response(200, start_agents(
+        body["agents"],
+        defaults=body.get("defaults"),
+        concurrency=body.get("concurrency", DEFAULT_BULK_CONCURRENCY),
+        app_id_as_token=True
+    ))
+
+
+def is_token_batch(event):
+    """
+    Checks whether the event is a batch token request: a POST to /tokens
+    through API Gateway, or a direct invocation with a "tokens" list.
+    """
+    if isinstance(event.get('tokens'), list):
+        return True
+    path = event.get('rawPath') or event.get('path') or ''
+    return path.rstrip('/').endswith('/tokens')
+
+
+def handle_token_batch(event):
+    """
+    Handles a batch token request with the same body as POST /tokens.
+    """
+    body = event if isinstance(event.get('tokens'), list) else parse_body(event)
+
+    error = validate_token_batch(body)
+    if error:
+        return json_response(400, {"error": error})
+
+    constants = get_constants(body.get("profile"))
+    started = time.perf_counter()
+    tokens = build_tokens_batch(
+        [(item["channel"], item["uid"]) for item in body["tokens"]],
+        constants,
+        processes=constants.token_batch_processes or 0
+    )
+
+    return json_response(200, {
+        "appid": constants["APP_ID"],
+        "tokens": tokens,
+        "count": len(tokens),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
 
 
 def lambda_handler(event, context):
@@ -20,110 +116,72 @@ def lambda_handler(event, context):
     Supports:
     - Token generation only (connect=false)
     - Agent join with token generation (connect=true, default)
-    - Agent hangup (hangup=true&agent_id=xxx)
+    - Agent hangup (hangup=true&agent_id=xxx, or hangup=true&channel=xxx)
     - Debug mode (debug in query params)
     - Profile support (profile=xxx for env var overrides)
+    - Bulk start (POST /start-agents, or direct invoke with {"agents": [...]})
+    - Batch tokens (POST /tokens, or direct invoke with {"tokens": [...]})
+    - Config reload (direct invoke with {"action": "reload-config"})
+    - Recorded requests (direct invoke with {"action": "debug-requests"})
+    - Upstream circuit state (direct invoke with {"action": "health"})
+    - Metrics of this container (direct invoke with {"action": "metrics"})
     """
-    # Get query parameters
-    query_params = event.get('queryStringParameters') or {}
+    if event.get('action') == 'reload-config':
+        return json_response(200, reload_profiles())
 
-    # Get optional profile parameter
-    profile = query_params.get('profile')
+    if event.get('action') == 'debug-requests':
+        try:
+            limit = min(max(int(event.get('limit', 50)), 1), 500)
+            before = int(event['before']) if event.get('before') is not None else None
+        except (TypeError, ValueError):
+            return json_response(400, {"error": "'limit' and 'before' must be integers"})
+        return json_response(200, get_recorder().page(limit=limit, before=before))
 
-    # Initialize constants with profile
-    constants = initialize_constants(profile)
+    if event.get('action') == 'health':
+        upstreams = breaker_states()
+        degraded = any(state["state"] == "open" for state in upstreams.values())
+        return json_response(200, {"status": "degraded" if degraded else "ok", "upstreams": upstreams})
 
-    # Handle hangup request
-    if query_params.get('hangup', '').lower() == 'true':
-        if 'agent_id' not in query_params:
-            return json_response(400, {"error": "Missing agent_id parameter for hangup"})
+    if event.get('action') == 'metrics':
+        return {"statusCode": 200, "headers": {"Content-Type": METRICS_CONTENT_TYPE}, "body": render_metrics()}
 
-        agent_id = query_params['agent_id']
-        hangup_response = hangup_agent(agent_id, constants)
+    if is_bulk_start(event):
+        return handle_bulk_start(event)
+
+    if is_token_batch(event):
+        return handle_token_batch(event)
+
+    # Get query parameters
+    query_params = event.get('queryStringParameters') or {}
+
+    # Handle hangup request (by agent_id, or by channel)
+    if query_params.get('hangup', '').lower() == 'true':
+        constants = get_constants(query_params.get('profile'))
+        if 'agent_id' in query_params:
+            hangup_response = hangup_agent(query_params['agent_id'], constants)
+        elif query_params.get('channel'):
+            hangup_response = hangup_channel(query_params['channel'], constants)
+        else:
+            return json_response(400, {"error": "Missing agent_id or channel parameter for hangup"})
 
         return json_response(200, {
             "agent_response": hangup_response
         })
 
-    # Get or generate channel
-    channel = query_params.get('channel') or generate_random_channel(10)
-
-    # Check if token-only mode
-    token_only_mode = query_params.get('connect', 'true').lower() == 'false'
+    # Time each stage (returned as Server-Timing, logged with METRICS_LOG=true)
+    timer = StageTimer()
 
-    # Check if we have APP_CERTIFICATE for token generation
-    has_certificate = bool(constants["APP_CERTIFICATE"] and constants["APP_CERTIFICATE"].strip())
+    # Look up the profile, mint tokens and render the payload (frozen
+    # containers cannot refill a warm pool, and Lambda clients expect the
+    # APP_ID as the token without a certificate)
+    start = prepare_start(query_params, timer, warm_pool=False, app_id_as_token=True, anam_app_id=False)
 
-    # Generate tokens
-    if has_certificate:
-        user_token_data = build_token_with_rtm(channel, constants["USER_UID"], constants)
-        agent_video_token_data = build_token_with_rtm(channel, constants["AGENT_VIDEO_UID"], constants)
-    else:
-        user_token_data = {"token": constants["APP_ID"], "uid": constants["USER_UID"]}
-        agent_video_token_data = {"token": constants["APP_ID"], "uid": constants["AGENT_VIDEO_UID"]}
+    # Send agent to channel (concurrent starts for the same channel share one
+    # join), minting the remaining tokens while it waits on Agora
+    agent_response = None
+    if start.needs_join:
+        agent_response = join_and_mint(start, lambda: send_agent_to_channel_once(
+            start.channel, start.agent_payload, start.constants))
 
-    # Token-only mode response
-    if token_only_mode:
-        return json_response(200, {
-            "audio_scenario": "10",
-            "token": user_token_data["token"],
-            "uid": user_token_data["uid"],
-            "channel": channel,
-            "appid": constants["APP_ID"],
-            "user_token": user_token_data,
-            "agent_video_token": agent_video_token_data,
-            "agent": {
-                "uid": constants["AGENT_UID"]
-            },
-            "agent_rtm_uid": f"{constants['AGENT_UID']}-{channel}",
-            "enable_string_uid": False,
-            "token_generation_method": "v007 tokens with RTC+RTM services" if has_certificate else "APP_ID only (no APP_CERTIFICATE)",
-            "agent_response": {
-                "status_code": 200,
-                "response": {"message": "Token-only mode: tokens generated successfully", "mode": "token_only", "connect": False},
-                "success": True
-            }
-        })
-
-    # Normal flow: create and send agent
-    try:
-        agent_payload = create_agent_payload(
-            channel=channel,
-            constants=constants,
-            query_params=query_params,
-            agent_video_token=agent_video_token_data["token"]
-        )
-    except ValueError as e:
-        return json_response(400, {"error": str(e)})
-
-    # Send agent to channel
-    agent_response = send_agent_to_channel(channel, agent_payload, constants)
-
-    # Build response
-    response_data = {
-        "audio_scenario": "10",
-        "token": user_token_data["token"],
-        "uid": user_token_data["uid"],
-        "channel": channel,
-        "appid": constants["APP_ID"],
-        "user_token": user_token_data,
-        "agent_video_token": agent_video_token_data,
-        "agent": {
-            "uid": constants["AGENT_UID"]
-        },
-        "agent_rtm_uid": f"{constants['AGENT_UID']}-{channel}",
-        "enable_string_uid": False,
-        "agent_response": agent_response
-    }
-
-    # Add debug info if requested
-    if 'debug' in query_params:
-        response_data["debug"] = {
-            "agent_payload": agent_payload,
-            "channel": channel,
-            "api_url": f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/join",
-            "token_generation_method": "v007 tokens with RTC+RTM services" if has_certificate else "APP_ID only (no APP_CERTIFICATE)",
-            "has_app_certificate": has_certificate
-        }
-
-    return json_response(200, response_data)
+    status, body = start_response(start, agent_response)
+    return json_response(status, body, server_timing=timer.server_timing())
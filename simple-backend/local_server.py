@@ -8,24 +8,76 @@ This is a thin wrapper that:
 4. Returns HTTP JSON response
 """
 
-from dotenv import load_dotenv
-load_dotenv()  # Load .env file before importing core modules
+import hmac
+import logging
+import os
+import time
 
-from flask import Flask, request, jsonify
-from core.config import initialize_constants
-from core.tokens import build_token_with_rtm
-from core.agent import create_agent_payload, send_agent_to_channel, hangup_agent
-from core.utils import generate_random_channel
+from dotenv import dotenv_values, find_dotenv
+
+ENV_FILE = find_dotenv()
+
+# Variables set in the real environment take precedence over .env, on the
+# first load and on every reload
+_SHELL_ENV_KEYS = frozenset(os.environ)
+_env_file_keys = set()
+
+
+def reload_env_file():
+    """
+    Re-reads the .env file into os.environ. Variables removed from the file
+    are unset; variables set in the shell are never overwritten.
+    """
+    global _env_file_keys
+    values = {key: value for key, value in (dotenv_values(ENV_FILE) if ENV_FILE else {}).items()
+              if value is not None and key not in _SHELL_ENV_KEYS}
+    for key in _env_file_keys - set(values):
+        os.environ.pop(key, None)
+    os.environ.update(values)
+    _env_file_keys = set(values)
+
+
+reload_env_file()  # Load .env file before importing core modules
+
+from flask import Flask, g, request, jsonify
+from core.config import (
+    FileWatcher,
+    get_constants,
+    get_registry,
+    install_reload_signal,
+    reload_profiles,
+)
+from core.tokens import build_tokens_batch, validate_token_batch
+from core.agent import send_agent_to_channel_once, hangup_agent, hangup_channel
+from core.endpoints import health_response, join_and_mint, prepare_start, start_response
+from core.bulk import (
+    DEFAULT_BULK_CONCURRENCY,
+    hangup_agents,
+    start_agents,
+    validate_bulk_hangup,
+    validate_bulk_request,
+)
+from core.sessions import get_sessions
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, StageTimer, render_metrics
+from core.log import get_logger, log_event
+from core.recorder import get_recorder
+from core.warmup import warm_channel_pools, warm_up
 
 app = Flask(__name__)
+logger = get_logger("server")
 
 
 @app.after_request
 def after_request(response):
-    """Add CORS headers to all responses"""
+    """Add CORS headers, and Server-Timing for timed requests, to all responses"""
     response.headers.add('Access-Control-Allow-Origin', '*')
     response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+    timer = g.pop('stage_timer', None)
+    if timer is not None:
+        response.headers['Server-Timing'] = timer.server_timing()
+        # Lets cross-origin pages read the timings (Resource Timing API)
+        response.headers['Timing-Allow-Origin'] = '*'
     return response
 
 
@@ -35,7 +87,8 @@ def start_agent():
     Start an agent and return connection details.
 
     Query Parameters:
-        channel: Channel name (auto-generated if not provided)
+        channel: Channel name (auto-generated, or taken from the warm pool
+                 when WARM_POOL_SIZE is set, if not provided)
         profile: Profile name for env var overrides
         connect: "true" (default) to start agent, "false" for token-only
         debug: Include debug info in response
@@ -45,105 +98,84 @@ def start_agent():
         GET /start-agent?channel=test&profile=sales
         GET /start-agent?connect=false
     """
-    # Get query parameters from HTTP request
-    query_params = request.args.to_dict()
+    # Time each stage for /metrics and the Server-Timing header
+    timer = g.stage_timer = StageTimer()
+
+    # Look up the profile, mint tokens and render the payload
+    start = prepare_start(request.args.to_dict(), timer)
+
+    # Send agent to channel (concurrent starts for the same channel share one
+    # join), minting the tokens the payload did not need meanwhile
+    agent_response = None
+    if start.needs_join:
+        agent_response = join_and_mint(start, lambda: send_agent_to_channel_once(
+            start.channel, start.agent_payload, start.constants))
+
+    status, body = start_response(start, agent_response)
+    return jsonify(body), status
 
-    # Get optional profile parameter
-    profile = query_params.get('profile')
 
-    # Initialize constants with profile
-    constants = initialize_constants(profile)
+@app.route('/start-agents', methods=['POST'])
+def start_agents_route():
+    """
+    Start many agents concurrently.
 
-    # Get or generate channel
-    channel = query_params.get('channel') or generate_random_channel(10)
+    JSON Body:
+        agents: List of objects with optional channel, profile and overrides
+                (same names as /start-agent query parameters)
+        defaults: Overrides applied to every agent (optional)
+        concurrency: Maximum joins in flight (optional, default 8)
 
-    # Check if token-only mode
-    token_only_mode = query_params.get('connect', 'true').lower() == 'false'
+    Example:
+        POST /start-agents
+        {"agents": [{"channel": "a"}, {"channel": "b", "profile": "sales"}]}
+    """
+    body = request.get_json(silent=True)
 
-    # Check if avatar mode is enabled (determines which APP_ID to use)
-    avatar_enabled = query_params.get('avatar_enabled', constants["AVATAR_ENABLED"]).lower() == "true"
-    avatar_vendor = query_params.get('avatar_vendor', constants["AVATAR_VENDOR"])
-    is_anam_avatar = avatar_enabled and avatar_vendor == "anam"
+    error = validate_bulk_request(body)
+    if error:
+        return jsonify({"error": error}), 400
 
-    # Use BETA APP_ID for Anam avatar, regular APP_ID otherwise
-    app_id_to_use = constants["ANAM_BETA_APP_ID"] if is_anam_avatar else constants["APP_ID"]
+    return jsonify(start_agents(
+        body["agents"],
+        defaults=body.get("defaults"),
+        concurrency=body.get("concurrency", DEFAULT_BULK_CONCURRENCY)
+    ))
 
-    # Check if we have APP_CERTIFICATE for token generation
-    has_certificate = bool(constants["APP_CERTIFICATE"] and constants["APP_CERTIFICATE"].strip())
 
-    # Generate tokens
-    if has_certificate:
-        user_token_data = build_token_with_rtm(channel, constants["USER_UID"], constants)
-        agent_video_token_data = build_token_with_rtm(channel, constants["AGENT_VIDEO_UID"], constants)
-    else:
-        user_token_data = {"token": "", "uid": constants["USER_UID"]}
-        agent_video_token_data = {"token": "", "uid": constants["AGENT_VIDEO_UID"]}
-
-    # Token-only mode response
-    if token_only_mode:
-        return jsonify({
-            "audio_scenario": "10",
-            "token": user_token_data["token"],
-            "uid": user_token_data["uid"],
-            "channel": channel,
-            "appid": app_id_to_use,
-            "user_token": user_token_data,
-            "agent_video_token": agent_video_token_data,
-            "agent": {
-                "uid": constants["AGENT_UID"]
-            },
-            "agent_rtm_uid": f"{constants['AGENT_UID']}-{channel}",
-            "enable_string_uid": False,
-            "token_generation_method": "v007 tokens with RTC+RTM services" if has_certificate else "APP_ID only (no APP_CERTIFICATE)",
-            "agent_response": {
-                "status_code": 200,
-                "response": {"message": "Token-only mode: tokens generated successfully", "mode": "token_only", "connect": False},
-                "success": True
-            }
-        })
-
-    # Normal flow: create and send agent
-    try:
-        agent_payload = create_agent_payload(
-            channel=channel,
-            constants=constants,
-            query_params=query_params,
-            agent_video_token=agent_video_token_data["token"]
-        )
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 400
-
-    # Send agent to channel
-    agent_response = send_agent_to_channel(channel, agent_payload, constants)
-
-    # Build response
-    response_data = {
-        "audio_scenario": "10",
-        "token": user_token_data["token"],
-        "uid": user_token_data["uid"],
-        "channel": channel,
-        "appid": app_id_to_use,
-        "user_token": user_token_data,
-        "agent_video_token": agent_video_token_data,
-        "agent": {
-            "uid": constants["AGENT_UID"]
-        },
-        "agent_rtm_uid": f"{constants['AGENT_UID']}-{channel}",
-        "enable_string_uid": False,
-        "agent_response": agent_response
-    }
-
-    # Add debug info if requested
-    if 'debug' in query_params:
-        response_data["debug"] = {
-            "agent_payload": agent_payload,
-            "channel": channel,
-            "api_url": f"{constants['AGENT_API_BASE_URL']}/{constants['APP_ID']}/join",
-            "token_generation_method": "v007 tokens with RTC+RTM services" if has_certificate else "APP_ID only (no APP_CERTIFICATE)",
-            "has_app_certificate": has_certificate
-        }
-
-    return jsonify(response_data)
+@app.route('/tokens', methods=['POST'])
+def tokens_route():
+    """
+    Mint RTC+RTM tokens for many channel/uid pairs in one call.
+
+    JSON Body:
+        tokens: List of {"channel": ..., "uid": ...} objects (max 10000)
+        profile: Profile name for env var overrides (optional)
+
+    Example:
+        POST /tokens
+        {"tokens": [{"channel": "a", "uid": "101"}, {"channel": "b", "uid": "7"}]}
+    """
+    body = request.get_json(silent=True)
+
+    error = validate_token_batch(body)
+    if error:
+        return jsonify({"error": error}), 400
+
+    constants = get_constants(body.get("profile"))
+    started = time.perf_counter()
+    tokens = build_tokens_batch(
+        [(item["channel"], item["uid"]) for item in body["tokens"]],
+        constants,
+        processes=constants.token_batch_processes or 0
+    )
+
+    return jsonify({
+        "appid": constants["APP_ID"],
+        "tokens": tokens,
+        "count": len(tokens),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
 
 
 @app.route('/hangup-agent', methods=['GET'])
@@ -152,11 +184,13 @@ def hangup_agent_route():
     Disconnect an agent from the channel.
 
     Query Parameters:
-        agent_id: The agent ID to disconnect (required)
+        agent_id: The agent ID to disconnect
+        channel: Or the channel whose agent to disconnect
         profile: Profile name for env var overrides
 
     Example:
         GET /hangup-agent?agent_id=abc123
+        GET /hangup-agent?channel=test
     """
     # Get query parameters
     query_params = request.args.to_dict()
@@ -164,29 +198,216 @@ def hangup_agent_route():
     # Get optional profile parameter
     profile = query_params.get('profile')
 
-    # Initialize constants
-    constants = initialize_constants(profile)
+    # Look up the precompiled constants for the profile
+    constants = get_constants(profile)
 
-    # Check for required agent_id
-    if 'agent_id' not in query_params:
-        return jsonify({"error": "Missing agent_id parameter"}), 400
-
-    agent_id = query_params['agent_id']
-    hangup_response = hangup_agent(agent_id, constants)
+    # Check for required agent_id or channel
+    if 'agent_id' in query_params:
+        hangup_response = hangup_agent(query_params['agent_id'], constants)
+    elif query_params.get('channel'):
+        hangup_response = hangup_channel(query_params['channel'], constants)
+    else:
+        return jsonify({"error": "Missing agent_id or channel parameter"}), 400
 
     return jsonify({
         "agent_response": hangup_response
     })
 
 
+@app.route('/hangup-agents', methods=['POST'])
+def hangup_agents_route():
+    """
+    Disconnect the agents on many channels concurrently.
+
+    JSON Body:
+        channels: List of channel names (optional)
+        profile: Profile name; without channels, every agent this server
+                 started with the profile is disconnected (404 if the
+                 profile is unknown)
+        concurrency: Maximum leaves in flight (optional, default 8)
+
+    Example:
+        POST /hangup-agents
+        {"channels": ["a", "b"]}
+    """
+    body = request.get_json(silent=True)
+
+    error = validate_bulk_hangup(body)
+    if error:
+        return jsonify({"error": error}), 400
+    profile = body.get("profile")
+    if body.get("channels") is None and profile is not None and \
+            not (isinstance(profile, str) and get_registry().has_profile(profile)):
+        return jsonify({"error": f"Unknown profile: {profile}"}), 404
+
+    return jsonify(hangup_agents(
+        channels=body.get("channels"),
+        profile=profile,
+        concurrency=body.get("concurrency", DEFAULT_BULK_CONCURRENCY)
+    ))
+
+
+@app.route('/agent-status', methods=['GET'])
+def agent_status_route():
+    """
+    Look up an agent started by this server.
+
+    Query Parameters:
+        channel: The channel name
+        agent_id: Or the agent ID
+
+    Example:
+        GET /agent-status?channel=test
+    """
+    sessions = get_sessions()
+    if request.args.get('channel'):
+        session = sessions.for_channel(request.args['channel'])
+    elif request.args.get('agent_id'):
+        session = sessions.get(request.args['agent_id'])
+    else:
+        return jsonify({"error": "Missing channel or agent_id parameter"}), 400
+
+    if session is None:
+        return jsonify({"error": "No running agent found", "running": False}), 404
+    return jsonify(dict(session.to_dict(), running=True))
+
+
+@app.route('/agents', methods=['GET'])
+def agents_route():
+    """
+    List agents started by this server.
+
+    Query Parameters:
+        profile: Only agents started with this profile (optional, 404 if
+                 the profile is unknown)
+    """
+    sessions = get_sessions()
+    if 'profile' in request.args:
+        profile = request.args['profile']
+        if not get_registry().has_profile(profile):
+            return jsonify({"error": f"Unknown profile: {profile}"}), 404
+        found = sessions.for_profile(get_constants(profile).profile)
+    else:
+        found = sessions.all()
+    return jsonify({
+        "agents": [session.to_dict() for session in found],
+        "count": len(found)
+    })
+
+
+def check_admin():
+    """
+    Checks the "Authorization: Bearer <ADMIN_TOKEN>" header.
+
+    Returns:
+        An error response, or None if the request is authorized
+    """
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({"error": "Admin endpoints are disabled (set ADMIN_TOKEN)"}), 404
+
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {admin_token}".encode()):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+
+@app.route('/admin/reload-config', methods=['POST'])
+def reload_config_route():
+    """
+    Re-read .env and recompile every profile without restarting.
+
+    Requires ADMIN_TOKEN to be set and sent as "Authorization: Bearer <token>".
+
+    Example:
+        curl -X POST -H "Authorization: Bearer $ADMIN_TOKEN" /admin/reload-config
+    """
+    denied = check_admin()
+    if denied:
+        return denied
+
+    reload_env_file()
+    return jsonify(reload_profiles())
+
+
+@app.route('/debug/requests', methods=['GET'])
+def debug_requests():
+    """
+    Page through recently recorded Agora requests, newest first (redacted).
+    Requests are recorded when ENABLE_CURL_DUMP=true. Requires ADMIN_TOKEN.
+
+    Query Parameters:
+        limit: Entries per page (default: 50, max: 500)
+        before: Only entries with a lower id (from next_before)
+    """
+    denied = check_admin()
+    if denied:
+        return denied
+
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        before = int(request.args['before']) if 'before' in request.args else None
+    except ValueError:
+        return jsonify({"error": "'limit' and 'before' must be integers"}), 400
+
+    return jsonify(get_recorder().page(limit=limit, before=before))
+
+
+@app.route('/debug/requests/<int:entry_id>/curl', methods=['GET'])
+def debug_request_curl(entry_id):
+    """
+    Render one recorded request as a bash curl script. Requires ADMIN_TOKEN.
+    """
+    denied = check_admin()
+    if denied:
+        return denied
+
+    entry = get_recorder().get(entry_id)
+    if entry is None:
+        return jsonify({"error": f"Request {entry_id} is no longer recorded"}), 404
+    return entry.to_curl(), 200, {"Content-Type": "text/x-shellscript; charset=utf-8"}
+
+
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    return jsonify({"status": "ok", "service": "agora-convoai-backend"})
+    """
+    Health check endpoint. Status is "degraded" while any upstream circuit is
+    open; with ?strict that is reported as 503 for load balancer checks.
+    """
+    status, body = health_response(request.args)
+    return jsonify(body), status
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: per-stage latency histograms, errors, caches and circuits"""
+    return render_metrics(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
+
+
+def warm_worker():
+    """
+    Warms this process before it takes traffic: compiled profiles, token
+    minters, payload templates and upstream connections (core.warmup), plus
+    the warm channel pools for the base config and WARM_POOL_PROFILES.
+    Called once per gunicorn worker (see gunicorn.conf.py) and by the
+    development server.
+
+    Returns:
+        The core.warmup summary, with the warm pool depth
+    """
+    summary = warm_up()
+    summary["warm_pool_depth"] = warm_channel_pools()
+    return summary
+
+
+def reload_config():
+    """Re-reads .env and swaps in freshly compiled profiles."""
+    reload_env_file()
+    result = reload_profiles()
+    log_event(logger, logging.INFO, "Config reloaded", generation=result['generation'], profiles=result['profiles'])
 
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 8081))
     print("=" * 60)
     print("Agora ConvoAI Local Server")
@@ -194,8 +415,42 @@ if __name__ == '__main__':
     print(f"Starting Flask server on http://0.0.0.0:{port}")
     print("\nEndpoints:")
     print("  GET /start-agent?channel=test")
-    print("  GET /hangup-agent?agent_id=xxx")
-    print("  GET /health")
-    print("\nPress CTRL+C to stop")
+    print("  POST /start-agents")
+    print("  POST /tokens")
+    print("  GET /hangup-agent?agent_id=xxx (or ?channel=xxx)")
+    print("  POST /hangup-agents")
+    print("  GET /agent-status?channel=xxx")
+    print("  GET /agents")
+    print("  GET /health (?strict returns 503 while an upstream circuit is open)")
+    print("  GET /metrics (Prometheus)")
+    print("  POST /admin/reload-config (requires ADMIN_TOKEN)")
+    print("  GET /debug/requests (requires ADMIN_TOKEN and ENABLE_CURL_DUMP=true)")
+    registry = get_registry()
+    print(f"\nProfiles: {', '.join(registry.profiles) or '(none)'}")
+    if registry.store is not None:
+        print(f"Profile store: {registry.store.path} ({len(registry.store.names())} profiles, loaded on first use)")
+    for name, messages in registry.validate().items():
+        print(f"⚠️  {'profile ' + name if name else 'base config'}: {', '.join(messages)}")
+
+    # Hot reload: SIGHUP, POST /admin/reload-config, or editing .env
+    install_reload_signal(reload_env_file)
+    if ENV_FILE and os.environ.get('CONFIG_WATCH', 'true').lower() != 'false':
+        FileWatcher(ENV_FILE, reload_config).start()
+        if registry.store is not None:
+            FileWatcher(registry.store.path, reload_config).start()
+        print(f"Watching {ENV_FILE} for changes (kill -HUP {os.getpid()} also reloads)")
+
+    # Compile profiles, open upstream connections and pre-warm channels
+    warmed = warm_worker()
+    print(f"Warmed {warmed['profiles']} config(s) and {warmed['connections']} upstream connection(s) "
+          f"in {warmed['duration_ms']} ms")
+    if warmed['warm_pool_depth'] > 0:
+        print(f"Warm pool: {warmed['warm_pool_depth']} channels per profile")
+
+    # The debugger and reloader are opt-in; never enable them on a reachable host
+    debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
+    print("\nDevelopment server" + (" (debug mode)" if debug else "") +
+          " - for production use: gunicorn -c gunicorn.conf.py")
+    print("Press CTRL+C to stop")
     print("=" * 60)
-    app.run(host='0.0.0.0', port=port, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
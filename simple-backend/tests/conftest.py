@@ -10,6 +10,34 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from local_server import app as flask_app
 
 
+@pytest.fixture(autouse=True)
+def fresh_profile_registry(monkeypatch):
+    """Compile profiles from each test's environment instead of a stale snapshot"""
+    monkeypatch.setattr("core.config._registry", None)
+    monkeypatch.setattr("core.config._retired_store", None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions(monkeypatch):
+    """Start every test with an empty agent session registry"""
+    monkeypatch.setattr("core.sessions._registry", None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_warm_pools(monkeypatch):
+    """Warm pools are built from each test's environment (disabled by default)"""
+    monkeypatch.setattr("core.warmpool._pools", None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    """Start every test with closed circuits for all upstreams"""
+    from core.breaker import reset_breakers
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
 @pytest.fixture
 def app():
     """Create Flask app for testing"""
@@ -83,3 +111,70 @@ def test_constants():
         "HEYGEN_QUALITY": "high",
         "HEYGEN_ACTIVITY_IDLE_TIMEOUT": 60
     }
+
+
+@pytest.fixture
+def upstream():
+    """Local HTTP stand-in for the Agora REST API"""
+    from tests.upstream import UpstreamServer
+    server = UpstreamServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def https_upstream(tmp_path):
+    """Local HTTPS stand-in with a self-signed certificate; yields (server, client_context)"""
+    from tests.upstream import UpstreamServer, make_self_signed_context
+    contexts = make_self_signed_context(str(tmp_path))
+    if contexts is None:
+        pytest.skip("openssl not available")
+    server_context, client_context = contexts
+    server = UpstreamServer(ssl_context=server_context).start()
+    yield server, client_context
+    server.stop()
+
+
+@pytest.fixture
+def fake_transport(monkeypatch):
+    """Replace the default blocking transport with an in-memory FakeTransport"""
+    from core.transport import FakeTransport
+    transport = FakeTransport()
+    monkeypatch.setattr("core.transport._default_transport", transport)
+    return transport
+
+
+@pytest.fixture
+def agent_env(monkeypatch):
+    """Minimal environment for building agent payloads"""
+    monkeypatch.setenv("APP_ID", "abcdef1234567890abcdef1234567890")
+    monkeypatch.setenv("APP_CERTIFICATE", "fedcba0987654321fedcba0987654321")
+    monkeypatch.setenv("AGENT_AUTH_HEADER", "Basic dGVzdDp0ZXN0")
+    monkeypatch.setenv("TTS_VENDOR", "openai")
+    monkeypatch.setenv("TTS_KEY", "test_tts_key")
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    """Makes every computed backoff zero so stand-in tests run fast"""
+    monkeypatch.setattr("core.retry.random.random", lambda: 0.0)
+
+
+@pytest.fixture
+def log_stream():
+    """Captures convoai log output synchronously, then restores defaults"""
+    import io
+    from core.log import configure_logging
+    stream = io.StringIO()
+    configure_logging(level="DEBUG", fmt="json", use_queue=False, stream=stream)
+    yield stream
+    configure_logging()
+
+
+@pytest.fixture
+def request_recorder(monkeypatch):
+    """Fresh process-wide RequestRecorder"""
+    from core.recorder import RequestRecorder
+    recorder = RequestRecorder()
+    monkeypatch.setattr("core.recorder._recorder", recorder)
+    return recorder
@@ -114,6 +114,58 @@ class TestHangupAgentEndpoint:
         assert 'agent_id' in data['error']
 
 
+@pytest.mark.integration
+class TestSessionEndpoints:
+    """Tests for channel-based hangup, /agent-status, /agents and /hangup-agents"""
+
+    def test_status_and_hangup_by_channel(self, client, agent_env, fake_transport):
+        """Test that an agent started by channel can be looked up and stopped by channel"""
+        client.get('/start-agent?channel=room')
+
+        status = client.get('/agent-status?channel=room')
+        listed = client.get('/agents')
+        hangup = client.get('/hangup-agent?channel=room')
+        after = client.get('/agent-status?channel=room')
+
+        assert status.status_code == 200
+        assert status.json['agent_id'] == 'fake_agent'
+        assert listed.json['count'] == 1
+        assert hangup.json['agent_response']['agent_id'] == 'fake_agent'
+        assert fake_transport.requests[-1]['url'].endswith('/agents/fake_agent/leave')
+        assert after.status_code == 404
+
+    def test_unknown_profile_not_treated_as_base(self, client, agent_env, fake_transport, monkeypatch):
+        """Test that a misspelt profile is rejected instead of matching base-profile agents"""
+        monkeypatch.setenv("SALES_TTS_VENDOR", "openai")
+        client.get('/start-agent?channel=room')
+
+        listed = client.get('/agents?profile=slaes')
+        hangup = client.post('/hangup-agents', json={"profile": "slaes"})
+
+        assert listed.status_code == 404
+        assert hangup.status_code == 404
+        assert client.get('/agents?profile=sales').json['count'] == 0
+        assert client.get('/agents?profile=').json['count'] == 1
+        assert client.get('/agent-status?channel=room').status_code == 200
+
+    def test_status_requires_channel_or_agent_id(self, client):
+        """Test /agent-status validation"""
+        assert client.get('/agent-status').status_code == 400
+
+    def test_bulk_hangup(self, client, agent_env, fake_transport):
+        """Test POST /hangup-agents by channel list"""
+        client.get('/start-agent?channel=room')
+
+        response = client.post('/hangup-agents', json={"channels": ["room"]})
+
+        assert response.status_code == 200
+        assert response.json['summary']['succeeded'] == 1
+
+    def test_bulk_hangup_invalid_body(self, client):
+        """Test POST /hangup-agents validation"""
+        assert client.post('/hangup-agents', json={}).status_code == 400
+
+
 @pytest.mark.integration
 class TestHealthEndpoint:
     """Tests for /health endpoint"""
@@ -127,3 +179,136 @@ class TestHealthEndpoint:
 
         assert data['status'] == 'ok'
         assert 'service' in data
+
+    def test_health_reports_open_circuit(self, client):
+        """Test that an open upstream circuit degrades health, and ?strict returns 503"""
+        from core.breaker import get_breaker
+        breaker = get_breaker("https://api.agora.io/v1/projects")
+        for _ in range(breaker.min_calls):
+            breaker.allow()
+            breaker.record(False, 0.1)
+
+        response = client.get('/health')
+        strict = client.get('/health?strict')
+
+        assert response.status_code == 200
+        assert response.json['status'] == 'degraded'
+        assert response.json['upstreams']['https://api.agora.io']['state'] == 'open'
+        assert strict.status_code == 503
+
+
+@pytest.mark.integration
+class TestTokensEndpoint:
+    """Tests for POST /tokens endpoint"""
+
+    def test_mint_batch(self, client, agent_env):
+        """Test minting tokens for several channel/uid pairs"""
+        response = client.post('/tokens', json={
+            "tokens": [{"channel": "a", "uid": "101"}, {"channel": "b", "uid": 7}]
+        })
+
+        assert response.status_code == 200
+        data = response.json
+        assert data['count'] == 2
+        assert [t['channel'] for t in data['tokens']] == ['a', 'b']
+        assert all(t['token'].startswith('007') for t in data['tokens'])
+
+    def test_invalid_body(self, client):
+        """Test that an invalid body returns 400"""
+        response = client.post('/tokens', json={"tokens": [{"channel": "a"}]})
+
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+    def test_lambda_direct_invoke(self, agent_env):
+        """Test the matching Lambda event shape"""
+        from lambda_handler import lambda_handler
+
+        response = lambda_handler({"tokens": [{"channel": "a", "uid": "101"}]}, None)
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['count'] == 1
+
+
+@pytest.mark.integration
+class TestReloadConfigEndpoint:
+    """Tests for POST /admin/reload-config endpoint"""
+
+    def test_disabled_without_admin_token(self, client, monkeypatch):
+        """Test that the endpoint is off unless ADMIN_TOKEN is set"""
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+
+        response = client.post('/admin/reload-config')
+
+        assert response.status_code == 404
+
+    def test_rejects_wrong_token(self, client, monkeypatch):
+        """Test that a wrong bearer token is rejected"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+
+        response = client.post('/admin/reload-config', headers={"Authorization": "Bearer nope"})
+
+        assert response.status_code == 401
+
+    def test_reloads_profiles(self, client, monkeypatch):
+        """Test that a reload picks up changed environment variables"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        client.get('/start-agent?connect=false')
+        monkeypatch.setenv("PROMO_DEFAULT_GREETING", "Hi from promo")
+
+        response = client.post('/admin/reload-config', headers={"Authorization": "Bearer secret"})
+
+        assert response.status_code == 200
+        assert "PROMO" in response.json["profiles"]
+
+
+@pytest.mark.integration
+class TestDebugRequestsEndpoint:
+    """Tests for GET /debug/requests endpoints"""
+
+    def test_requires_admin_token(self, client, monkeypatch):
+        """Test that recorded requests are not exposed without ADMIN_TOKEN"""
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+
+        assert client.get('/debug/requests').status_code == 404
+
+    def test_pages_recorded_joins(self, client, monkeypatch, agent_env, fake_transport, request_recorder):
+        """Test that joins are recorded, redacted and paged newest first"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        monkeypatch.setenv("ENABLE_CURL_DUMP", "true")
+        auth = {"Authorization": "Bearer secret"}
+        for channel in ("one", "two", "three"):
+            client.get(f'/start-agent?channel={channel}')
+
+        first = client.get('/debug/requests?limit=2', headers=auth).json
+        second = client.get(f'/debug/requests?limit=2&before={first["next_before"]}', headers=auth).json
+
+        assert [r["channel"] for r in first["requests"]] == ["three", "two"]
+        assert [r["channel"] for r in second["requests"]] == ["one"]
+        assert second["next_before"] is None
+        entry = first["requests"][0]
+        assert entry["headers"]["Authorization"] == "[redacted]"
+        assert entry["body"]["properties"]["tts"]["params"]["api_key"] == "[redacted]"
+        assert entry["status"] == 200
+
+    def test_renders_curl(self, client, monkeypatch, agent_env, fake_transport, request_recorder):
+        """Test that a recorded request renders as a redacted curl script"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        monkeypatch.setenv("ENABLE_CURL_DUMP", "true")
+        client.get('/start-agent?channel=room')
+        entry_id = request_recorder.page()["requests"][0]["id"]
+
+        response = client.get(f'/debug/requests/{entry_id}/curl', headers={"Authorization": "Bearer secret"})
+
+        assert response.status_code == 200
+        script = response.get_data(as_text=True)
+        assert script.startswith("#!/bin/bash")
+        assert "$AGENT_AUTH_HEADER" in script
+        assert "test_tts_key" not in script
+
+    def test_not_recorded_when_disabled(self, client, monkeypatch, agent_env, fake_transport, request_recorder):
+        """Test that nothing is recorded unless ENABLE_CURL_DUMP is on"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        client.get('/start-agent?channel=room')
+
+        assert client.get('/debug/requests', headers={"Authorization": "Bearer secret"}).json["requests"] == []
@@ -0,0 +1,77 @@
+"""Tests for the benchmark harness and a smoke run of every suite"""
+
+import pytest
+from benchmarks.harness import BENCH_ENV, Case, compare, load_baseline, measure, percentile, run_cases, save_baseline
+from benchmarks.suites import SUITES
+
+
+def result(ops, p50):
+    return {"ops_per_sec": ops, "p50_us": p50, "p99_us": p50 * 3}
+
+
+@pytest.mark.unit
+class TestHarness:
+    """Tests for measurement and baseline comparison"""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles on sorted samples"""
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 99) == 7
+
+    def test_measure_reports_latency_and_allocations(self):
+        """Test that measure() returns throughput, percentiles and allocations"""
+        stats = measure(lambda i: bytearray(4096), seconds=0, min_calls=50, warmup=1, alloc_calls=10)
+
+        assert stats["calls"] == 50
+        assert stats["p50_us"] <= stats["p99_us"] <= stats["max_us"]
+        assert stats["alloc_bytes"] >= 4096
+
+    def test_compare_flags_slowdowns_only(self):
+        """Test that only changes beyond the threshold in the wrong direction count"""
+        baseline = {"results": {"a": result(1000, 10.0), "b": result(1000, 10.0), "c": result(1000, 10.0)}}
+        current = {"a": result(700, 10.0), "b": result(1500, 6.0), "c": result(1000, 11.0), "new": result(1, 1.0)}
+
+        regressions = compare(current, baseline, threshold=0.25)
+
+        assert [(name, field) for name, field, *_ in regressions] == [("a", "ops_per_sec")]
+
+    def test_baseline_round_trip(self, tmp_path):
+        """Test that saved baselines carry the environment and load back"""
+        path = str(tmp_path / "baselines" / "run.json")
+
+        save_baseline(path, {"a": result(1000, 10.0)}, seconds=1.0)
+        baseline = load_baseline(path)
+
+        assert baseline["results"]["a"]["ops_per_sec"] == 1000
+        assert baseline["environment"]["python"]
+
+    def test_run_cases_filters_and_tears_down(self):
+        """Test the name filter and setup/teardown around a case"""
+        calls = []
+        cases = [
+            Case("x/one", lambda i: None, setup=lambda: "state", teardown=calls.append),
+            Case("y/two", lambda i: None),
+        ]
+
+        results = run_cases(cases, seconds=0, pattern="x/", min_calls=1, warmup=0, alloc_calls=0)
+
+        assert list(results) == ["x/one"]
+        assert calls == ["state"]
+
+
+@pytest.mark.integration
+class TestSuites:
+    """Smoke run of every benchmark case, so the suite keeps working"""
+
+    @pytest.mark.parametrize("suite", sorted(SUITES))
+    def test_suite_runs(self, suite, monkeypatch):
+        """Test that each case of the suite runs without errors"""
+        for name, value in BENCH_ENV.items():
+            monkeypatch.setenv(name, value)
+
+        results = run_cases(SUITES[suite](), seconds=0, min_calls=2, warmup=1, alloc_calls=0)
+
+        assert results and all(stats["calls"] == 2 for stats in results.values())
@@ -0,0 +1,198 @@
+"""Tests for core.breaker module and breaker-gated agent calls"""
+
+import json
+import pytest
+from core.agent import hangup_agent, send_agent_to_channel
+from core.breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, breaker_states, get_breaker, upstream_key
+)
+from core.pool import ConnectionPool
+from core.transport import PooledTransport
+
+
+PAYLOAD = {"name": "room", "properties": {"advanced_features": {"enable_rtm": True, "enable_bhvs": True}}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(**kwargs):
+    kwargs.setdefault("min_calls", 4)
+    breaker = CircuitBreaker("https://upstream", **kwargs)
+    clock = FakeClock()
+    breaker.clock = clock
+    return breaker, clock
+
+
+def calls(breaker, *outcomes, seconds=0.05):
+    for success in outcomes:
+        breaker.allow()
+        breaker.record(success, seconds)
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Tests for state transitions and rolling windows"""
+
+    def test_opens_on_error_rate(self):
+        """Test that the circuit opens once failures reach the threshold"""
+        breaker, _ = make_breaker(error_rate=0.5)
+
+        calls(breaker, True, False, True)
+        assert breaker.state == CLOSED
+        calls(breaker, False)
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError) as info:
+            breaker.allow()
+        assert info.value.retry_after == pytest.approx(15)
+
+    def test_needs_min_calls(self):
+        """Test that a few failures on low traffic do not trip the circuit"""
+        breaker, _ = make_breaker(min_calls=10)
+
+        calls(breaker, False, False, False)
+
+        assert breaker.state == CLOSED
+
+    def test_opens_on_slow_calls(self):
+        """Test that successful but slow calls trip the circuit"""
+        breaker, _ = make_breaker(slow_seconds=1, slow_rate=0.75)
+
+        calls(breaker, True, True, True, True, seconds=2)
+
+        assert breaker.state == OPEN
+
+    def test_old_failures_leave_window(self):
+        """Test that failures older than the window are forgotten"""
+        breaker, clock = make_breaker(window=10)
+
+        calls(breaker, False, False, False)
+        clock.now += 11
+        calls(breaker, True)
+
+        assert breaker.state == CLOSED
+        assert breaker.snapshot()["calls"] == 1
+
+    def test_half_open_probe_success_closes(self):
+        """Test that a successful probe after the cool-down closes the circuit"""
+        breaker, clock = make_breaker(open_seconds=5)
+        calls(breaker, False, False, False, False)
+        clock.now += 5
+
+        breaker.allow()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()  # only one probe at a time
+        breaker.record(True, 0.05)
+
+        assert breaker.state == CLOSED
+        snapshot = breaker.snapshot()
+        assert (snapshot["calls"], snapshot["failures"]) == (1, 0)  # window restarts with the probe
+
+    def test_half_open_probe_failure_reopens(self):
+        """Test that a failed probe opens the circuit for another cool-down"""
+        breaker, clock = make_breaker(open_seconds=5)
+        calls(breaker, False, False, False, False)
+        clock.now += 5
+
+        calls(breaker, False)
+
+        assert breaker.state == OPEN
+        assert breaker.stats["opened"] == 2
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+    def test_release_frees_probe(self):
+        """Test that a cancelled probe does not block later probes"""
+        breaker, clock = make_breaker(open_seconds=5)
+        calls(breaker, False, False, False, False)
+        clock.now += 5
+
+        breaker.allow()
+        breaker.release()
+        breaker.allow()
+
+        assert breaker.state == HALF_OPEN
+
+    def test_snapshot(self):
+        """Test the counters reported on /health"""
+        breaker, _ = make_breaker(min_calls=10)
+        calls(breaker, True, False, seconds=0.1)
+
+        snapshot = breaker.snapshot()
+
+        assert snapshot["state"] == CLOSED
+        assert (snapshot["calls"], snapshot["failures"], snapshot["error_rate"]) == (2, 1, 0.5)
+        assert snapshot["avg_ms"] == 100.0
+
+    def test_breakers_keyed_per_upstream(self):
+        """Test that the regular and Anam BETA upstreams get separate breakers"""
+        regular = get_breaker("https://api.agora.io/api/conversational-ai-agent/v2/projects/x/join")
+        same = get_breaker("https://api.agora.io/api/conversational-ai-agent/v2/projects/x/agents/1/leave")
+        beta = get_breaker("https://api-test.agora.io/api/conversational-ai-agent/v2/projects/x/join")
+
+        assert regular is same
+        assert regular is not beta
+        assert upstream_key("http://127.0.0.1:8000/v1/join") == "http://127.0.0.1:8000"
+
+
+@pytest.mark.unit
+class TestBreakerGatedCalls:
+    """Tests for agent calls through the breaker against the stand-in"""
+
+    def constants(self, test_constants, upstream):
+        return dict(test_constants, AGENT_API_BASE_URL=upstream.base_url, AGENT_RETRY_ATTEMPTS="1")
+
+    def trip(self, upstream, constants, monkeypatch):
+        monkeypatch.setenv("CIRCUIT_MIN_CALLS", "3")
+        transport = PooledTransport(ConnectionPool())
+        for _ in range(3):
+            upstream.script(503)
+            send_agent_to_channel("room", PAYLOAD, constants, transport=transport)
+
+    def test_open_circuit_fails_fast(self, upstream, test_constants, monkeypatch):
+        """Test that an open circuit returns 503 without calling the upstream"""
+        constants = self.constants(test_constants, upstream)
+        self.trip(upstream, constants, monkeypatch)
+
+        result = send_agent_to_channel("room", PAYLOAD, constants, transport=PooledTransport(ConnectionPool()))
+        hangup = hangup_agent("agent_123", constants, transport=PooledTransport(ConnectionPool()))
+
+        assert result["status_code"] == 503
+        assert result["circuit_open"] is True
+        assert json.loads(result["response"])["reason"] == "CircuitOpen"
+        assert hangup["circuit_open"] is True
+        assert len(upstream.requests) == 3
+
+    def test_healthy_upstream_unaffected(self, upstream, test_constants, monkeypatch):
+        """Test that tripping one upstream leaves another upstream's calls alone"""
+        from tests.upstream import UpstreamServer
+        beta = UpstreamServer().start()
+        try:
+            self.trip(upstream, self.constants(test_constants, upstream), monkeypatch)
+
+            result = send_agent_to_channel("room", PAYLOAD, self.constants(test_constants, beta),
+                                           transport=PooledTransport(ConnectionPool()))
+            states = breaker_states()
+        finally:
+            beta.stop()
+
+        assert result["success"] is True
+        assert states[upstream_key(upstream.base_url)]["state"] == OPEN
+        assert states[upstream_key(beta.base_url)]["state"] == CLOSED
+
+    def test_client_errors_do_not_trip(self, upstream, test_constants, monkeypatch):
+        """Test that 4xx responses count as a healthy upstream"""
+        monkeypatch.setenv("CIRCUIT_MIN_CALLS", "3")
+        constants = self.constants(test_constants, upstream)
+        for _ in range(3):
+            upstream.script(400)
+            send_agent_to_channel("room", PAYLOAD, constants, transport=PooledTransport(ConnectionPool()))
+
+        assert get_breaker(upstream.base_url).state == CLOSED
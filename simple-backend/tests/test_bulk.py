@@ -0,0 +1,172 @@
+"""Tests for core.bulk module and the bulk start endpoints"""
+
+import json
+import threading
+import pytest
+from core.bulk import normalize_overrides, start_agents, validate_bulk_request
+from core.transport import FakeTransport
+from lambda_handler import lambda_handler
+
+
+@pytest.mark.unit
+class TestNormalizeOverrides:
+    """Tests for normalize_overrides function"""
+
+    def test_converts_json_values(self):
+        """Test that bools and numbers become query-param strings"""
+        assert normalize_overrides({"avatar_enabled": True, "max_history": 5, "voice_id": None}) == {
+            "avatar_enabled": "true",
+            "max_history": "5"
+        }
+
+
+@pytest.mark.unit
+class TestValidateBulkRequest:
+    """Tests for validate_bulk_request function"""
+
+    @pytest.mark.parametrize("body", [
+        None,
+        [],
+        {},
+        {"agents": []},
+        {"agents": ["a"]},
+        {"agents": [{}], "defaults": []},
+        {"agents": [{}], "concurrency": 0},
+        {"agents": [{}], "concurrency": "4"},
+        {"agents": [{}] * 501},
+    ])
+    def test_rejects_invalid(self, body):
+        """Test that malformed bodies are rejected"""
+        assert validate_bulk_request(body) is not None
+
+    def test_accepts_valid(self):
+        """Test that a well-formed body is accepted"""
+        assert validate_bulk_request({"agents": [{"channel": "a"}], "concurrency": 4}) is None
+
+
+@pytest.mark.unit
+class TestStartAgents:
+    """Tests for start_agents function"""
+
+    def test_results_in_order_with_summary(self, agent_env):
+        """Test per-item results and aggregate summary"""
+        transport = FakeTransport()
+
+        result = start_agents([{"channel": f"ch{i}"} for i in range(5)], transport=transport)
+
+        assert [r["channel"] for r in result["results"]] == [f"ch{i}" for i in range(5)]
+        assert all(r["success"] for r in result["results"])
+        assert result["summary"]["total"] == 5
+        assert result["summary"]["succeeded"] == 5
+        assert result["summary"]["failed"] == 0
+        assert len(transport.requests) == 5
+
+    def test_failure_is_isolated(self, agent_env):
+        """Test that one failing item does not fail the others"""
+        def handler(method, url, body, headers):
+            if json.loads(body)["name"] == "bad":
+                return 500, "upstream error"
+            return 200, '{"agent_id": "ok"}'
+
+        result = start_agents(
+            [{"channel": "good1"}, {"channel": "bad"}, {"channel": "x", "tts_vendor": "nope"}, {"channel": "good2"}],
+            transport=FakeTransport(handler=handler)
+        )
+
+        successes = [r["success"] for r in result["results"]]
+        assert successes == [True, False, False, True]
+        assert result["results"][1]["agent_response"]["status_code"] == 500
+        assert "Unsupported TTS vendor" in result["results"][2]["error"]
+        assert result["summary"]["failed"] == 2
+
+    def test_defaults_and_overrides(self, agent_env):
+        """Test that defaults apply to every item and item values win"""
+        transport = FakeTransport()
+
+        start_agents(
+            [{"channel": "a"}, {"channel": "b", "voice_id": "echo"}],
+            defaults={"voice_id": "nova"},
+            transport=transport
+        )
+
+        voices = sorted(json.loads(r["body"])["properties"]["tts"]["params"]["voice"] for r in transport.requests)
+        assert voices == ["echo", "nova"]
+
+    def test_items_match_single_starts(self, agent_env, fake_transport, monkeypatch):
+        """Test that bulk items get the same tokens and APP_ID as /start-agent"""
+        from lambda_handler import lambda_handler
+        from core.metrics import REQUESTS
+        monkeypatch.delenv("APP_CERTIFICATE")
+        monkeypatch.setenv("ANAM_API_KEY", "anam")
+        monkeypatch.setenv("ANAM_BETA_APP_ID", "0123456789abcdef0123456789abcdef")
+        monkeypatch.setenv("ANAM_BETA_CREDENTIALS", "beta:secret")
+        monkeypatch.setenv("ANAM_BETA_ENDPOINT", "https://beta.example.com")
+        before = REQUESTS.value("start-agent", "200")
+
+        flask_item, = start_agents([{"avatar_enabled": "true", "avatar_vendor": "anam"}],
+                                   transport=fake_transport)["results"]
+        lambda_result = json.loads(lambda_handler({"agents": [{"channel": "room"}]}, None)["body"])
+
+        assert (flask_item["token"], flask_item["appid"]) == ("", "0123456789abcdef0123456789abcdef")
+        assert lambda_result["results"][0]["token"] == "abcdef1234567890abcdef1234567890"
+        assert REQUESTS.value("start-agent", "200") == before + 2
+
+    def test_bounded_parallelism(self, agent_env):
+        """Test that no more than `concurrency` joins are in flight"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+        release = threading.Event()
+
+        def handler(method, url, body, headers):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            release.wait(0.05)
+            with lock:
+                state["active"] -= 1
+            return 200, "{}"
+
+        result = start_agents([{} for _ in range(12)], concurrency=3, transport=FakeTransport(handler=handler))
+
+        assert result["summary"]["concurrency"] == 3
+        assert state["peak"] <= 3
+        assert len({r["channel"] for r in result["results"]}) == 12
+
+
+@pytest.mark.integration
+class TestBulkEndpoints:
+    """Tests for POST /start-agents and the matching Lambda event"""
+
+    def test_flask_start_agents(self, client, agent_env, fake_transport):
+        """Test the Flask bulk endpoint"""
+        response = client.post('/start-agents', json={"agents": [{"channel": "a"}, {"channel": "b"}]})
+
+        assert response.status_code == 200
+        assert response.json["summary"]["succeeded"] == 2
+        assert len(fake_transport.requests) == 2
+
+    def test_flask_start_agents_invalid(self, client):
+        """Test that the Flask bulk endpoint validates the body"""
+        response = client.post('/start-agents', json={"agents": []})
+
+        assert response.status_code == 400
+        assert 'agents' in response.json['error']
+
+    def test_lambda_api_gateway_event(self, agent_env, fake_transport):
+        """Test a POST /start-agents API Gateway event"""
+        event = {
+            "rawPath": "/start-agents",
+            "body": json.dumps({"agents": [{"channel": "a"}]}),
+        }
+
+        response = lambda_handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["summary"]["succeeded"] == 1
+
+    def test_lambda_direct_invoke(self, agent_env, fake_transport):
+        """Test a direct invocation with an agents list"""
+        response = lambda_handler({"agents": [{"channel": "a"}, {"channel": "b"}], "concurrency": 2}, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["summary"]["total"] == 2
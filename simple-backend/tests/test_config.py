@@ -2,7 +2,20 @@
 
 import pytest
 import os
-from core.config import initialize_constants
+import signal
+import threading
+import time
+from core.config import (
+    FileWatcher,
+    ProfileRegistry,
+    discover_profiles,
+    get_constants,
+    get_registry,
+    initialize_constants,
+    install_reload_signal,
+    reload_profiles,
+    resolve_setting,
+)
 
 
 @pytest.mark.unit
@@ -40,3 +53,157 @@ class TestInitializeConstants:
         assert isinstance(constants.get("USER_UID", ""), str)
         assert isinstance(constants.get("TTS_SAMPLE_RATE", ""), str)
         assert isinstance(constants.get("TTS_SPEED", ""), str)
+
+
+@pytest.mark.unit
+class TestProfileRegistry:
+    """Tests for compiled profile configs"""
+
+    ENV = {
+        "APP_ID": "base_app",
+        "AGENT_AUTH_HEADER": "Basic abc",
+        "LLM_API_KEY": "llm",
+        "TTS_VENDOR": "rime",
+        "IDLE_TIMEOUT": "60",
+        "AVATAR_TTS_VENDOR": "elevenlabs",
+        "AVATAR_AVATAR_ENABLED": "true",
+        "AVATAR_ANAM_BETA_APP_ID": "beta",
+        "SALES_DEFAULT_PROMPT": "Sell things",
+        "PATH": "/usr/bin",
+    }
+
+    def test_discovers_profiles(self):
+        """Test that profile prefixes are found and setting names are not mistaken for profiles"""
+        assert discover_profiles(self.ENV) == ["AVATAR", "SALES"]
+        assert discover_profiles({"ANAM_BETA_APP_ID": "x", "AVATAR_ENABLED": "true"}) == []
+
+    def test_matches_initialize_constants(self, monkeypatch):
+        """Test that a compiled profile has the same values as initialize_constants"""
+        for name, value in self.ENV.items():
+            monkeypatch.setenv(name, value)
+
+        for profile in (None, "avatar", "sales"):
+            assert dict(ProfileRegistry().get(profile)) == initialize_constants(profile)
+
+    def test_typed_fields(self):
+        """Test that ints and bools are parsed once at compile time"""
+        registry = ProfileRegistry(self.ENV)
+
+        assert registry.get().idle_timeout == 60
+        assert registry.get().avatar_enabled is False
+        assert registry.get("avatar").avatar_enabled is True
+        assert registry.get("avatar").tts_speed == 1.0
+        assert registry.get().has_certificate is False
+
+    def test_profile_lookup(self):
+        """Test case-insensitive lookup and fallback to base for unknown profiles"""
+        registry = ProfileRegistry(self.ENV)
+
+        assert registry.get("Avatar") is registry.get("AVATAR")
+        assert registry.get("unknown") is registry.base
+        assert registry.get(None) is registry.base
+        assert registry.get("sales")["DEFAULT_PROMPT"] == "Sell things"
+
+    def test_immutable(self):
+        """Test that compiled configs cannot be modified"""
+        config = ProfileRegistry(self.ENV).get()
+
+        with pytest.raises(AttributeError):
+            config.idle_timeout = 5
+        with pytest.raises(AttributeError):
+            config.anything = 5
+        with pytest.raises(TypeError):
+            config["APP_ID"] = "x"
+
+    def test_validate(self):
+        """Test that missing required keys and unparseable values are reported"""
+        env = dict(self.ENV, SALES_IDLE_TIMEOUT="soon")
+        del env["LLM_API_KEY"]
+
+        problems = ProfileRegistry(env).validate()
+
+        assert "missing LLM_API_KEY" in problems[""]
+        assert "invalid IDLE_TIMEOUT='soon'" in problems["SALES"]
+
+    def test_resolve_setting(self, test_constants):
+        """Test override, compiled and dict lookups of typed settings"""
+        config = ProfileRegistry(self.ENV).get()
+
+        assert resolve_setting({"idle_timeout": "5"}, "idle_timeout", config, "IDLE_TIMEOUT") == 5
+        assert resolve_setting({}, "idle_timeout", config, "IDLE_TIMEOUT") == 60
+        assert resolve_setting({}, "idle_timeout", test_constants, "IDLE_TIMEOUT") == 300
+        assert resolve_setting({}, "enable_aivad", test_constants, "ENABLE_AIVAD") is False
+
+    def test_invalid_value_raises_on_use(self):
+        """Test that an unparseable setting raises ValueError when used"""
+        config = ProfileRegistry(dict(self.ENV, IDLE_TIMEOUT="soon")).get()
+
+        with pytest.raises(ValueError):
+            resolve_setting({}, "idle_timeout", config, "IDLE_TIMEOUT")
+
+    def test_get_constants_is_cached(self):
+        """Test that the per-request lookup returns the same compiled object"""
+        assert get_constants("x") is get_constants(None)
+
+
+@pytest.mark.unit
+class TestHotReload:
+    """Tests for atomic profile reloads"""
+
+    def test_reload_swaps_registry(self, monkeypatch):
+        """Test that a reload publishes new values and leaves held configs untouched"""
+        monkeypatch.setenv("DEFAULT_GREETING", "hello")
+        before = get_constants()
+
+        monkeypatch.setenv("DEFAULT_GREETING", "howdy")
+        monkeypatch.setenv("VIP_DEFAULT_GREETING", "welcome back")
+        result = reload_profiles()
+
+        assert before["DEFAULT_GREETING"] == "hello"
+        assert get_constants()["DEFAULT_GREETING"] == "howdy"
+        assert get_constants("vip")["DEFAULT_GREETING"] == "welcome back"
+        assert "VIP" in result["profiles"]
+        assert result["generation"] == get_registry().generation
+
+    def test_generation_increments(self):
+        """Test that each reload gets a new generation"""
+        first = reload_profiles()["generation"]
+        assert reload_profiles()["generation"] == first + 1
+
+    def test_file_watcher_detects_change(self, tmp_path):
+        """Test that FileWatcher calls on_change only when the file changes"""
+        path = tmp_path / ".env"
+        path.write_text("A=1\n")
+        calls = []
+        watcher = FileWatcher(str(path), lambda: calls.append(1))
+
+        assert watcher.check() is False
+        path.write_text("A=22\n")
+        assert watcher.check() is True
+        assert watcher.check() is False
+        assert calls == [1]
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="SIGHUP not available")
+    def test_sighup_reloads(self, monkeypatch):
+        """Test that SIGHUP triggers a reload off the signal handler"""
+        previous = signal.getsignal(signal.SIGHUP)
+        reloaded = threading.Event()
+        monkeypatch.setenv("DEFAULT_GREETING", "before")
+        get_constants()
+
+        try:
+            def before_reload():
+                monkeypatch.setenv("DEFAULT_GREETING", "after")
+                reloaded.set()
+
+            assert install_reload_signal(before_reload) is True
+            os.kill(os.getpid(), signal.SIGHUP)
+            assert reloaded.wait(5)
+            for _ in range(100):
+                if get_constants()["DEFAULT_GREETING"] == "after":
+                    break
+                time.sleep(0.01)
+        finally:
+            signal.signal(signal.SIGHUP, previous)
+
+        assert get_constants()["DEFAULT_GREETING"] == "after"
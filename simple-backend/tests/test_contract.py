@@ -0,0 +1,245 @@
+"""
+Contract tests: the ASGI app (asgi_app.py) and the Flask app (local_server.py)
+must return identical /start-agent, /hangup-agent and /health responses
+"""
+
+import asyncio
+import json
+import re
+import pytest
+from asgi_app import app as asgi_app
+
+
+class Reply:
+    """Status, lower-cased headers and raw body of one response."""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def json(self):
+        return json.loads(self.body)
+
+
+async def asgi_request(path, query="", method="GET"):
+    """Calls the ASGI app in the running loop, as a server would."""
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode(), "headers": []}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_app(scope, receive, send)
+    start, body = messages
+    headers = {name.decode().lower(): value.decode() for name, value in start["headers"]}
+    return Reply(start["status"], headers, body["body"])
+
+
+class Servers:
+    """Sends the same request to the Flask test client and the ASGI app."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def flask(self, path, query="", method="GET"):
+        response = self.client.open(f"{path}?{query}" if query else path, method=method)
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        return Reply(response.status_code, headers, response.get_data())
+
+    def asgi(self, path, query="", method="GET"):
+        return asyncio.run(asgi_request(path, query, method))
+
+    def both(self, path, query="", method="GET"):
+        return self.flask(path, query, method), self.asgi(path, query, method)
+
+
+TOKEN = re.compile(r'"007[A-Za-z0-9+/=]+"')
+TIMING = re.compile(r"dur=[0-9.]+")
+
+
+def normalized(reply):
+    """Body with tokens (random salt and timestamp) masked."""
+    return json.loads(TOKEN.sub('"<token>"', reply.body.decode()) or "null")
+
+
+def assert_same(flask, asgi):
+    """Asserts identical status, headers (timings aside) and body (tokens aside)."""
+    assert flask.status == asgi.status
+    assert {k: TIMING.sub("dur=", v) for k, v in flask.headers.items() if k != "content-length"} == \
+        {k: TIMING.sub("dur=", v) for k, v in asgi.headers.items() if k != "content-length"}
+    assert normalized(flask) == normalized(asgi)
+
+
+@pytest.fixture
+def servers(client, agent_env, upstream, monkeypatch):
+    """Both apps, configured against the local upstream stand-in"""
+    monkeypatch.setenv("AGENT_API_BASE_URL", upstream.base_url)
+    monkeypatch.setenv("AGENT_RETRY_ATTEMPTS", "1")
+    monkeypatch.setenv("ANAM_BETA_APP_ID", "0123456789abcdef0123456789abcdef")
+    monkeypatch.setenv("ANAM_BETA_CREDENTIALS", "beta:secret")
+    monkeypatch.setenv("ANAM_BETA_ENDPOINT", upstream.base_url)
+    return Servers(client)
+
+
+@pytest.mark.integration
+class TestStartAgentContract:
+    """/start-agent responses from both apps"""
+
+    @pytest.mark.parametrize("query", [
+        "channel=contract&connect=false",
+        "channel=contract",
+        "channel=contract&debug",
+        "channel=contract&avatar_enabled=true&avatar_vendor=heygen",
+        "channel=contract&avatar_enabled=true&avatar_vendor=anam",
+        "channel=contract&tts_vendor=unknown",
+        "channel=contract&profile=sales&connect=false",
+    ])
+    def test_identical_responses(self, servers, query):
+        """Test token-only, join, debug, avatar, invalid config and profile requests"""
+        flask, asgi = servers.both("/start-agent", query)
+
+        assert_same(flask, asgi)
+        assert flask.body.endswith(b"\n")
+
+    def test_identical_bytes(self, servers, monkeypatch):
+        """Test byte-identical bodies when nothing random is involved"""
+        monkeypatch.delenv("APP_CERTIFICATE")
+
+        flask, asgi = servers.both("/start-agent", "channel=contract")
+
+        assert flask.body == asgi.body
+        assert flask.headers["content-type"] == asgi.headers["content-type"] == "application/json"
+
+    def test_upstream_error(self, servers, upstream):
+        """Test that a failed join is reported the same way"""
+        upstream.script(503, {"reason": "Unavailable"})
+        upstream.script(503, {"reason": "Unavailable"})
+
+        assert_same(*servers.both("/start-agent", "channel=contract"))
+
+    def test_server_timing_stages(self, servers):
+        """Test that both apps time the same stages"""
+        flask, asgi = servers.both("/start-agent", "channel=contract")
+
+        stages = [entry.split(";")[0] for entry in asgi.headers["server-timing"].split(", ")]
+        assert stages == ["config", "tokens", "payload", "upstream", "deferred_tokens", "total"]
+        assert TIMING.sub("", flask.headers["server-timing"]) == TIMING.sub("", asgi.headers["server-timing"])
+
+    def test_random_channel(self, servers):
+        """Test that a generated channel is used consistently in the response"""
+        asgi = servers.asgi("/start-agent", "connect=false").json
+
+        assert len(asgi["channel"]) == 10
+        assert asgi["agent_rtm_uid"].endswith(asgi["channel"])
+
+    def test_concurrent_starts_share_one_join(self, servers, upstream):
+        """Test single-flight coalescing of concurrent async starts"""
+        upstream.script(200, {"agent_id": "agent_slow", "status": "RUNNING"}, delay=0.2)
+
+        async def run():
+            return await asyncio.gather(*(asgi_request("/start-agent", "channel=dup") for _ in range(3)))
+
+        replies = asyncio.run(run())
+
+        joins = [r for r in upstream.requests if r["path"].endswith("/join")]
+        assert len(joins) == 1
+        agent_responses = [reply.json["agent_response"] for reply in replies]
+        assert sorted(bool(r.get("coalesced")) for r in agent_responses) == [False, True, True]
+
+
+@pytest.mark.integration
+class TestHangupAgentContract:
+    """/hangup-agent responses from both apps"""
+
+    def test_by_agent_id(self, servers):
+        """Test hangup by agent_id"""
+        assert_same(*servers.both("/hangup-agent", "agent_id=agent_123"))
+
+    def test_by_channel(self, servers):
+        """Test hangup by channel of an agent this process started"""
+        servers.flask("/start-agent", "channel=contract")
+        flask = servers.flask("/hangup-agent", "channel=contract")
+        servers.asgi("/start-agent", "channel=contract")
+        asgi = servers.asgi("/hangup-agent", "channel=contract")
+
+        assert_same(flask, asgi)
+        assert asgi.json["agent_response"]["agent_id"] == "agent_123"
+
+    def test_unknown_channel(self, servers):
+        """Test the 404 result when no running agent is found"""
+        flask, asgi = servers.both("/hangup-agent", "channel=nobody")
+
+        assert_same(flask, asgi)
+        assert asgi.json["agent_response"]["status_code"] == 404
+
+    def test_missing_parameters(self, servers):
+        """Test the 400 response without agent_id or channel"""
+        flask, asgi = servers.both("/hangup-agent")
+
+        assert flask.status == 400
+        assert flask.body == asgi.body
+
+
+@pytest.mark.integration
+class TestHealthContract:
+    """/health responses from both apps"""
+
+    def test_ok(self, servers):
+        """Test the healthy response"""
+        flask, asgi = servers.both("/health")
+
+        assert flask.body == asgi.body
+        assert_same(flask, asgi)
+
+    def test_degraded_strict(self, servers):
+        """Test the degraded and strict responses with an open circuit"""
+        from core.breaker import get_breaker
+        breaker = get_breaker("https://api.agora.io/v1/projects")
+        for _ in range(breaker.min_calls):
+            breaker.allow()
+            breaker.record(False, 0.1)
+
+        for query in ("", "strict"):
+            flask, asgi = servers.both("/health", query)
+            assert_same(flask, asgi)
+        assert asgi.status == 503
+
+    def test_options(self, servers):
+        """Test the CORS preflight response"""
+        flask, asgi = servers.both("/health", method="OPTIONS")
+
+        # Flask lists the allowed methods in no fixed order
+        assert sorted(flask.headers.pop("allow").split(", ")) == sorted(asgi.headers.pop("allow").split(", "))
+        assert_same(flask, asgi)
+
+
+@pytest.mark.unit
+class TestAsgiApp:
+    """ASGI-specific behaviour outside the shared contract"""
+
+    def test_unknown_path_and_method(self):
+        """Test JSON 404 and 405 responses"""
+        assert asyncio.run(asgi_request("/nope")).status == 404
+        reply = asyncio.run(asgi_request("/health", method="POST"))
+        assert reply.status == 405
+        assert reply.headers["allow"] == "OPTIONS, GET, HEAD"
+
+    def test_lifespan(self, agent_env):
+        """Test that startup warms the process and shutdown completes"""
+        sent = []
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
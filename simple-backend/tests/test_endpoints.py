@@ -0,0 +1,216 @@
+"""Tests for core.endpoints: token minting overlapped with the Agora join"""
+
+import asyncio
+import json
+import time
+import pytest
+from core.endpoints import join_and_mint, join_and_mint_async, prepare_start
+from core.metrics import ERRORS, REQUESTS, StageTimer
+
+
+def stage_timings(header):
+    """Parses a Server-Timing value into {stage: (ms, concurrent)}."""
+    stages = {}
+    for entry in header.split(", "):
+        name, duration = entry.split(";")[:2]
+        stages[name] = (float(duration[len("dur="):]), 'desc="concurrent"' in entry)
+    return stages
+
+
+@pytest.fixture
+def slow_minting(monkeypatch):
+    """Makes each token mint take 30 ms and records the minted uids"""
+    import core.endpoints
+    minted = []
+    build = core.endpoints.build_token_cached
+
+    def slow_build(channel, uid, constants, profile=None):
+        time.sleep(0.03)
+        minted.append(uid)
+        return build(channel, uid, constants, profile)
+
+    monkeypatch.setattr("core.endpoints.build_token_cached", slow_build)
+    return minted
+
+
+@pytest.mark.unit
+class TestPrepareStart:
+    """Tests for which tokens are minted before the join"""
+
+    def test_join_without_avatar_defers_all_tokens(self, agent_env):
+        """Test that no token is minted before a join that does not need one"""
+        start = prepare_start({"channel": "room"}, StageTimer())
+
+        assert start.needs_join
+        assert start.user_token is None and start.agent_video_token is None
+        start.mint_deferred_tokens()
+        assert start.user_token["token"].startswith("007")
+        assert start.agent_video_token["token"].startswith("007")
+
+    def test_avatar_join_mints_agent_video_token_first(self, agent_env, monkeypatch):
+        """Test that the avatar token is minted for, and spliced into, the payload"""
+        monkeypatch.setenv("HEYGEN_API_KEY", "heygen")
+
+        start = prepare_start({"channel": "room", "avatar_enabled": "true", "avatar_vendor": "heygen"}, StageTimer())
+
+        assert start.user_token is None
+        token = start.agent_video_token["token"]
+        assert json.loads(start.agent_payload.json)["properties"]["avatar"]["params"]["agora_token"] == token
+
+    def test_lambda_options(self, agent_env, monkeypatch):
+        """Test the Lambda handler's unsigned tokens, APP_ID and warm pool bypass"""
+        monkeypatch.delenv("APP_CERTIFICATE")
+        monkeypatch.setenv("WARM_POOL_SIZE", "1")
+        monkeypatch.setenv("ANAM_API_KEY", "anam")
+        monkeypatch.setenv("ANAM_BETA_APP_ID", "0123456789abcdef0123456789abcdef")
+        query = {"avatar_enabled": "true", "avatar_vendor": "anam", "connect": "false"}
+
+        start = prepare_start(query, StageTimer(), warm_pool=False, app_id_as_token=True, anam_app_id=False)
+
+        assert start.user_token["token"] == start.app_id == "abcdef1234567890abcdef1234567890"
+        from core.warmpool import get_warm_pools
+        assert get_warm_pools().stats() == {}
+
+    def test_token_only_mints_everything(self, agent_env):
+        """Test that connect=false has nothing left to mint"""
+        start = prepare_start({"channel": "room", "connect": "false"}, StageTimer())
+
+        assert not start.needs_join
+        assert not start.has_deferred_tokens
+
+
+@pytest.mark.unit
+class TestJoinAndMint:
+    """Tests for overlapping the deferred tokens with the join"""
+
+    def test_blocking_join_overlaps_minting(self, agent_env, slow_minting):
+        """Test that two 30 ms mints hide behind a 100 ms join"""
+        timer = StageTimer()
+        start = prepare_start({"channel": "room"}, timer)
+
+        result = join_and_mint(start, lambda: time.sleep(0.1) or "joined")
+
+        assert result == "joined"
+        assert timer.stages["deferred_tokens"] >= 0.06
+        assert timer.total() < timer.stages["upstream"] + timer.stages["deferred_tokens"]
+        assert start.user_token is not None and start.agent_video_token is not None
+
+    def test_async_join_overlaps_minting(self, agent_env, slow_minting):
+        """Test that the join task is started before the tokens are minted"""
+        events = []
+
+        async def join():
+            events.append("join")
+            await asyncio.sleep(0.1)
+            return "joined"
+
+        async def run():
+            timer = StageTimer()
+            start = prepare_start({"channel": "room"}, timer)
+            result = await join_and_mint_async(start, join)
+            return timer, result
+
+        timer, result = asyncio.run(run())
+
+        assert result == "joined"
+        assert events == ["join"]
+        assert timer.total() < timer.stages["upstream"] + timer.stages["deferred_tokens"]
+
+
+@pytest.mark.integration
+class TestOverlappedStarts:
+    """Server-Timing of whole requests against a slow upstream"""
+
+    def check(self, header):
+        stages = stage_timings(header)
+        assert stages["deferred_tokens"][1] is True
+        assert stages["upstream"][1] is False
+        # The tokens were minted while the join was in flight
+        assert stages["total"][0] < stages["upstream"][0] + stages["deferred_tokens"][0]
+        return stages
+
+    @pytest.fixture
+    def slow_upstream(self, agent_env, upstream, monkeypatch):
+        monkeypatch.setenv("AGENT_API_BASE_URL", upstream.base_url)
+        upstream.script(200, {"agent_id": "agent_slow", "status": "RUNNING"}, delay=0.1)
+        return upstream
+
+    def test_flask(self, client, slow_upstream, slow_minting):
+        """Test the Flask /start-agent"""
+        response = client.get('/start-agent?channel=room')
+
+        assert response.json["user_token"]["token"].startswith("007")
+        self.check(response.headers["Server-Timing"])
+
+    def test_lambda(self, slow_upstream, slow_minting):
+        """Test lambda_handler"""
+        from lambda_handler import lambda_handler
+
+        response = lambda_handler({"queryStringParameters": {"channel": "room"}}, None)
+
+        assert json.loads(response["body"])["user_token"]["token"].startswith("007")
+        self.check(response["headers"]["Server-Timing"])
+
+    def test_asgi(self, slow_upstream, slow_minting):
+        """Test the ASGI /start-agent"""
+        from tests.test_contract import asgi_request
+
+        reply = asyncio.run(asgi_request("/start-agent", "channel=room"))
+
+        assert reply.json["user_token"]["token"].startswith("007")
+        self.check(reply.headers["server-timing"])
+
+
+@pytest.mark.integration
+class TestUpstreamFailure:
+    """Starts whose join raises after the retries are exhausted"""
+
+    @pytest.fixture
+    def unreachable(self, agent_env, fake_transport, no_jitter, monkeypatch):
+        def refuse(method, url, body, headers):
+            raise ConnectionError("connection refused")
+
+        monkeypatch.setenv("AGENT_RETRY_ATTEMPTS", "1")
+        fake_transport.handler = refuse
+        return fake_transport
+
+    def errors(self):
+        return ERRORS.value("upstream", "ConnectionError"), REQUESTS.value("start-agent", "error")
+
+    def test_blocking_join(self, unreachable):
+        """Test that join_and_mint records the failure before re-raising"""
+        from core.agent import send_agent_to_channel_once
+        before = self.errors()
+        timer = StageTimer()
+        start = prepare_start({"channel": "room"}, timer)
+
+        with pytest.raises(ConnectionError):
+            join_and_mint(start, lambda: send_agent_to_channel_once(start.channel, start.agent_payload, start.constants))
+
+        assert self.errors() == (before[0] + 1, before[1] + 1)
+        assert "upstream" in timer.stages
+
+    def test_async_join(self, unreachable):
+        """Test that join_and_mint_async records the failure before re-raising"""
+        from core.agent import send_agent_to_channel_once_async
+        before = self.errors()
+
+        async def run():
+            start = prepare_start({"channel": "room"}, StageTimer())
+            await join_and_mint_async(start, lambda: send_agent_to_channel_once_async(
+                start.channel, start.agent_payload, start.constants, transport=unreachable))
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(run())
+
+        assert self.errors() == (before[0] + 1, before[1] + 1)
+
+    def test_lambda(self, unreachable):
+        """Test that the Lambda start path records the failure"""
+        from lambda_handler import lambda_handler
+        before = self.errors()
+
+        with pytest.raises(ConnectionError):
+            lambda_handler({"queryStringParameters": {"channel": "room"}}, None)
+
+        assert self.errors() == (before[0] + 1, before[1] + 1)
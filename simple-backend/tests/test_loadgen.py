@@ -0,0 +1,113 @@
+"""Tests for tools/loadgen.py"""
+
+import os
+import threading
+import pytest
+from tools.loadgen import (
+    LambdaClient, LoadRun, ProcessMonitor, classify, parse_mix, report, standin_stats, start_standin, stop_process
+)
+
+
+class FakeClient:
+    """Answers every request in memory, failing hangups of unknown channels"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def call(self, path, params):
+        with self.lock:
+            self.calls.append((path, params))
+        if path == "/hangup-agent" and params["channel"].endswith("-idle"):
+            return 200, {"agent_response": {"success": False, "status_code": 404}}
+        return 200, {"agent_response": {"success": True, "status_code": 200}}
+
+
+@pytest.mark.unit
+class TestLoadgenHelpers:
+    """Tests for mix parsing, classification and reports"""
+
+    def test_parse_mix(self):
+        """Test weights, defaults and validation"""
+        assert parse_mix("token=3, join") == {"token": 3.0, "join": 1.0}
+        with pytest.raises(ValueError):
+            parse_mix("tokens=1")
+        with pytest.raises(ValueError):
+            parse_mix("join=0")
+
+    @pytest.mark.parametrize("status,body,expected", [
+        (200, {"agent_response": {"success": True}}, None),
+        (200, {"token": "x"}, None),
+        (400, {"error": "bad"}, "http 400"),
+        (200, {"agent_response": {"success": False, "status_code": 429}}, "upstream 429"),
+        (200, {"agent_response": {"success": False, "status_code": 503, "circuit_open": True}}, "circuit open"),
+    ])
+    def test_classify(self, status, body, expected):
+        """Test error reasons for HTTP and upstream failures"""
+        assert classify(status, body) == expected
+
+    def test_closed_loop_report(self):
+        """Test that a run records every request and hangs up started channels"""
+        client = FakeClient()
+        run = LoadRun(lambda: client, parse_mix("join=1,hangup=1"), seed=4)
+
+        run.closed_loop(concurrency=2, duration=5, requests=40)
+        result = report(run, 1.0)
+
+        assert result["requests"] == 40 and result["throughput_rps"] == 40.0
+        assert set(result["by_kind"]) == {"join", "hangup"}
+        assert set(result["latency_ms"]) == {"p50", "p95", "p99", "p99.9", "max", "mean"}
+        started = {params["channel"] for path, params in client.calls if path == "/start-agent"}
+        hung_up = [params["channel"] for path, params in client.calls if path == "/hangup-agent"]
+        assert {channel for channel in hung_up if not channel.endswith("-idle")} <= started
+        assert result["errors"] == sum(channel.endswith("-idle") for channel in hung_up)
+
+    def test_open_loop_measures_from_arrival(self):
+        """Test that open-loop latency includes time spent waiting for a worker"""
+        class SlowClient(FakeClient):
+            def call(self, path, params):
+                threading.Event().wait(0.02)
+                return super().call(path, params)
+
+        run = LoadRun(SlowClient, {"token": 1}, seed=1)
+        run.open_loop(rate=500, concurrency=1, duration=5, requests=10)
+
+        latencies = sorted(run.samples["token"])
+        assert len(latencies) == 10
+        assert latencies[-1] > 0.1  # the last arrival queued behind the others
+
+    def test_process_monitor(self):
+        """Test CPU and RSS sampling of this process"""
+        monitor = ProcessMonitor(os.getpid(), interval=0.01, children=False).start()
+        sum(i * i for i in range(200000))
+
+        usage = monitor.stop()
+
+        assert usage["processes"] == 1
+        assert usage["rss_mb"] > 0 and usage["peak_rss_mb"] >= usage["rss_mb"]
+        assert usage["cpu_seconds"] >= 0
+
+
+@pytest.mark.integration
+class TestLoadgenTargets:
+    """Tests for the in-process Lambda target and the stand-in subprocess"""
+
+    def test_lambda_target(self, agent_env, fake_transport):
+        """Test a short run against lambda_handler"""
+        run = LoadRun(LambdaClient, parse_mix("token=1,join=1,hangup=1"), seed=2)
+
+        run.closed_loop(concurrency=2, duration=5, requests=30)
+        result = report(run, 1.0)
+
+        assert result["requests"] == 30
+        assert set(result["error_breakdown"]) <= {"hangup: upstream 404"}
+
+    def test_standin_subprocess(self):
+        """Test starting, querying and stopping the stand-in"""
+        process, base_url = start_standin("--seed 1")
+        try:
+            assert base_url.endswith("/api/conversational-ai-agent/v2/projects")
+            assert standin_stats(base_url) == {"requests": {}, "agents": {"running": 0, "stopped": 0}}
+        finally:
+            stop_process(process)
+        assert process.poll() is not None
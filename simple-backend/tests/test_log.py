@@ -0,0 +1,176 @@
+"""Tests for core.log module"""
+
+import io
+import json
+import logging
+import threading
+import pytest
+import core.log
+from core.log import (
+    REDACTED,
+    LazyPayload,
+    configure_logging,
+    flush_logging,
+    get_logger,
+    log_event,
+    log_payload,
+    redact,
+    redact_headers,
+)
+from core.agent import send_agent_to_channel
+from core.transport import FakeTransport
+
+
+PAYLOAD = {
+    "name": "room",
+    "properties": {
+        "channel": "room",
+        "advanced_features": {"enable_rtm": True, "enable_bhvs": True},
+        "llm": {"api_key": "sk-secret", "params": {"model": "gpt-4o-mini"}},
+        "tts": {"vendor": "rime", "params": {"api_key": "rime-secret", "speaker": "astra"}},
+        "asr": {"vendor": "deepgram", "params": {"key": "dg-secret"}},
+    }
+}
+
+
+def lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.mark.unit
+class TestRedaction:
+    """Tests for field-path redaction"""
+
+    def test_redacts_secret_paths(self):
+        """Test that every configured secret field is replaced"""
+        redacted = redact(PAYLOAD)
+
+        assert redacted["properties"]["llm"]["api_key"] == REDACTED
+        assert redacted["properties"]["tts"]["params"]["api_key"] == REDACTED
+        assert redacted["properties"]["asr"]["params"]["key"] == REDACTED
+        assert redacted["properties"]["tts"]["params"]["speaker"] == "astra"
+
+    def test_original_untouched_and_unrelated_branches_shared(self):
+        """Test that only dictionaries on a redaction path are copied"""
+        redacted = redact(PAYLOAD)
+
+        assert PAYLOAD["properties"]["llm"]["api_key"] == "sk-secret"
+        assert redacted["properties"]["advanced_features"] is PAYLOAD["properties"]["advanced_features"]
+
+    def test_non_dict_values(self):
+        """Test that lists and scalars pass through"""
+        assert redact([1, 2]) == [1, 2]
+        assert redact({"properties": "x"}) == {"properties": "x"}
+
+    def test_redact_headers(self):
+        """Test case-insensitive header redaction"""
+        headers = redact_headers({"authorization": "Basic abc", "Content-Type": "application/json"})
+
+        assert headers == {"authorization": REDACTED, "Content-Type": "application/json"}
+
+    def test_lazy_payload_truncates(self):
+        """Test that large payloads are truncated after redaction"""
+        rendered = LazyPayload(json.dumps(dict(PAYLOAD, pad="x" * 500)), 100).render()
+
+        assert isinstance(rendered, str)
+        assert "sk-secret" not in rendered
+        assert rendered.endswith("more chars)")
+
+
+@pytest.mark.unit
+class TestLogging:
+    """Tests for structured output, levels and sampling"""
+
+    def test_structured_fields(self, log_stream):
+        """Test that fields become JSON keys"""
+        log_event(get_logger("test"), logging.INFO, "hello", channel="room", status=200)
+
+        entry, = lines(log_stream)
+        assert entry["msg"] == "hello"
+        assert entry["logger"] == "convoai.test"
+        assert entry["channel"] == "room"
+        assert entry["status"] == 200
+
+    def test_text_format(self):
+        """Test key=value text output"""
+        stream = io.StringIO()
+        configure_logging(level="INFO", fmt="text", use_queue=False, stream=stream)
+        try:
+            log_event(get_logger("test"), logging.INFO, "hello", channel="room")
+        finally:
+            configure_logging()
+
+        assert stream.getvalue().strip().endswith("INFO convoai.test hello channel=room")
+
+    def test_disabled_level_skips_payload(self, log_stream, monkeypatch):
+        """Test that no payload work happens when DEBUG is off"""
+        get_logger("test")
+        logging.getLogger("convoai").setLevel(logging.INFO)
+        monkeypatch.setattr(core.log, "LazyPayload", lambda *a: pytest.fail("payload built"))
+
+        log_payload(get_logger("test"), "payload", json.dumps(PAYLOAD))
+
+        assert log_stream.getvalue() == ""
+
+    def test_large_payloads_sampled(self, log_stream, monkeypatch):
+        """Test that payloads over LOG_MAX_BODY are only logged when sampled"""
+        monkeypatch.setitem(core.log._settings, "max_body", 10)
+        monkeypatch.setattr(core.log.random, "random", lambda: 0.5)
+        logger = get_logger("test")
+
+        monkeypatch.setitem(core.log._settings, "large_sample_rate", 0.1)
+        log_payload(logger, "payload", json.dumps(PAYLOAD))
+        monkeypatch.setitem(core.log._settings, "large_sample_rate", 1.0)
+        log_payload(logger, "payload", json.dumps(PAYLOAD))
+
+        assert len(lines(log_stream)) == 1
+
+    def test_queue_writes_on_background_thread(self):
+        """Test that the queue handler defers formatting to the listener thread"""
+        threads = []
+
+        class Recording(io.StringIO):
+            def write(self, text):
+                threads.append(threading.current_thread())
+                return super().write(text)
+
+        stream = Recording()
+        configure_logging(level="INFO", fmt="json", use_queue=True, stream=stream)
+        try:
+            log_event(get_logger("test"), logging.INFO, "queued")
+            flush_logging()
+        finally:
+            configure_logging()
+
+        assert "queued" in stream.getvalue()
+        assert threads and threading.current_thread() not in threads
+
+
+@pytest.mark.unit
+class TestAgentLogging:
+    """Tests that agent calls log structured, redacted events"""
+
+    def test_join_logs_without_secrets(self, log_stream, test_constants):
+        """Test that the join payload is logged redacted and headers are not logged"""
+        constants = dict(test_constants, AGENT_AUTH_HEADER="Basic super-secret")
+
+        send_agent_to_channel("room", PAYLOAD, constants, transport=FakeTransport())
+
+        output = log_stream.getvalue()
+        assert "sk-secret" not in output
+        assert "dg-secret" not in output
+        assert "super-secret" not in output
+        messages = [entry["msg"] for entry in lines(log_stream)]
+        assert messages[:2] == ["Sending agent to Agora ConvoAI", "Join payload"]
+        assert "Join response" in messages
+
+    def test_failed_join_logs_warning(self, log_stream, test_constants):
+        """Test that a failed join is logged at WARNING with the response body"""
+        transport = FakeTransport()
+        transport.script(409, '{"reason": "conflict"}')
+
+        send_agent_to_channel("room", PAYLOAD, test_constants, transport=transport)
+
+        warning, = [entry for entry in lines(log_stream) if entry["level"] == "WARNING"]
+        assert warning["status"] == 409
+        assert "conflict" in warning["body"]
@@ -0,0 +1,181 @@
+"""Tests for core.metrics module, /metrics and Lambda timing logs"""
+
+import json
+import time
+import pytest
+from core.metrics import (
+    ERRORS, REQUESTS, STAGE_SECONDS, Counter, Histogram, StageTimer, observe_start, render_metrics, start_labels
+)
+
+
+class FakePayload:
+    avatar_vendor = "anam"
+
+
+@pytest.mark.unit
+class TestMetricTypes:
+    """Tests for the exposition format"""
+
+    def test_counter_render(self):
+        """Test counter lines with escaped labels"""
+        counter = Counter("x_total", "help", ("reason",))
+        counter.inc('bad "quote"')
+        counter.inc('bad "quote"', amount=2)
+
+        assert counter.render() == ['x_total{reason="bad \\"quote\\""} 3']
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket, sum and count lines"""
+        histogram = Histogram("t_seconds", "help", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "join")
+
+        assert histogram.render() == [
+            't_seconds_bucket{stage="join",le="0.1"} 1',
+            't_seconds_bucket{stage="join",le="1"} 3',
+            't_seconds_bucket{stage="join",le="+Inf"} 4',
+            't_seconds_sum{stage="join"} 6.05',
+            't_seconds_count{stage="join"} 4',
+        ]
+
+    def test_stage_timer_laps(self):
+        """Test that laps split the elapsed time between stages"""
+        timer = StageTimer()
+        time.sleep(0.01)
+        timer.lap("tokens")
+        timer.lap("payload")
+
+        assert timer.stages["tokens"] >= 0.01
+        assert timer.stages["payload"] < timer.stages["tokens"]
+        assert timer.total() >= sum(timer.stages.values())
+
+    def test_server_timing_header(self):
+        """Test the Server-Timing value lists each stage and the total in ms"""
+        timer = StageTimer()
+        timer.stages = {"config": 0.0001, "upstream": 0.25}
+
+        entries = timer.server_timing().split(", ")
+
+        assert entries[:2] == ["config;dur=0.10", "upstream;dur=250.00"]
+        assert entries[2].startswith("total;dur=")
+
+    def test_concurrent_stage(self):
+        """Test that a recorded stage keeps the lap point and is described as concurrent"""
+        timer = StageTimer()
+        timer.record("deferred_tokens", 0.002)
+        time.sleep(0.01)
+        timer.lap("upstream")
+
+        assert timer.stages["upstream"] >= 0.01
+        assert 'deferred_tokens;dur=2.00;desc="concurrent"' in timer.server_timing()
+        assert "upstream;dur=" in timer.server_timing()
+
+
+@pytest.mark.unit
+class TestObserveStart:
+    """Tests for recording /start-agent requests"""
+
+    def test_labels_bound_cardinality(self, test_constants):
+        """Test that unknown vendors are reported as other"""
+        labels = start_labels(test_constants, {"tts_vendor": "made-up"}, FakePayload(),
+                              {"status_code": 200, "success": True})
+
+        assert labels == ("default", "other", "ares", "anam", "200")
+
+    def test_store_profiles_share_one_label(self, tmp_path, monkeypatch):
+        """Test that store-only profiles don't each get their own series"""
+        import json
+        from core.config import get_constants
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps({f"TENANT{i}": {"TTS_VENDOR": "rime"} for i in range(3)}))
+        monkeypatch.setenv("PROFILE_STORE", str(path))
+        monkeypatch.setenv("SALES_TTS_VENDOR", "openai")
+
+        labels = {start_labels(get_constants(name), {})[0] for name in ("tenant0", "tenant1", "tenant2")}
+
+        assert labels == {"store"}
+        assert start_labels(get_constants("sales"), {})[0] == "SALES"
+        assert start_labels(get_constants(), {})[0] == "default"
+
+    def test_stages_errors_and_requests(self, test_constants):
+        """Test that each stage is observed and failures are counted"""
+        timer = StageTimer()
+        timer.lap("config")
+        timer.lap("upstream")
+        before = ERRORS.value("upstream", "503")
+
+        observe_start(timer, test_constants, {}, FakePayload(), {"status_code": 503, "success": False})
+
+        labels = ("default", "openai", "ares", "anam", "503")
+        assert STAGE_SECONDS.count("upstream", *labels) >= 1
+        assert STAGE_SECONDS.count("total", *labels) >= 1
+        assert ERRORS.value("upstream", "503") == before + 1
+
+    def test_structured_log_line(self, test_constants, log_stream, monkeypatch):
+        """Test the METRICS_LOG line used on Lambda"""
+        monkeypatch.setenv("METRICS_LOG", "true")
+        timer = StageTimer()
+        timer.lap("tokens")
+
+        observe_start(timer, test_constants, {}, endpoint="start-agent")
+
+        entry, = [json.loads(line) for line in log_stream.getvalue().splitlines()]
+        assert entry["msg"] == "Request timings"
+        assert entry["status"] == "none"
+        assert "tokens_ms" in entry and "total_ms" in entry
+
+
+@pytest.mark.integration
+class TestMetricsEndpoint:
+    """Tests for GET /metrics and the Lambda equivalent"""
+
+    def test_metrics_after_start(self, client, agent_env, fake_transport):
+        """Test that a start shows up in the scraped histograms and counters"""
+        before = REQUESTS.value("start-agent", "200")
+        client.get('/start-agent?channel=room')
+
+        response = client.get('/metrics')
+        text = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert REQUESTS.value("start-agent", "200") == before + 1
+        assert 'convoai_stage_duration_seconds_bucket{stage="upstream",profile="default"' in text
+        assert 'convoai_cache_hits_total{cache="token"}' in text
+
+    def test_invalid_config_counted(self, client, agent_env, fake_transport):
+        """Test that a 400 from payload building is counted as an error"""
+        before = ERRORS.value("payload", "invalid_config")
+
+        response = client.get('/start-agent?channel=room&tts_vendor=unknown')
+
+        assert response.status_code == 400
+        assert ERRORS.value("payload", "invalid_config") == before + 1
+
+    def test_server_timing_on_start(self, client, agent_env, fake_transport):
+        """Test that /start-agent reports its stages in Server-Timing"""
+        response = client.get('/start-agent?channel=room')
+
+        names = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+        assert names == ["config", "tokens", "payload", "upstream", "deferred_tokens", "total"]
+        assert response.headers["Timing-Allow-Origin"] == "*"
+        assert "Server-Timing" not in client.get('/health').headers
+
+    def test_server_timing_on_lambda(self, agent_env, fake_transport):
+        """Test that the Lambda start response carries Server-Timing"""
+        from lambda_handler import lambda_handler
+
+        response = lambda_handler({"queryStringParameters": {"channel": "room", "connect": "false"}}, None)
+
+        assert response["headers"]["Server-Timing"].startswith("config;dur=")
+        assert "tokens;dur=" in response["headers"]["Server-Timing"]
+
+    def test_lambda_metrics_action(self, agent_env):
+        """Test the direct-invoke metrics action"""
+        from lambda_handler import lambda_handler
+
+        response = lambda_handler({"action": "metrics"}, None)
+
+        assert response["statusCode"] == 200
+        assert "# TYPE convoai_stage_duration_seconds histogram" in response["body"]
+        assert render_metrics().endswith("\n")
@@ -0,0 +1,172 @@
+"""Tests for core.pool module"""
+
+import json
+import pytest
+from core.pool import ConnectionPool, get_pool
+from core.agent import send_agent_to_channel, hangup_agent
+from core.transport import PooledTransport
+
+
+@pytest.mark.unit
+class TestConnectionPool:
+    """Tests for ConnectionPool against a local stand-in server"""
+
+    def test_reuses_keep_alive_connection(self, upstream):
+        """Test that sequential requests share one connection"""
+        pool = ConnectionPool()
+
+        first = pool.request("POST", f"{upstream.base_url}/join", "{}")
+        second = pool.request("POST", f"{upstream.base_url}/join", "{}")
+
+        assert first.status == 200
+        assert second.status == 200
+        assert upstream.requests[0]["client_port"] == upstream.requests[1]["client_port"]
+        assert pool.stats["created"] == 1
+        assert pool.stats["reused"] == 1
+
+    def test_https_reuses_connection(self, https_upstream):
+        """Test keep-alive reuse over TLS"""
+        server, client_context = https_upstream
+        pool = ConnectionPool(ssl_context=client_context)
+
+        for _ in range(3):
+            response = pool.request("GET", f"{server.base_url}/agents")
+            assert response.status == 200
+
+        assert pool.stats["created"] == 1
+        assert len({r["client_port"] for r in server.requests}) == 1
+
+    def test_prewarm_opens_idle_connections(self, upstream):
+        """Test that prewarmed connections are used by the first requests"""
+        pool = ConnectionPool()
+
+        assert pool.prewarm(f"{upstream.base_url}/join", count=2) == 2
+        assert pool.prewarm(f"{upstream.base_url}/join", count=2) == 0
+        pool.request("POST", f"{upstream.base_url}/join", "{}")
+
+        assert pool.stats == dict(pool.stats, created=2, reused=1)
+        assert pool.idle_count("http", upstream.base_url.split("//")[1]) == 2
+
+    def test_prewarm_unreachable_host_raises(self, upstream):
+        """Test that a refused connection is reported, not pooled"""
+        url = upstream.base_url
+        upstream.stop()
+        pool = ConnectionPool()
+
+        with pytest.raises(OSError):
+            pool.prewarm(url, count=1, timeout=1)
+        assert pool.idle_count() == 0
+
+    def test_server_closed_connection_is_replaced(self, upstream):
+        """Test that a connection closed by the server is not reused"""
+        upstream.close_connections = True
+        pool = ConnectionPool()
+
+        pool.request("GET", f"{upstream.base_url}/a")
+        pool.request("GET", f"{upstream.base_url}/b")
+
+        assert pool.stats["created"] == 2
+        assert pool.idle_count() == 0
+
+    def test_stale_idle_connection_detected(self, upstream):
+        """Test that an idle connection closed by the peer is discarded"""
+        pool = ConnectionPool()
+        pool.request("GET", f"{upstream.base_url}/a")
+
+        # Simulate the server dropping the idle connection
+        (conn, _), = pool._idle[("http", upstream.base_url.split("://")[1])]
+        conn.sock.close()
+        conn.sock = None
+
+        response = pool.request("GET", f"{upstream.base_url}/b")
+
+        assert response.status == 200
+        assert pool.stats["stale"] == 1
+        assert pool.stats["created"] == 2
+
+    def test_idle_eviction(self, upstream):
+        """Test that connections idle beyond idle_timeout are evicted"""
+        pool = ConnectionPool(idle_timeout=0)
+
+        pool.request("GET", f"{upstream.base_url}/a")
+        pool.request("GET", f"{upstream.base_url}/b")
+
+        assert pool.stats["created"] == 2
+        assert pool.stats["reused"] == 0
+
+    def test_max_size_caps_idle_connections(self):
+        """Test that the pool never keeps more than max_size idle connections"""
+        class FakeConn:
+            closed = False
+            sock = None
+
+            def close(self):
+                self.closed = True
+
+        pool = ConnectionPool(max_size=2)
+        conns = [FakeConn() for _ in range(3)]
+        for conn in conns:
+            pool._release(("https", "example.com"), conn)
+
+        assert pool.idle_count("https", "example.com") == 2
+        assert conns[2].closed
+
+    def test_retry_on_reset_of_reused_connection(self, upstream):
+        """Test that a reset on a reused connection is retried on a new one"""
+        pool = ConnectionPool()
+        pool.request("GET", f"{upstream.base_url}/a")
+
+        (conn, _), = pool._idle[("http", upstream.base_url.split("://")[1])]
+
+        def reset(*args, **kwargs):
+            raise ConnectionResetError()
+        conn.request = reset
+        pool._is_stale = lambda conn: False
+
+        response = pool.request("GET", f"{upstream.base_url}/b")
+
+        assert response.status == 200
+        assert pool.stats["retried"] == 1
+
+    def test_counters_exact_under_concurrency(self):
+        """Test that connections counted from many threads are not lost"""
+        import threading
+        pool = ConnectionPool()
+
+        def open_connections():
+            for _ in range(500):
+                pool._new_connection("http", "127.0.0.1:9", 1)
+
+        threads = [threading.Thread(target=open_connections) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert pool.stats["created"] == 4000
+
+    def test_get_pool_is_shared(self):
+        """Test that get_pool returns the same instance across calls"""
+        assert get_pool() is get_pool()
+
+
+@pytest.mark.unit
+class TestAgentCallsUsePool:
+    """Tests that agent join/leave share pooled connections"""
+
+    def test_join_and_hangup_share_connection(self, upstream, test_constants):
+        """Test that send_agent_to_channel and hangup_agent reuse one connection"""
+        pool = ConnectionPool()
+        transport = PooledTransport(pool)
+        constants = dict(test_constants, AGENT_API_BASE_URL=upstream.base_url)
+        payload = {"name": "test", "properties": {"advanced_features": {"enable_rtm": True, "enable_bhvs": True}}}
+
+        join = send_agent_to_channel("test", payload, constants, transport=transport)
+        leave = hangup_agent("agent_123", constants, transport=transport)
+
+        assert join["success"] is True
+        assert json.loads(join["response"])["agent_id"] == "agent_123"
+        assert leave["success"] is True
+        assert upstream.requests[0]["path"].endswith("/join")
+        assert upstream.requests[1]["path"].endswith("/agents/agent_123/leave")
+        assert pool.stats["created"] == 1
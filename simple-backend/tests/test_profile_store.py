@@ -0,0 +1,207 @@
+"""Tests for core.profile_store module"""
+
+import json
+import sqlite3
+import pytest
+from core.config import ProfileRegistry, get_constants, reload_profiles
+from core.profile_store import open_profile_store
+
+
+ENV = {"APP_ID": "base_app", "TTS_VENDOR": "openai", "IDLE_TIMEOUT": "60"}
+
+
+def write_json(tmp_path, document):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps(document))
+    return str(path)
+
+
+def write_sqlite(tmp_path, profiles, collation=" COLLATE NOCASE"):
+    path = tmp_path / "profiles.db"
+    db = sqlite3.connect(path)
+    db.execute(f"CREATE TABLE profiles (name TEXT PRIMARY KEY{collation}, settings TEXT)")
+    db.executemany("INSERT INTO profiles VALUES (?, ?)",
+                   [(name, json.dumps(settings)) for name, settings in profiles.items()])
+    db.commit()
+    db.close()
+    return str(path)
+
+
+@pytest.mark.unit
+class TestProfileStoreFormats:
+    """Tests for loading profiles from JSON, TOML and SQLite"""
+
+    def test_json_store(self, tmp_path):
+        """Test that a JSON store compiles profiles with env fallback"""
+        store = open_profile_store(write_json(tmp_path, {"profiles": {"acme": {"tts_vendor": "rime"}}}))
+
+        config = store.get("ACME", ENV)
+
+        assert config.profile == "ACME"
+        assert config["TTS_VENDOR"] == "rime"
+        assert config["APP_ID"] == "base_app"
+        assert store.get("OTHER", ENV) is None
+
+    def test_toml_store(self, tmp_path):
+        """Test that a TOML store with top-level tables is supported"""
+        pytest.importorskip("tomllib")
+        path = tmp_path / "profiles.toml"
+        path.write_text('[acme]\nIDLE_TIMEOUT = 300\nAVATAR_ENABLED = true\n')
+
+        config = open_profile_store(str(path)).get("ACME", ENV)
+
+        assert config["IDLE_TIMEOUT"] == "300"
+        assert config.idle_timeout == 300
+        assert config.avatar_enabled is True
+
+    def test_sqlite_store(self, tmp_path):
+        """Test that an SQLite store looks profiles up by name"""
+        store = open_profile_store(write_sqlite(tmp_path, {"acme": {"TTS_VENDOR": "cartesia"}}))
+
+        assert store.get("ACME", ENV)["TTS_VENDOR"] == "cartesia"
+        assert store.get("MISSING", ENV) is None
+        assert store.names() == ["ACME"]
+
+    def test_sqlite_lookup_uses_primary_key(self, tmp_path):
+        """Test that lookups search the primary-key index instead of scanning"""
+        store = open_profile_store(write_sqlite(tmp_path, {"acme": {}}))
+
+        plan = store._db.execute("EXPLAIN QUERY PLAN SELECT settings FROM profiles WHERE name = ?",
+                                 ("ACME",)).fetchall()
+
+        assert "SEARCH" in plan[0][-1]
+        assert "SCAN" not in plan[0][-1]
+
+    def test_sqlite_uppercase_names_without_nocase(self, tmp_path):
+        """Test a table without COLLATE NOCASE holding uppercase names"""
+        store = open_profile_store(write_sqlite(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}}, collation=""))
+
+        assert store.get("ACME", ENV)["TTS_VENDOR"] == "rime"
+
+    def test_unsupported_format(self, tmp_path):
+        """Test that unknown extensions are rejected"""
+        with pytest.raises(ValueError):
+            open_profile_store(str(tmp_path / "profiles.yaml"))
+
+    def test_invalid_document(self, tmp_path):
+        """Test that profiles must be objects"""
+        with pytest.raises(ValueError):
+            open_profile_store(write_json(tmp_path, {"profiles": {"acme": "rime"}}))
+
+
+@pytest.mark.unit
+class TestProfileStoreCache:
+    """Tests for lazy loading and the LRU of compiled profiles"""
+
+    def test_profiles_compiled_once(self, tmp_path):
+        """Test that repeated lookups return the same compiled config"""
+        store = open_profile_store(write_json(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}}))
+
+        first = store.get("ACME", ENV)
+        second = store.get("ACME", ENV)
+
+        assert first is second
+        assert store.stats()["misses"] == 1
+        assert store.stats()["hits"] == 1
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used profile is evicted"""
+        profiles = {f"T{i}": {"TTS_VENDOR": "rime"} for i in range(3)}
+        store = open_profile_store(write_json(tmp_path, profiles), cache_size=2)
+
+        t0 = store.get("T0", ENV)
+        store.get("T1", ENV)
+        store.get("T0", ENV)
+        store.get("T2", ENV)
+
+        assert store.stats()["cached"] == 2
+        assert store.get("T0", ENV) is t0
+        assert store.get("T1", ENV) is not None
+        assert store.stats()["misses"] == 4
+
+    def test_unknown_names_cached(self, tmp_path):
+        """Test that misses are cached so the backing file is not re-queried"""
+        store = open_profile_store(write_sqlite(tmp_path, {}))
+        calls = []
+        original = store.load
+        store.load = lambda name: calls.append(name) or original(name)
+
+        store.get("NOPE", ENV)
+        store.get("NOPE", ENV)
+
+        assert calls == ["NOPE"]
+
+    def test_unknown_names_do_not_evict_profiles(self, tmp_path, monkeypatch):
+        """Test that misses live in their own bounded LRU"""
+        monkeypatch.setattr("core.profile_store.MISSING_CACHE_SIZE", 2)
+        store = open_profile_store(write_json(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}}), cache_size=1)
+        acme = store.get("ACME", ENV)
+
+        for i in range(5):
+            assert store.get(f"NOPE{i}", ENV) is None
+
+        assert store.stats()["cached"] == 1
+        assert store.stats()["cached_missing"] == 2
+        assert store.get("ACME", ENV) is acme
+
+
+@pytest.mark.unit
+class TestRegistryWithStore:
+    """Tests for ProfileRegistry lookups through a profile store"""
+
+    def test_store_value_then_profile_env_then_env(self, tmp_path):
+        """Test the resolution order for store-backed profiles"""
+        path = write_json(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}})
+        environ = dict(ENV, PROFILE_STORE=path, ACME_TTS_VENDOR="elevenlabs", ACME_IDLE_TIMEOUT="90")
+
+        config = ProfileRegistry(environ).get("acme")
+
+        assert config["TTS_VENDOR"] == "rime"
+        assert config["IDLE_TIMEOUT"] == "90"
+        assert config["APP_ID"] == "base_app"
+
+    def test_unknown_profile_falls_back(self, tmp_path):
+        """Test that profiles outside the store use env profiles or the base"""
+        path = write_json(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}})
+        registry = ProfileRegistry(dict(ENV, PROFILE_STORE=path, AVATAR_TTS_VENDOR="cartesia"))
+
+        assert registry.get("avatar")["TTS_VENDOR"] == "cartesia"
+        assert registry.get("nobody") is registry.base
+
+    def test_get_constants_uses_store(self, tmp_path, monkeypatch):
+        """Test that get_constants resolves store profiles after a reload"""
+        path = write_json(tmp_path, {"ACME": {"DEFAULT_GREETING": "hello acme"}})
+        monkeypatch.setenv("PROFILE_STORE", path)
+
+        reload_profiles()
+
+        assert get_constants("acme")["DEFAULT_GREETING"] == "hello acme"
+
+    def test_reload_reopens_store(self, tmp_path):
+        """Test that a reload picks up edits to the store file"""
+        path = write_json(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}})
+        reload_profiles(dict(ENV, PROFILE_STORE=path))
+        assert get_constants("acme")["TTS_VENDOR"] == "rime"
+
+        write_json(tmp_path, {"ACME": {"TTS_VENDOR": "cartesia"}})
+        reload_profiles(dict(ENV, PROFILE_STORE=path))
+
+        assert get_constants("acme")["TTS_VENDOR"] == "cartesia"
+
+    def test_reload_closes_replaced_store(self, tmp_path):
+        """Test that a replaced SQLite store is closed by the following reload"""
+        import sqlite3 as sqlite
+        from core.config import get_registry
+        environ = dict(ENV, PROFILE_STORE=write_sqlite(tmp_path, {"ACME": {"TTS_VENDOR": "rime"}}))
+        reload_profiles(environ)
+        first = get_registry().store
+        first.get("ACME", ENV)
+
+        reload_profiles(environ)
+        assert first.load("ACME") is not None  # still usable right after the swap
+        reload_profiles(environ)
+
+        with pytest.raises(sqlite.ProgrammingError):
+            first.load("ACME")
+        assert first.stats()["cached"] == 0
+        assert get_constants("acme")["TTS_VENDOR"] == "rime"
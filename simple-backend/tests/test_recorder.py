@@ -0,0 +1,153 @@
+"""Tests for core.recorder module"""
+
+import json
+import os
+import pytest
+from core.agent import send_agent_to_channel
+from core.recorder import MAX_RESPONSE_CHARS, RecordFlusher, RequestRecorder
+from core.transport import FakeTransport
+
+
+BODY = json.dumps({"name": "room", "properties": {"llm": {"api_key": "sk-secret", "greeting_message": "it's me"}}})
+PAYLOAD = {"name": "room", "properties": {"advanced_features": {"enable_rtm": True, "enable_bhvs": True}}}
+HEADERS = {"Authorization": "Basic creds", "Content-Type": "application/json"}
+
+
+@pytest.mark.unit
+class TestRequestRecorder:
+    """Tests for the ring buffer"""
+
+    def test_ring_buffer_drops_oldest(self):
+        """Test that only the newest capacity entries are kept"""
+        recorder = RequestRecorder(capacity=3)
+        for i in range(5):
+            recorder.record("POST", f"https://x/{i}", HEADERS, BODY)
+
+        page = recorder.page()
+
+        assert [entry["id"] for entry in page["requests"]] == [5, 4, 3]
+        assert recorder.get(1) is None
+        assert recorder.get(4).url == "https://x/3"
+
+    def test_entries_redacted_on_read(self):
+        """Test that headers and body secrets are redacted in output"""
+        recorder = RequestRecorder()
+        recorder.record("POST", "https://x/join", HEADERS, BODY, channel="room", status=200, response="{}")
+
+        entry, = recorder.page()["requests"]
+
+        assert entry["headers"]["Authorization"] == "[redacted]"
+        assert entry["body"]["properties"]["llm"]["api_key"] == "[redacted]"
+        assert "sk-secret" not in json.dumps(entry)
+
+    def test_response_truncated(self):
+        """Test that large response bodies are cut down when recorded"""
+        entry = RequestRecorder().record("POST", "u", {}, "", response="x" * (MAX_RESPONSE_CHARS * 2))
+
+        assert len(entry.response) == MAX_RESPONSE_CHARS
+
+    def test_curl_rendering_quotes_payload(self, tmp_path):
+        """Test that single quotes in the payload are shell-escaped"""
+        entry = RequestRecorder().record("POST", "https://x/join", HEADERS, BODY, channel="room")
+
+        script = entry.to_curl()
+
+        assert "it'\\''s me" in script
+        assert "sk-secret" not in script
+        assert "Basic creds" not in script
+        assert "# Channel: room" in script
+
+
+@pytest.mark.unit
+class TestRecordFlusher:
+    """Tests for flushing entries to rotating files"""
+
+    def test_flush_writes_new_entries_once(self, tmp_path):
+        """Test that each entry is written exactly once as a redacted JSON line"""
+        recorder = RequestRecorder()
+        flusher = RecordFlusher(recorder, str(tmp_path))
+        recorder.record("POST", "u1", HEADERS, BODY)
+        recorder.record("POST", "u2", HEADERS, BODY)
+
+        assert flusher.flush() == 2
+        assert flusher.flush() == 0
+        recorder.record("POST", "u3", HEADERS, BODY)
+        flusher.stop()
+
+        lines = (tmp_path / "requests.jsonl").read_text().splitlines()
+        assert [json.loads(line)["url"] for line in lines] == ["u1", "u2", "u3"]
+        assert "sk-secret" not in "".join(lines)
+
+    def test_rotation(self, tmp_path):
+        """Test that the file rotates once it exceeds max_bytes"""
+        recorder = RequestRecorder()
+        flusher = RecordFlusher(recorder, str(tmp_path), max_bytes=500, backups=2)
+        for i in range(10):
+            recorder.record("POST", f"u{i}", HEADERS, BODY)
+        flusher.stop()
+
+        assert os.path.exists(tmp_path / "requests.jsonl.1")
+        assert not os.path.exists(tmp_path / "requests.jsonl.3")
+
+
+@pytest.mark.unit
+class TestAgentRecording:
+    """Tests that agent calls are recorded when ENABLE_CURL_DUMP is on"""
+
+    def test_records_join(self, test_constants, request_recorder):
+        """Test that a join is recorded with status and duration"""
+        constants = dict(test_constants, ENABLE_CURL_DUMP="true")
+
+        send_agent_to_channel("room", PAYLOAD, constants, transport=FakeTransport())
+
+        entry, = request_recorder.page()["requests"]
+        assert entry["channel"] == "room"
+        assert entry["status"] == 200
+        assert entry["duration_ms"] >= 0
+
+    def test_records_transport_errors(self, test_constants, request_recorder):
+        """Test that a failed request is recorded with its error and re-raised"""
+        constants = dict(test_constants, ENABLE_CURL_DUMP="true", AGENT_RETRY_ATTEMPTS="1")
+
+        def fail(*args):
+            raise ConnectionRefusedError("refused")
+
+        with pytest.raises(ConnectionRefusedError):
+            send_agent_to_channel("room", PAYLOAD, constants, transport=FakeTransport(handler=fail))
+
+        entry, = request_recorder.page()["requests"]
+        assert entry["error"] == "ConnectionRefusedError: refused"
+        assert entry["status"] is None
+
+    def test_disabled_by_default(self, test_constants, request_recorder):
+        """Test that nothing is recorded without ENABLE_CURL_DUMP"""
+        send_agent_to_channel("room", PAYLOAD, test_constants, transport=FakeTransport())
+
+        assert request_recorder.page()["requests"] == []
+
+
+@pytest.mark.integration
+class TestLambdaDebugRequests:
+    """Tests for the direct-invoke debug-requests action"""
+
+    def test_page_limit_clamped(self, test_constants, request_recorder):
+        """Test that limit is clamped to 1..500 as on the Flask route"""
+        from lambda_handler import lambda_handler
+        constants = dict(test_constants, ENABLE_CURL_DUMP="true")
+        for _ in range(2):
+            send_agent_to_channel("room", PAYLOAD, constants, transport=FakeTransport())
+
+        response = lambda_handler({"action": "debug-requests", "limit": "0"}, None)
+
+        assert response["statusCode"] == 200
+        assert len(json.loads(response["body"])["requests"]) == 1
+
+    @pytest.mark.parametrize("event", [{"limit": "many"}, {"limit": None}, {"before": "latest"}, {"before": []}])
+    def test_invalid_parameters(self, request_recorder, event):
+        """Test that non-integer limit or before is a 400"""
+        from lambda_handler import lambda_handler
+
+        response = lambda_handler(dict(event, action="debug-requests"), None)
+
+        assert response["statusCode"] == 400
+        assert json.loads(response["body"]) == {"error": "'limit' and 'before' must be integers"}
@@ -0,0 +1,287 @@
+"""Tests for core.retry module and retried agent calls"""
+
+import asyncio
+import email.utils
+import json
+import time
+import pytest
+from core.agent import hangup_agent, send_agent_to_channel, send_agent_to_channel_async
+from core.pool import ConnectionPool, PoolResponse
+from core.retry import RetryExhausted, RetryPolicy, parse_retry_after
+from core.transport import AsyncioTransport, PooledTransport
+
+
+PAYLOAD = {"name": "room", "properties": {"advanced_features": {"enable_rtm": True, "enable_bhvs": True}}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_policy(**kwargs):
+    policy = RetryPolicy(**kwargs)
+    clock = FakeClock()
+    policy.clock = clock
+    policy.sleep = clock.sleep
+    policy.random = lambda: 1.0
+    return policy, clock
+
+
+def responses(*statuses, headers=None):
+    """Attempt function returning the given statuses in order"""
+    queue = list(statuses)
+    timeouts = []
+
+    def attempt(timeout):
+        timeouts.append(timeout)
+        status = queue.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return PoolResponse(status, headers or {}, b"{}")
+    attempt.timeouts = timeouts
+    return attempt
+
+
+@pytest.mark.unit
+class TestRetryPolicy:
+    """Tests for backoff, classification and budgets"""
+
+    def test_retries_transient_status_then_succeeds(self):
+        """Test that 503 is retried with exponential backoff"""
+        policy, clock = make_policy(base_delay=0.1)
+
+        response, attempts = policy.run(responses(503, 502, 200))
+
+        assert (response.status, attempts) == (200, 3)
+        assert clock.sleeps == [0.1, 0.2]
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test full-jitter backoff bounded by max_delay"""
+        policy = RetryPolicy(base_delay=1, max_delay=3)
+        policy.random = lambda: 0.5
+
+        assert [policy.backoff(n) for n in (1, 2, 3, 4)] == [0.5, 1.0, 1.5, 1.5]
+
+    def test_permanent_status_not_retried(self):
+        """Test that 4xx responses are returned immediately"""
+        policy, clock = make_policy()
+
+        response, attempts = policy.run(responses(400))
+
+        assert (response.status, attempts) == (400, 1)
+        assert clock.sleeps == []
+
+    def test_retryable_exception_then_success(self):
+        """Test that resets and timeouts are retried"""
+        policy, _ = make_policy()
+
+        response, attempts = policy.run(responses(ConnectionResetError(), TimeoutError(), 200))
+
+        assert (response.status, attempts) == (200, 3)
+
+    def test_non_retryable_exception_raised(self):
+        """Test that programming errors are not retried"""
+        policy, _ = make_policy()
+        attempt = responses(ValueError("bad"), 200)
+
+        with pytest.raises(ValueError):
+            policy.run(attempt)
+        assert len(attempt.timeouts) == 1
+
+    def test_last_exception_raised_when_exhausted(self):
+        """Test that the final exception propagates after max_attempts"""
+        policy, _ = make_policy(max_attempts=2)
+
+        with pytest.raises(ConnectionRefusedError):
+            policy.run(responses(ConnectionRefusedError(), ConnectionRefusedError()))
+
+    def test_last_response_returned_when_exhausted(self):
+        """Test that the final transient response is returned after max_attempts"""
+        policy, _ = make_policy(max_attempts=2)
+
+        response, attempts = policy.run(responses(503, 503))
+
+        assert (response.status, attempts) == (503, 2)
+
+    def test_retry_after_seconds(self):
+        """Test that Retry-After overrides the computed backoff"""
+        policy, clock = make_policy()
+
+        policy.run(responses(429, 200, headers={"retry-after": "2"}))
+
+        assert clock.sleeps == [2.0]
+
+    def test_retry_after_beyond_deadline_stops(self):
+        """Test that a Retry-After longer than the budget ends retries"""
+        policy, clock = make_policy(deadline=5)
+
+        response, attempts = policy.run(responses(503, 200, headers={"Retry-After": "10"}))
+
+        assert (response.status, attempts) == (503, 1)
+        assert clock.sleeps == []
+
+    def test_attempt_timeout_limited_by_deadline(self):
+        """Test that each attempt only gets the remaining budget"""
+        policy, clock = make_policy(attempt_timeout=10, deadline=12, base_delay=1)
+
+        def attempt(timeout):
+            attempt.timeouts.append(timeout)
+            clock.now += timeout
+            raise TimeoutError()
+        attempt.timeouts = []
+
+        with pytest.raises(TimeoutError):
+            policy.run(attempt)
+
+        assert attempt.timeouts == [10, 1]
+
+    def test_deadline_exhausted_before_start(self):
+        """Test that a zero budget raises RetryExhausted"""
+        policy, _ = make_policy(deadline=0)
+
+        with pytest.raises(RetryExhausted):
+            policy.run(responses(200))
+
+    def test_async_run(self):
+        """Test the async runner with the same policy"""
+        policy, _ = make_policy()
+        slept = []
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+        policy.sleep_async = fake_sleep
+        queue = [503, 200]
+
+        async def attempt(timeout):
+            return PoolResponse(queue.pop(0), {}, b"{}")
+
+        response, attempts = asyncio.run(policy.run_async(attempt))
+
+        assert (response.status, attempts) == (200, 2)
+        assert slept == [0.25]
+
+    def test_parse_retry_after(self):
+        """Test delta-seconds, HTTP-date and invalid values"""
+        now = time.time()
+        date = email.utils.formatdate(now + 30, usegmt=True)
+
+        assert parse_retry_after("7") == 7.0
+        assert 28 <= parse_retry_after(date, now=now) <= 31
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+
+@pytest.mark.unit
+class TestRetriedAgentCalls:
+    """Tests for retried join/leave against the fault-injecting stand-in"""
+
+    def constants(self, test_constants, upstream, **overrides):
+        return dict(test_constants, AGENT_API_BASE_URL=upstream.base_url, **overrides)
+
+    def test_join_retries_5xx(self, upstream, test_constants, no_jitter):
+        """Test that a 503 join is retried and succeeds"""
+        upstream.script(503, {"reason": "unavailable"})
+
+        result = send_agent_to_channel("room", PAYLOAD, self.constants(test_constants, upstream),
+                                       transport=PooledTransport(ConnectionPool()))
+
+        assert result["success"] is True
+        assert result["attempts"] == 2
+        assert len(upstream.requests) == 2
+
+    def test_join_retries_connection_reset(self, upstream, test_constants, no_jitter):
+        """Test that a reset on a fresh connection is retried"""
+        upstream.script_reset()
+
+        result = send_agent_to_channel("room", PAYLOAD, self.constants(test_constants, upstream),
+                                       transport=PooledTransport(ConnectionPool()))
+
+        assert result["success"] is True
+        assert result["attempts"] == 2
+
+    def test_timed_out_join_recovers_existing_agent(self, upstream, test_constants, no_jitter):
+        """Test that a retried join that conflicts returns the agent the first attempt created"""
+        upstream.script(200, {"agent_id": "first"}, delay=0.6)
+        upstream.script(409, {"reason": "TaskConflict"})
+        upstream.script(200, {"data": {"count": 1, "list": [
+            {"agent_id": "first", "channel": "room", "status": "RUNNING", "start_ts": 1}]}})
+        constants = self.constants(test_constants, upstream, AGENT_RETRY_TIMEOUT="0.3")
+
+        result = send_agent_to_channel("room", PAYLOAD, constants, transport=PooledTransport(ConnectionPool()))
+
+        assert result["success"] is True
+        assert result["recovered_existing_agent"] is True
+        assert json.loads(result["response"])["agent_id"] == "first"
+        list_request = upstream.requests[-1]
+        assert list_request["method"] == "GET"
+        assert "/agents?channel=room&state=2" in list_request["path"]
+
+    def test_first_attempt_conflict_not_recovered(self, upstream, test_constants, no_jitter):
+        """Test that a 409 on the first attempt is a genuine conflict"""
+        upstream.script(409, {"reason": "TaskConflict"})
+
+        result = send_agent_to_channel("room", PAYLOAD, self.constants(test_constants, upstream),
+                                       transport=PooledTransport(ConnectionPool()))
+
+        assert result["success"] is False
+        assert result["status_code"] == 409
+        assert len(upstream.requests) == 1
+
+    def test_join_gives_up_after_max_attempts(self, upstream, test_constants, no_jitter):
+        """Test that persistent 5xx responses are returned after the last attempt"""
+        for _ in range(3):
+            upstream.script(502)
+
+        result = send_agent_to_channel("room", PAYLOAD, self.constants(test_constants, upstream),
+                                       transport=PooledTransport(ConnectionPool()))
+
+        assert result["status_code"] == 502
+        assert result["attempts"] == 3
+
+    def test_retries_disabled(self, upstream, test_constants, no_jitter):
+        """Test that AGENT_RETRY_ATTEMPTS=1 makes a single attempt"""
+        upstream.script(503)
+
+        result = send_agent_to_channel("room", PAYLOAD, self.constants(test_constants, upstream,
+                                                                       AGENT_RETRY_ATTEMPTS="1"),
+                                       transport=PooledTransport(ConnectionPool()))
+
+        assert result["status_code"] == 503
+        assert "attempts" not in result
+
+    def test_retried_hangup_treats_404_as_stopped(self, upstream, test_constants, no_jitter):
+        """Test that a 404 after a retried leave means the agent is already gone"""
+        upstream.script(504)
+        upstream.script(404, {"reason": "TaskNotFound"})
+
+        result = hangup_agent("agent_123", self.constants(test_constants, upstream),
+                              transport=PooledTransport(ConnectionPool()))
+
+        assert result["success"] is True
+        assert result["already_stopped"] is True
+
+    def test_async_join_retries(self, upstream, test_constants, no_jitter):
+        """Test that the async path retries through AsyncioTransport"""
+        upstream.script(502)
+
+        async def run():
+            transport = AsyncioTransport()
+            try:
+                return await send_agent_to_channel_async(
+                    "room", PAYLOAD, self.constants(test_constants, upstream), transport=transport)
+            finally:
+                await transport.close()
+
+        result = asyncio.run(run())
+
+        assert result["success"] is True
+        assert result["attempts"] == 2
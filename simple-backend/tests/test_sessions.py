@@ -0,0 +1,197 @@
+"""Tests for core.sessions module and channel-based agent operations"""
+
+import json
+import pytest
+from core.agent import hangup_agent, hangup_channel, send_agent_to_channel
+from core.bulk import hangup_agents, validate_bulk_hangup
+from core.sessions import SessionRegistry, get_sessions
+from core.transport import FakeTransport
+
+
+PAYLOAD = {"name": "room", "properties": {"idle_timeout": 120,
+                                          "advanced_features": {"enable_rtm": True, "enable_bhvs": True}}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_registry(**kwargs):
+    registry = SessionRegistry(**kwargs)
+    clock = FakeClock()
+    registry.clock = clock
+    return registry, clock
+
+
+def agora(method, url, body, headers):
+    """Join returns an agent id derived from the agent name; leave succeeds"""
+    if url.endswith("/join"):
+        name = json.loads(body)["name"]
+        return 200, json.dumps({"agent_id": f"agent-{name}", "status": "RUNNING"})
+    if "/agents?" in url:
+        return 200, json.dumps({"data": {"count": 1, "list": [
+            {"agent_id": "agent-remote", "channel": "remote", "status": "RUNNING", "start_ts": 1}]}})
+    return 200, "{}"
+
+
+@pytest.mark.unit
+class TestSessionRegistry:
+    """Tests for indexes, expiry and eviction"""
+
+    def test_lookup_by_channel_agent_and_profile(self):
+        """Test the three indexes"""
+        registry, _ = make_registry()
+        registry.add("a1", "room-1", "SALES", 60)
+        registry.add("a2", "room-2", "SALES", 60)
+        registry.add("a3", "room-3", None, 60)
+
+        assert registry.for_channel("room-2").agent_id == "a2"
+        assert registry.get("a1").channel == "room-1"
+        assert [s.agent_id for s in registry.for_profile("SALES")] == ["a1", "a2"]
+        assert [s.agent_id for s in registry.for_profile(None)] == ["a3"]
+
+    def test_new_agent_replaces_channel(self):
+        """Test that a second join on a channel replaces the old session"""
+        registry, _ = make_registry()
+        registry.add("old", "room", None, 60)
+        registry.add("new", "room", None, 60)
+
+        assert registry.for_channel("room").agent_id == "new"
+        assert registry.get("old") is None
+        assert registry.stats()["size"] == 1
+
+    def test_expires_after_idle_timeout(self):
+        """Test that sessions disappear from every index after idle_timeout"""
+        registry, clock = make_registry()
+        registry.add("short", "a", "SALES", 30)
+        registry.add("long", "b", "SALES", 120)
+        registry.add("forever", "c", "SALES", 0)
+
+        clock.now += 31
+
+        assert registry.for_channel("a") is None
+        assert [s.agent_id for s in registry.for_profile("SALES")] == ["long", "forever"]
+        assert registry.stats()["expired"] == 1
+
+    def test_reregistered_session_keeps_new_expiry(self):
+        """Test that a stale expiry entry does not drop a re-registered session"""
+        registry, clock = make_registry()
+        registry.add("a1", "room", None, 30)
+        clock.now += 20
+        registry.add("a1", "room", None, 30)
+        clock.now += 20
+
+        assert registry.get("a1") is not None
+
+    def test_evicts_oldest_at_capacity(self):
+        """Test the size cap"""
+        registry, _ = make_registry(max_size=2)
+        for i in range(3):
+            registry.add(f"a{i}", f"room-{i}", None, 60)
+
+        assert registry.get("a0") is None
+        assert registry.for_channel("room-0") is None
+        assert registry.stats()["evicted"] == 1
+
+    def test_remove(self):
+        """Test that remove clears every index"""
+        registry, _ = make_registry()
+        registry.add("a1", "room", "SALES", 60)
+
+        assert registry.remove("a1").channel == "room"
+        assert registry.remove("a1") is None
+        assert registry.for_channel("room") is None
+        assert registry.for_profile("SALES") == []
+
+
+@pytest.mark.unit
+class TestChannelOperations:
+    """Tests for registration on join and hangup by channel"""
+
+    def test_join_registers_session(self, test_constants):
+        """Test that a successful join is registered with the payload idle_timeout"""
+        send_agent_to_channel("room", PAYLOAD, test_constants, transport=FakeTransport(handler=agora))
+
+        session = get_sessions().for_channel("room")
+        assert session.agent_id == "agent-room"
+        assert session.expires_at == pytest.approx(session.started + 120)
+
+    def test_failed_join_not_registered(self, test_constants):
+        """Test that failed joins leave the registry alone"""
+        transport = FakeTransport()
+        transport.script(400, '{"reason": "InvalidRequest"}')
+
+        send_agent_to_channel("room", PAYLOAD, test_constants, transport=transport)
+
+        assert get_sessions().for_channel("room") is None
+
+    def test_hangup_removes_session(self, test_constants):
+        """Test that a hangup by agent id forgets the session"""
+        transport = FakeTransport(handler=agora)
+        send_agent_to_channel("room", PAYLOAD, test_constants, transport=transport)
+
+        hangup_agent("agent-room", test_constants, transport=transport)
+
+        assert get_sessions().for_channel("room") is None
+
+    def test_hangup_channel_uses_registry(self, test_constants):
+        """Test hangup by channel without a list call"""
+        transport = FakeTransport(handler=agora)
+        send_agent_to_channel("room", PAYLOAD, test_constants, transport=transport)
+
+        result = hangup_channel("room", test_constants, transport=transport)
+
+        assert result["success"] is True
+        assert result["agent_id"] == "agent-room"
+        assert transport.requests[-1]["url"].endswith("/agents/agent-room/leave")
+        assert not any("/agents?" in r["url"] for r in transport.requests)
+
+    def test_hangup_channel_falls_back_to_list(self, test_constants):
+        """Test that an agent started elsewhere is found by listing the channel"""
+        transport = FakeTransport(handler=agora)
+
+        result = hangup_channel("remote", test_constants, transport=transport)
+
+        assert result["agent_id"] == "agent-remote"
+        assert "/agents?channel=remote&state=2" in transport.requests[0]["url"]
+
+    def test_hangup_channel_not_found(self, test_constants):
+        """Test a 404 result when no agent runs on the channel"""
+        transport = FakeTransport()
+        transport.script(200, '{"data": {"count": 0, "list": []}}')
+
+        result = hangup_channel("empty", test_constants, transport=transport)
+
+        assert result["status_code"] == 404
+        assert result["success"] is False
+
+
+@pytest.mark.unit
+class TestBulkHangup:
+    """Tests for hanging up many channels"""
+
+    def test_hangup_by_profile(self, agent_env):
+        """Test that without channels every agent of the profile is hung up"""
+        from core.config import get_constants
+        transport = FakeTransport(handler=agora)
+        for channel in ("a", "b"):
+            send_agent_to_channel(channel, dict(PAYLOAD, name=channel), get_constants(), transport=transport)
+
+        result = hangup_agents(profile=None, transport=transport)
+
+        assert result["summary"]["succeeded"] == 2
+        assert sorted(r["agent_id"] for r in result["results"]) == ["agent-a", "agent-b"]
+        assert get_sessions().all() == []
+
+    def test_validation(self):
+        """Test bulk hangup body validation"""
+        assert validate_bulk_hangup({"channels": ["a"]}) is None
+        assert validate_bulk_hangup({"profile": "sales"}) is None
+        assert "channels" in validate_bulk_hangup({})
+        assert validate_bulk_hangup({"channels": []})
+        assert validate_bulk_hangup({"channels": [""]})
+        assert validate_bulk_hangup({"channels": ["a"], "concurrency": 0})
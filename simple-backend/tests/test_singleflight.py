@@ -0,0 +1,203 @@
+"""Tests for core.singleflight module and coalesced agent starts"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from core.agent import send_agent_to_channel_once
+from core.singleflight import SingleFlight
+from core.transport import FakeTransport
+
+
+PAYLOAD = {"name": "room", "properties": {"advanced_features": {"enable_rtm": True, "enable_bhvs": True}}}
+
+
+def run_concurrently(count, fn):
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(fn) for _ in range(count)]
+        return [future.result() for future in futures]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """Tests for coalescing by key"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test that callers arriving while a call is in flight get its result"""
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(2)
+            return "joined"
+
+        leader = threading.Thread(target=flights.do, args=("room", work))
+        leader.start()
+        wait_for(lambda: flights.in_flight() == 1)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            followers = [executor.submit(flights.do, "room", work) for _ in range(3)]
+            wait_for(lambda: flights.stats()["shared"] == 3)
+            release.set()
+            results = [future.result() for future in followers]
+        leader.join()
+
+        assert calls == [1]
+        assert results == [("joined", True)] * 3
+        assert flights.stats() == {"executed": 1, "shared": 3, "in_flight": 0}
+
+    def test_errors_reach_every_caller(self):
+        """Test that the leader's exception is raised in waiters too"""
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(2)
+            raise ValueError("bad config")
+
+        errors = []
+
+        def call():
+            try:
+                flights.do("room", fail)
+            except ValueError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        wait_for(lambda: flights.stats()["shared"] == 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert errors == ["bad config"] * 3
+
+    def test_sequential_calls_run_again(self):
+        """Test that a finished call is not cached"""
+        flights = SingleFlight()
+
+        assert flights.do("room", lambda: 1) == (1, False)
+        assert flights.do("room", lambda: 2) == (2, False)
+
+    def test_keys_are_independent(self):
+        """Test that different keys do not wait for each other"""
+        flights = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=flights.do, args=("a", lambda: release.wait(2)))
+        leader.start()
+        wait_for(lambda: flights.in_flight() == 1)
+
+        assert flights.do("b", lambda: "b") == ("b", False)
+        release.set()
+        leader.join()
+
+
+@pytest.mark.unit
+class TestSingleFlightAsync:
+    """Tests for coalescing coroutines by key"""
+
+    def test_concurrent_coroutines_share_one_execution(self):
+        """Test that coroutines awaiting the same key get the leader's result"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "joined"
+
+        async def run():
+            return await asyncio.gather(*(flights.do_async("room", work) for _ in range(4)))
+
+        results = asyncio.run(run())
+
+        assert calls == [1]
+        assert sorted(results, key=lambda result: result[1]) == [("joined", False)] + [("joined", True)] * 3
+        assert flights.stats() == {"executed": 1, "shared": 3, "in_flight": 0}
+
+    def test_errors_reach_every_coroutine(self):
+        """Test that the leader's exception is raised in waiting coroutines too"""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad config")
+
+        async def run():
+            return await asyncio.gather(*(flights.do_async("room", fail) for _ in range(3)),
+                                        return_exceptions=True)
+
+        errors = asyncio.run(run())
+
+        assert [str(error) for error in errors] == ["bad config"] * 3
+        assert flights.in_flight() == 0
+
+
+    def test_cancelled_leader_does_not_cancel_waiters(self):
+        """Test that waiters still get the result when the leader is cancelled"""
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "joined"
+
+        async def run():
+            leader = asyncio.ensure_future(flights.do_async("room", work))
+            await asyncio.sleep(0)
+            waiters = [asyncio.ensure_future(flights.do_async("room", work)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            results = await asyncio.gather(*waiters)
+            return leader, results
+
+        leader, results = asyncio.run(run())
+
+        assert leader.cancelled()
+        assert results == [("joined", True), ("joined", True)]
+        assert calls == [1]
+        assert flights.in_flight() == 0
+
+
+@pytest.mark.unit
+class TestCoalescedStarts:
+    """Tests for single-flight agent starts"""
+
+    def test_duplicate_starts_make_one_join(self, test_constants):
+        """Test that concurrent starts for one channel send a single join"""
+        transport = FakeTransport(delay=0.2)
+
+        results = run_concurrently(4, lambda: send_agent_to_channel_once(
+            "room", PAYLOAD, test_constants, transport=transport))
+
+        assert len(transport.requests) == 1
+        assert all(result["success"] for result in results)
+        assert sum(1 for result in results if result.get("coalesced")) == 3
+
+    def test_different_channels_not_coalesced(self, test_constants):
+        """Test that starts for different channels each join"""
+        transport = FakeTransport(delay=0.05)
+        channels = iter(["a", "b", "c"])
+        lock = threading.Lock()
+
+        def start():
+            with lock:
+                channel = next(channels)
+            return send_agent_to_channel_once(channel, dict(PAYLOAD, name=channel), test_constants,
+                                              transport=transport)
+
+        results = run_concurrently(3, start)
+
+        assert len(transport.requests) == 3
+        assert not any(result.get("coalesced") for result in results)
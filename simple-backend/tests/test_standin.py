@@ -0,0 +1,174 @@
+"""Tests for tools/convoai_standin.py and the backend running against it"""
+
+import json
+import random
+import urllib.request
+import pytest
+from tools.convoai_standin import AgentStore, Faults, StandInServer, parse_latency, per_endpoint
+
+
+@pytest.fixture
+def standin():
+    """A stand-in server on a free port"""
+    server = StandInServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def standin_env(monkeypatch, agent_env, standin):
+    """Points the backend at the stand-in, with fast retries"""
+    monkeypatch.setenv("AGENT_API_BASE_URL", standin.base_url)
+    monkeypatch.setenv("AGENT_RETRY_ATTEMPTS", "2")
+    monkeypatch.setenv("AGENT_RETRY_DEADLINE", "5")
+    return standin
+
+
+def request(server, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}", data=data, method=method)
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+@pytest.mark.unit
+class TestFaultSettings:
+    """Tests for latency specs and fault decisions"""
+
+    @pytest.mark.parametrize("spec,low,high", [
+        ("0.25", 0.25, 0.25),
+        ("fixed:0.1", 0.1, 0.1),
+        ("uniform:0.1,0.2", 0.1, 0.2),
+        ("lognormal:0.2,0.5", 0.0, 100.0),
+        ("exponential:0.1", 0.0, 100.0),
+    ])
+    def test_latency_specs(self, spec, low, high):
+        """Test that each distribution samples within its range"""
+        sample = parse_latency(spec)
+        rng = random.Random(1)
+
+        assert all(low <= sample(rng) <= high for _ in range(100))
+
+    @pytest.mark.parametrize("spec", ["gamma:1,2", "uniform:0.1", "fixed:-1", "lognormal:0,1", "fixed:x"])
+    def test_invalid_latency_specs(self, spec):
+        """Test that malformed specs are rejected"""
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+    def test_per_endpoint_options(self):
+        """Test [ENDPOINT=]VALUE parsing"""
+        assert per_endpoint(["0.1", "join=0.5"]) == {"*": 0.1, "join": 0.5}
+        with pytest.raises(ValueError):
+            per_endpoint(["joins=0.5"])
+
+    def test_rates_per_endpoint(self):
+        """Test that endpoint rates override the default and add up"""
+        faults = Faults(rate_limit_rate={"join": 1.0}, error_rate={"*": 1.0}, seed=3)
+
+        assert faults.decide("join") == (0.0, "rate_limit")
+        assert faults.decide("leave") == (0.0, "error")
+        assert Faults(seed=3).decide("join") == (0.0, None)
+
+
+@pytest.mark.unit
+class TestAgentStore:
+    """Tests for agent state tracking"""
+
+    def join(self, store, name="room"):
+        return store.join("app", {"name": name, "properties": {"channel": name}})
+
+    def test_join_conflict_and_leave(self):
+        """Test that names are unique among running agents only"""
+        store = AgentStore()
+        status, body = self.join(store)
+
+        assert status == 200 and body["status"] == "RUNNING"
+        assert self.join(store)[0] == 409
+        assert store.leave("app", body["agent_id"]) == (200, {})
+        assert store.leave("app", body["agent_id"])[0] == 404
+        assert self.join(store)[0] == 200
+
+    def test_query_update_and_list(self):
+        """Test query, update and list filtering by channel and state"""
+        store = AgentStore()
+        _, first = self.join(store, "a")
+        _, second = self.join(store, "b")
+        store.leave("app", first["agent_id"])
+
+        assert store.update("app", second["agent_id"], {"properties": {"token": "new"}})[0] == 200
+        assert store.query("app", first["agent_id"])[1]["status"] == "STOPPED"
+        assert store.query("other-app", first["agent_id"])[0] == 404
+
+        _, running = store.list("app", state=2)
+        assert [a["agent_id"] for a in running["data"]["list"]] == [second["agent_id"]]
+        _, on_a = store.list("app", channel="a")
+        assert on_a["meta"]["total"] == 1
+
+    def test_list_pages(self):
+        """Test cursor paging, newest first"""
+        store = AgentStore()
+        ids = [self.join(store, f"c{i}")[1]["agent_id"] for i in range(5)]
+
+        _, page = store.list("app", limit=2)
+        _, rest = store.list("app", limit=10, cursor=page["meta"]["cursor"])
+
+        assert [a["agent_id"] for a in page["data"]["list"] + rest["data"]["list"]] == ids[::-1]
+        assert rest["meta"]["cursor"] == ""
+
+    def test_stopped_agents_are_bounded(self):
+        """Test that the oldest stopped agents are forgotten"""
+        store = AgentStore(max_stopped=2)
+        ids = [self.join(store, f"c{i}")[1]["agent_id"] for i in range(3)]
+        for agent_id in ids:
+            store.leave("app", agent_id)
+
+        assert store.stats() == {"running": 0, "stopped": 2}
+        assert store.query("app", ids[0])[0] == 404
+
+
+@pytest.mark.integration
+class TestBackendAgainstStandIn:
+    """Tests for the backend with AGENT_API_BASE_URL pointing at the stand-in"""
+
+    def test_start_status_and_hangup_by_channel(self, client, standin_env, monkeypatch):
+        """Test join, then a hangup by channel from a process without the session"""
+        response = client.get('/start-agent?channel=room')
+        agent_id = json.loads(response.get_json()["agent_response"]["response"])["agent_id"]
+
+        monkeypatch.setattr("core.sessions._registry", None)
+        hangup = client.get('/hangup-agent?channel=room').get_json()
+
+        assert hangup["agent_response"]["agent_id"] == agent_id
+        assert hangup["agent_response"]["success"] is True
+        assert request(standin_env, "GET", "/_standin/stats")["requests"] == {
+            "join:200": 1, "list:200": 1, "leave:200": 1}
+
+    def test_rate_limits_are_retried(self, client, standin_env):
+        """Test that a 429 with Retry-After is retried to success"""
+        request(standin_env, "POST", "/_standin/faults", {"rate_limit_rate": {"join": 1.0}, "retry_after": 0})
+        first = client.get('/start-agent?channel=busy').get_json()["agent_response"]
+
+        request(standin_env, "POST", "/_standin/faults", {})
+        second = client.get('/start-agent?channel=busy').get_json()["agent_response"]
+
+        assert first["status_code"] == 429 and first["attempts"] == 2
+        assert second["success"] is True
+        assert request(standin_env, "GET", "/_standin/stats")["requests"]["join:429"] == 2
+
+    def test_connection_reset_is_retried(self, client, standin_env, no_jitter):
+        """Test that a reset connection is retried on a new one"""
+        # Seed 1 resets the first join and lets the second through
+        standin_env.faults = Faults(reset_rate={"join": 0.5}, seed=1)
+
+        result = client.get('/start-agent?channel=reset').get_json()["agent_response"]
+
+        assert result["success"] is True and result["attempts"] == 2
+        assert standin_env.stats()["requests"] == {"join:reset": 1, "join:200": 1}
+
+    def test_missing_authorization(self, standin):
+        """Test that requests without an Authorization header are rejected"""
+        with pytest.raises(urllib.error.HTTPError) as e:
+            request(standin, "POST", "/api/conversational-ai-agent/v2/projects/app/join",
+                    {"name": "x", "properties": {"channel": "x"}})
+
+        assert e.value.code == 401
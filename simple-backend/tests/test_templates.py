@@ -0,0 +1,160 @@
+"""Tests for core.templates module"""
+
+import inspect
+import json
+import re
+import pytest
+import core.agent
+from core.agent import create_agent_payload, build_join_request
+from core.config import compile_profile
+from core.templates import (
+    PAYLOAD_PARAMS,
+    PayloadTemplate,
+    TemplateCache,
+    render_agent_payload,
+)
+
+
+BASE_ENV = {
+    "APP_ID": "a" * 32,
+    "AGENT_AUTH_HEADER": "Basic abc",
+    "LLM_API_KEY": "sk-test",
+    "TTS_VENDOR": "openai",
+    "TTS_KEY": "tts-key",
+    "TTS_VOICE_ID": "voice",
+    "RIME_API_KEY": "rime-key",
+    "DEEPGRAM_KEY": "dg-key",
+    "HEYGEN_API_KEY": "hg-key",
+    "ANAM_API_KEY": "anam-key",
+    "ANAM_AVATAR_ID": "anam-avatar",
+    "ANAM_BETA_APP_ID": "beta-app",
+}
+
+CHANNELS = ["test", "room-42", 'quote"and\\slash', "café ☃", "tab\tnewline\n", "</script>"]
+
+VARIANTS = [
+    {},
+    {"tts_vendor": "elevenlabs", "sample_rate": "16000"},
+    {"tts_vendor": "cartesia"},
+    {"tts_vendor": "rime", "asr_vendor": "deepgram"},
+    {"avatar_enabled": "true", "avatar_vendor": "heygen"},
+    {"avatar_enabled": "true", "avatar_vendor": "anam"},
+    {"prompt": "Say \"hi\" — politely", "idle_timeout": "30", "enable_aivad": "false"},
+]
+
+
+@pytest.fixture
+def config():
+    return compile_profile(None, BASE_ENV)
+
+
+@pytest.mark.unit
+class TestPayloadTemplate:
+    """Tests that rendered templates match the payload builder exactly"""
+
+    @pytest.mark.parametrize("overrides", VARIANTS)
+    @pytest.mark.parametrize("token", ["", "007eJxTYBAtoken+/="])
+    def test_matches_builder(self, config, overrides, token):
+        """Test byte-identical output for every vendor, avatar and channel"""
+        template = PayloadTemplate(config, overrides, bool(token))
+
+        for channel in CHANNELS:
+            expected = json.dumps(create_agent_payload(channel, config, overrides, token), indent=2)
+            assert template.render(channel, token).json == expected
+
+    def test_metadata(self, config):
+        """Test that avatar vendor, advanced features and idle timeout are exposed"""
+        rendered = PayloadTemplate(config, {"avatar_enabled": "true", "avatar_vendor": "anam"}, False).render("c")
+
+        assert rendered.avatar_vendor == "anam"
+        assert rendered.advanced_features["enable_rtm"] is True
+        assert rendered.idle_timeout == rendered.to_dict()["properties"]["idle_timeout"]
+        assert rendered.to_dict()["properties"]["channel"] == "c"
+
+    def test_invalid_config_raises(self, config):
+        """Test that builder errors surface when compiling"""
+        with pytest.raises(ValueError):
+            PayloadTemplate(config, {"tts_vendor": "nope"}, False)
+
+    def test_payload_params_cover_builder(self):
+        """Test that every query parameter the builders read is part of the cache key"""
+        source = inspect.getsource(core.agent)
+        read = set(re.findall(r"query_params\.get\('(\w+)'", source))
+        read |= set(re.findall(r"resolve_setting\(query_params, '(\w+)'", source))
+
+        assert read <= PAYLOAD_PARAMS
+
+
+@pytest.mark.unit
+class TestTemplateCache:
+    """Tests for the LRU of compiled templates"""
+
+    def test_reuses_template(self, config):
+        """Test that the same profile and overrides hit the cache"""
+        cache = TemplateCache()
+
+        first = cache.get(config, {"channel": "a", "tts_vendor": "rime"}, True)
+        second = cache.get(config, {"channel": "b", "tts_vendor": "rime", "debug": "1"}, True)
+
+        assert first is second
+        assert cache.stats()["hits"] == 1
+
+    def test_key_includes_overrides_and_token(self, config):
+        """Test that differing overrides or token presence compile separately"""
+        cache = TemplateCache()
+
+        cache.get(config, {}, True)
+        cache.get(config, {"tts_vendor": "rime"}, True)
+        cache.get(config, {}, False)
+
+        assert cache.stats()["misses"] == 3
+
+    def test_new_config_compiles_new_template(self):
+        """Test that a reloaded profile config is not served a stale template"""
+        cache = TemplateCache()
+        old = cache.get(compile_profile(None, BASE_ENV), {}, False)
+        new_config = compile_profile(None, dict(BASE_ENV, DEFAULT_GREETING="hello again"))
+
+        rendered = cache.get(new_config, {}, False).render("c")
+
+        assert cache.get(new_config, {}, False) is not old
+        assert rendered.to_dict()["properties"]["llm"]["greeting_message"] == "hello again"
+
+    def test_lru_eviction(self, config):
+        """Test that the cache never exceeds max_size"""
+        cache = TemplateCache(max_size=2)
+        for voice in ("a", "b", "c"):
+            cache.get(config, {"voice_id": voice}, False)
+
+        assert cache.stats()["size"] == 2
+
+    def test_plain_dicts_not_cached(self, test_constants):
+        """Test that mutable constants dictionaries are compiled every time"""
+        cache = TemplateCache()
+        cache.get(dict(test_constants, TTS_VENDOR="openai"), {}, False)
+
+        assert cache.stats()["size"] == 0
+
+
+@pytest.mark.unit
+class TestRenderedJoinRequest:
+    """Tests that the join request accepts rendered payloads"""
+
+    def test_join_body_identical(self, config):
+        """Test that a RenderedPayload and a dict produce the same request"""
+        overrides = {"avatar_enabled": "true", "avatar_vendor": "heygen"}
+        rendered = render_agent_payload("room", config, overrides, "tok")
+        payload = create_agent_payload("room", config, overrides, "tok")
+
+        assert build_join_request("room", rendered, config) == build_join_request("room", payload, config)
+
+    def test_anam_uses_beta_endpoint(self, config):
+        """Test that the Anam beta endpoint is chosen from rendered metadata"""
+        env = dict(BASE_ENV, ANAM_BETA_CREDENTIALS="user:pass")
+        config = compile_profile(None, env)
+        rendered = render_agent_payload("room", config, {"avatar_enabled": "true", "avatar_vendor": "anam"})
+
+        url, _, headers = build_join_request("room", rendered, config)
+
+        assert url.endswith("/beta-app/join")
+        assert headers["Authorization"].startswith("Basic ")
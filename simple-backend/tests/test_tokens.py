@@ -1,7 +1,23 @@
 """Tests for core.tokens module"""
 
+import threading
+import time
 import pytest
-from core.tokens import build_token_with_rtm, get_version
+from core.tokens import (
+    AccessToken,
+    SaltPool,
+    ServiceRtc,
+    ServiceRtm,
+    TokenCache,
+    TokenMinter,
+    build_token_cached,
+    build_token_with_rtm,
+    build_tokens_batch,
+    get_minter,
+    get_version,
+    mint_during,
+    validate_token_batch,
+)
 
 
 @pytest.mark.unit
@@ -56,3 +72,269 @@ class TestTokenGeneration:
         token2 = build_token_with_rtm(channel, "456", test_constants)
 
         assert token1["token"] != token2["token"]
+
+
+@pytest.mark.unit
+class TestBuildTokensBatch:
+    """Tests for build_tokens_batch function"""
+
+    def test_matches_single_builder(self, test_constants, monkeypatch):
+        """Test that batch tokens are byte-identical to build_token_with_rtm"""
+        monkeypatch.setattr("core.tokens.time.time", lambda: 1700000000)
+
+        class FixedSalts:
+            def next(self):
+                return 4242
+
+        monkeypatch.setattr("core.tokens._salt_pool", FixedSalts())
+        pairs = [("channel1", "101"), ("channel2", "102"), ("channel1", 7)]
+
+        batch = build_tokens_batch(pairs, test_constants)
+
+        for (channel, uid), item in zip(pairs, batch):
+            assert item["channel"] == channel
+            assert item["uid"] == uid
+            assert item["token"] == build_token_with_rtm(channel, str(uid), test_constants)["token"]
+
+    def test_without_certificate(self, test_constants):
+        """Test that APP_ID is returned when there is no certificate"""
+        constants = dict(test_constants, APP_CERTIFICATE="")
+
+        batch = build_tokens_batch([("a", "1"), ("b", "2")], constants)
+
+        assert [item["token"] for item in batch] == [constants["APP_ID"]] * 2
+
+    def test_process_pool(self, test_constants, monkeypatch):
+        """Test that large batches fanned out over processes keep input order"""
+        monkeypatch.setattr("core.tokens.PROCESS_POOL_THRESHOLD", 10)
+        pairs = [(f"channel{i}", str(i)) for i in range(40)]
+
+        batch = build_tokens_batch(pairs, test_constants, processes=2)
+
+        assert [(item["channel"], item["uid"]) for item in batch] == pairs
+        assert len({item["token"] for item in batch}) == 40
+
+    def test_concurrent_batches_with_different_process_counts(self, test_constants, monkeypatch):
+        """Test that batches for profiles with different pool sizes don't break each other"""
+        import core.tokens
+        monkeypatch.setattr("core.tokens.PROCESS_POOL_THRESHOLD", 10)
+        pairs = [(f"channel{i}", str(i)) for i in range(40)]
+        results, errors = [], []
+
+        def run(processes):
+            try:
+                for _ in range(3):
+                    results.append(build_tokens_batch(pairs, test_constants, processes=processes))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(processes,)) for processes in (2, 3, 2, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(results) == 12
+        assert all([(item["channel"], item["uid"]) for item in batch] == pairs for batch in results)
+        assert {2, 3} <= set(core.tokens._process_pools)
+
+    @pytest.mark.parametrize("body", [
+        None,
+        {"tokens": []},
+        {"tokens": [{"channel": "a"}]},
+        {"tokens": [{"uid": "1"}]},
+        {"tokens": [{"channel": "a", "uid": "1"}] * 10001},
+        {"tokens": [{"channel": 7, "uid": "1"}]},
+        {"tokens": [{"channel": ["a"], "uid": "1"}]},
+        {"tokens": [{"channel": "a", "uid": 1.5}]},
+        {"tokens": [{"channel": "a", "uid": True}]},
+        {"tokens": [{"channel": "a", "uid": {"id": 1}}]},
+    ])
+    def test_validate_rejects_invalid(self, body):
+        """Test that malformed batch bodies are rejected"""
+        assert validate_token_batch(body) is not None
+
+    def test_validate_accepts_int_and_str_uids(self):
+        """Test that integer and string uids are both valid"""
+        assert validate_token_batch({"tokens": [{"channel": "a", "uid": 1}, {"channel": "b", "uid": "2"}]}) is None
+
+
+def build_reference_token(constants, channel, uid, issue_ts, salt):
+    """Builds a token the original way, with AccessToken and a fixed salt"""
+    token = AccessToken(constants["APP_ID"], constants["APP_CERTIFICATE"], issue_ts=issue_ts)
+    token._AccessToken__salt = salt
+
+    rtc_service = ServiceRtc(channel, uid)
+    for privilege in (ServiceRtc.kPrivilegeJoinChannel, ServiceRtc.kPrivilegePublishAudioStream,
+                      ServiceRtc.kPrivilegePublishVideoStream, ServiceRtc.kPrivilegePublishDataStream):
+        rtc_service.add_privilege(privilege, constants["PRIVILEGE_EXPIRE"])
+    token.add_service(rtc_service)
+
+    rtm_service = ServiceRtm(str(uid))
+    rtm_service.add_privilege(ServiceRtm.kPrivilegeLogin, constants["TOKEN_EXPIRE"])
+    token.add_service(rtm_service)
+
+    return token.build()
+
+
+@pytest.mark.unit
+class TestTokenMinter:
+    """Tests for TokenMinter class"""
+
+    @pytest.mark.parametrize("channel,uid", [
+        ("test_channel", "101"),
+        ("ÜNICODE-канал", "user@example.com"),
+        ("", "102"),
+        ("channel", 0),
+        ("channel", 12345),
+    ])
+    def test_byte_compatible_with_access_token(self, test_constants, channel, uid):
+        """Test that minted tokens equal AccessToken output for the same salt and timestamp"""
+        minter = TokenMinter(test_constants["APP_ID"], test_constants["APP_CERTIFICATE"],
+                             test_constants["PRIVILEGE_EXPIRE"], test_constants["TOKEN_EXPIRE"])
+
+        expected = build_reference_token(test_constants, channel, uid, 1700000000, 98765432)
+
+        assert minter.mint(channel, uid, issue_ts=1700000000, salt=98765432) == expected
+        assert minter.mint_many([(channel, uid)], issue_ts=1700000000, salt=98765432) == [expected]
+
+    def test_signing_key_cache_tracks_timestamp(self, test_constants):
+        """Test that a new issue timestamp re-derives the signing key"""
+        minter = get_minter(test_constants)
+
+        for issue_ts in (1700000000, 1700000001, 1700000000):
+            assert minter.mint("c", "1", issue_ts=issue_ts, salt=7) == \
+                build_reference_token(test_constants, "c", "1", issue_ts, 7)
+
+    def test_get_minter_is_cached(self, test_constants):
+        """Test that minters are reused per app id and certificate"""
+        assert get_minter(test_constants) is get_minter(dict(test_constants))
+        assert get_minter(test_constants) is not get_minter(dict(test_constants, PRIVILEGE_EXPIRE=60))
+
+    def test_invalid_credentials_return_empty_token(self, test_constants):
+        """Test that malformed credentials behave like AccessToken.build()"""
+        constants = dict(test_constants, APP_ID="not-a-uuid")
+
+        assert build_token_with_rtm("c", "1", constants)["token"] == ""
+
+    def test_salt_pool_range(self):
+        """Test that pooled salts stay within the AccessToken salt range"""
+        pool = SaltPool(block_size=16)
+
+        salts = [pool.next() for _ in range(100)]
+
+        assert all(1 <= salt <= 99999999 for salt in salts)
+        assert len(set(salts)) > 90
+
+
+@pytest.mark.unit
+class TestTokenCache:
+    """Tests for TokenCache class"""
+
+    def test_hit_returns_same_token(self, test_constants):
+        """Test that a second lookup with plenty of lifetime left is a hit"""
+        cache = TokenCache(min_remaining=60)
+
+        first = cache.get_or_mint("channel", "101", test_constants)
+        second = cache.get_or_mint("channel", "101", test_constants)
+
+        assert first == second
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_key_includes_profile_channel_and_uid(self, test_constants):
+        """Test that different profiles, channels and uids do not share tokens"""
+        cache = TokenCache()
+
+        cache.get_or_mint("channel", "101", test_constants)
+        cache.get_or_mint("channel", "101", test_constants, profile="sales")
+        cache.get_or_mint("other", "101", test_constants)
+        cache.get_or_mint("channel", "102", test_constants)
+
+        assert cache.misses == 4
+        assert cache.stats()["size"] == 4
+
+    def test_remints_below_threshold(self, test_constants, monkeypatch):
+        """Test that a token is re-minted once remaining lifetime drops below the threshold"""
+        now = [1700000000.0]
+        monkeypatch.setattr("core.tokens.time.time", lambda: now[0])
+        cache = TokenCache(min_remaining=300)
+        lifetime = get_minter(test_constants).lifetime
+
+        first = cache.get_or_mint("channel", "101", test_constants)
+        now[0] += lifetime - 301
+        assert cache.get_or_mint("channel", "101", test_constants) == first
+
+        now[0] += 2
+        assert cache.get_or_mint("channel", "101", test_constants) != first
+        assert cache.misses == 2
+
+    def test_lifetime_is_bounded_by_token_expire(self, test_constants):
+        """Test that the cache never trusts a token beyond its 900s expire field"""
+        assert get_minter(test_constants).lifetime == 900
+
+    def test_size_based_eviction(self, test_constants):
+        """Test that the least recently used entry is evicted at max_size"""
+        cache = TokenCache(max_size=2)
+
+        cache.get_or_mint("a", "1", test_constants)
+        cache.get_or_mint("b", "1", test_constants)
+        cache.get_or_mint("a", "1", test_constants)
+        cache.get_or_mint("c", "1", test_constants)
+        cache.get_or_mint("a", "1", test_constants)
+
+        stats = cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 2
+
+    def test_build_token_cached_without_certificate(self, test_constants):
+        """Test that APP_ID-only mode bypasses the cache"""
+        constants = dict(test_constants, APP_CERTIFICATE="")
+
+        assert build_token_cached("c", "1", constants) == {"token": constants["APP_ID"], "uid": "1"}
+
+
+@pytest.mark.unit
+class TestMintDuring:
+    """Tests for minting tokens alongside a blocking join"""
+
+    def test_mint_overlaps_join(self):
+        """Test that mint runs on another thread while join blocks"""
+        threads = []
+
+        def mint():
+            threads.append(threading.current_thread().name)
+            time.sleep(0.05)
+
+        started = time.perf_counter()
+        result, mint_seconds = mint_during(lambda: time.sleep(0.1) or "joined", mint)
+        elapsed = time.perf_counter() - started
+
+        assert result == "joined"
+        assert mint_seconds >= 0.05
+        assert elapsed < 0.14
+        assert threads[0].startswith("mint")
+
+    def test_mint_errors_are_raised(self):
+        """Test that a failed mint is not swallowed"""
+        def mint():
+            raise ValueError("bad certificate")
+
+        with pytest.raises(ValueError):
+            mint_during(lambda: "joined", mint)
+
+    def test_mint_awaited_and_logged_when_join_fails(self, log_stream):
+        """Test that a mint failing alongside a failed join is waited for and logged"""
+        def join():
+            raise ConnectionError("refused")
+
+        def mint():
+            time.sleep(0.05)
+            raise ValueError("bad certificate")
+
+        with pytest.raises(ConnectionError):
+            mint_during(join, mint)
+
+        assert "Token minting failed during a failed join" in log_stream.getvalue()
+        assert "ValueError: bad certificate" in log_stream.getvalue()
@@ -0,0 +1,201 @@
+"""Tests for core.transport module and the async agent API"""
+
+import asyncio
+import json
+import time
+import pytest
+from core.transport import AsyncioTransport, FakeTransport, PooledTransport, Response
+from core.pool import ConnectionPool
+from core.agent import (
+    send_agent_to_channel,
+    send_agent_to_channel_async,
+    hangup_agent,
+    hangup_agent_async,
+)
+
+
+PAYLOAD = {
+    "name": "test",
+    "properties": {"advanced_features": {"enable_rtm": True, "enable_bhvs": True}}
+}
+
+
+@pytest.mark.unit
+class TestFakeTransport:
+    """Tests for the in-memory FakeTransport"""
+
+    def test_records_and_replays(self):
+        """Test that scripted responses are returned in order"""
+        transport = FakeTransport()
+        transport.script(500, "boom")
+
+        first = transport.request("POST", "https://example.com/join", "{}")
+        second = transport.request("POST", "https://example.com/join", "{}")
+
+        assert first.status == 500
+        assert first.body == b"boom"
+        assert second.status == 200
+        assert len(transport.requests) == 2
+
+    def test_handler(self):
+        """Test that a handler callable builds responses"""
+        transport = FakeTransport(handler=lambda method, url, body, headers: (404, "missing"))
+
+        response = asyncio.run(transport.request_async("GET", "https://example.com/x"))
+
+        assert response == Response(404, {}, b"missing")
+
+
+@pytest.mark.unit
+class TestAsyncioTransport:
+    """Tests for AsyncioTransport against a local stand-in server"""
+
+    def test_keep_alive_reuse(self, upstream):
+        """Test that sequential async requests reuse one connection"""
+        async def run():
+            transport = AsyncioTransport()
+            responses = [await transport.request_async("POST", f"{upstream.base_url}/join", "{}")
+                         for _ in range(3)]
+            await transport.close()
+            return transport, responses
+
+        transport, responses = asyncio.run(run())
+
+        assert [r.status for r in responses] == [200, 200, 200]
+        assert json.loads(responses[0].body)["agent_id"] == "agent_123"
+        assert transport.stats["created"] == 1
+        assert len({r["client_port"] for r in upstream.requests}) == 1
+
+    def test_https(self, https_upstream):
+        """Test async requests over TLS"""
+        server, client_context = https_upstream
+
+        async def run():
+            transport = AsyncioTransport(ssl_context=client_context)
+            response = await transport.request_async("GET", f"{server.base_url}/agents")
+            await transport.close()
+            return response
+
+        assert asyncio.run(run()).status == 200
+
+    def test_connection_close_header(self, upstream):
+        """Test that Connection: close responses are not pooled"""
+        upstream.close_connections = True
+
+        async def run():
+            transport = AsyncioTransport()
+            await transport.request_async("GET", f"{upstream.base_url}/a")
+            await transport.request_async("GET", f"{upstream.base_url}/b")
+            return transport
+
+        assert asyncio.run(run()).stats["created"] == 2
+
+    def test_bodyless_responses_on_kept_alive_connection(self):
+        """Test that 204, 304 and HEAD responses don't wait for the connection to close"""
+        async def handle(reader, writer):
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if request.startswith(b"HEAD"):
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n")
+                elif b" /cached " in request:
+                    writer.write(b"HTTP/1.1 304 Not Modified\r\n\r\n")
+                else:
+                    writer.write(b"HTTP/1.1 204 No Content\r\n\r\n")
+                await writer.drain()
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            base_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            transport = AsyncioTransport(timeout=2)
+            started = time.monotonic()
+            responses = [await transport.request_async("DELETE", f"{base_url}/agent"),
+                         await transport.request_async("GET", f"{base_url}/cached"),
+                         await transport.request_async("HEAD", f"{base_url}/agent")]
+            elapsed = time.monotonic() - started
+            await transport.close()
+            server.close()
+            return transport, responses, elapsed
+
+        transport, responses, elapsed = asyncio.run(run())
+
+        assert [(r.status, r.body) for r in responses] == [(204, b""), (304, b""), (200, b"")]
+        assert elapsed < 1
+        assert transport.stats["created"] == 1
+
+    def test_timeout_is_one_deadline(self):
+        """Test that connecting and the exchange share the request timeout"""
+        async def handle(reader, writer):
+            await asyncio.sleep(1)
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            transport = AsyncioTransport(timeout=0.3)
+            open_connection = transport._open
+
+            async def slow_open(*args):
+                await asyncio.sleep(0.2)
+                return await open_connection(*args)
+
+            transport._open = slow_open
+            started = time.monotonic()
+            with pytest.raises(TimeoutError):
+                await transport.request_async("GET", f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/")
+            elapsed = time.monotonic() - started
+            server.close()
+            return elapsed
+
+        assert asyncio.run(run()) < 0.45
+
+
+@pytest.mark.unit
+class TestAgentLifecycleTransports:
+    """Tests that sync and async agent functions share request building"""
+
+    def test_sync_and_async_send_identical_requests(self, test_constants):
+        """Test that the sync wrapper and async variant send the same request"""
+        sync_transport = FakeTransport()
+        async_transport = FakeTransport()
+
+        sync_result = send_agent_to_channel("test", PAYLOAD, test_constants, transport=sync_transport)
+        async_result = asyncio.run(
+            send_agent_to_channel_async("test", PAYLOAD, test_constants, transport=async_transport))
+
+        assert sync_result == async_result
+        assert sync_transport.requests == async_transport.requests
+        assert sync_transport.requests[0]["url"].endswith(f"/{test_constants['APP_ID']}/join")
+
+    def test_hangup_sync_and_async(self, test_constants):
+        """Test hangup over both transports"""
+        transport = FakeTransport()
+
+        hangup_agent("abc", test_constants, transport=transport)
+        asyncio.run(hangup_agent_async("abc", test_constants, transport=transport))
+
+        assert [r["url"] for r in transport.requests] == [
+            f"{test_constants['AGENT_API_BASE_URL']}/{test_constants['APP_ID']}/agents/abc/leave"] * 2
+
+    def test_many_concurrent_async_starts(self, test_constants, capsys):
+        """Test that slow joins overlap on one event loop"""
+        transport = FakeTransport(delay=0.2)
+
+        async def run():
+            return await asyncio.gather(*[
+                send_agent_to_channel_async(f"ch{i}", PAYLOAD, test_constants, transport=transport)
+                for i in range(500)
+            ])
+
+        started = time.monotonic()
+        results = asyncio.run(run())
+        elapsed = time.monotonic() - started
+
+        assert all(r["success"] for r in results)
+        assert elapsed < 5
+
+    def test_blocking_transport_from_async(self, upstream, test_constants):
+        """Test that a blocking transport can serve the async API via the executor"""
+        constants = dict(test_constants, AGENT_API_BASE_URL=upstream.base_url)
+        transport = PooledTransport(ConnectionPool())
+
+        result = asyncio.run(send_agent_to_channel_async("test", PAYLOAD, constants, transport=transport))
+
+        assert result["success"] is True
@@ -0,0 +1,141 @@
+"""Tests for core.warmpool module and warm /start-agent"""
+
+import pytest
+from core.config import get_constants
+from core.warmpool import WarmPool, WarmPools, can_use_warm_channel, take_warm_channel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def constants(agent_env):
+    return get_constants()
+
+
+def make_pool(constants, depth=2, max_age=60):
+    pool = WarmPool(constants, depth, max_age)
+    clock = FakeClock()
+    pool.clock = clock
+    return pool, clock
+
+
+@pytest.mark.unit
+class TestWarmPool:
+    """Tests for preparing, taking and expiring warm channels"""
+
+    def test_fill_and_take(self, constants):
+        """Test that fill prepares channels with tokens and a rendered payload"""
+        pool, _ = make_pool(constants)
+
+        assert pool.fill() == 2
+        warm = pool.take()
+
+        assert len(warm.channel) == 10
+        assert warm.user_token["token"].startswith("007")
+        assert warm.agent_payload.to_dict()["properties"]["channel"] == warm.channel
+        assert pool.stats()["size"] == 1
+        assert pool.fill() == 1
+
+    def test_empty_pool_misses(self, constants):
+        """Test that an empty pool returns None and counts a miss"""
+        pool, _ = make_pool(constants)
+
+        assert pool.take() is None
+        assert pool.stats()["misses"] == 1
+
+    def test_expired_channels_dropped(self, constants):
+        """Test that channels past max_age are never handed out"""
+        pool, clock = make_pool(constants, max_age=60)
+        pool.fill()
+
+        clock.now += 61
+
+        assert pool.take() is None
+        assert pool.stats()["expired"] == 2
+
+    def test_max_age_capped_by_token_lifetime(self, constants):
+        """Test that channels expire before their tokens drop below the cache threshold"""
+        pool, clock = make_pool(constants, depth=1, max_age=10 ** 6)
+        pool.fill()
+
+        warm = pool.take()
+
+        assert warm.expires_at - clock.now <= 900 - 300
+
+
+@pytest.mark.unit
+class TestWarmPools:
+    """Tests for the per-profile pools"""
+
+    def test_disabled_by_default(self, constants):
+        """Test that take returns None without WARM_POOL_SIZE"""
+        assert take_warm_channel(constants, {}) is None
+
+    def test_take_after_fill(self, constants):
+        """Test that a filled pool serves the next request"""
+        pools = WarmPools(depth=1, interval=3600)
+        assert pools.take(constants) is None
+        pools.fill()
+
+        warm = pools.take(constants)
+
+        assert warm is not None
+        assert pools.stats()[""]["hits"] == 1
+
+    def test_reload_discards_old_pool(self, constants, monkeypatch):
+        """Test that channels prepared with an old config are not handed out"""
+        from core.config import reload_profiles
+        pools = WarmPools(depth=1, interval=3600)
+        pools.warm(constants)
+        pools.fill()
+
+        monkeypatch.setenv("DEFAULT_GREETING", "Changed")
+        reload_profiles()
+
+        assert pools.take(get_constants()) is None
+
+    def test_only_listed_profiles_pooled(self, constants, monkeypatch):
+        """Test that profiles outside WARM_POOL_PROFILES get no pool"""
+        monkeypatch.setenv("SALES_DEFAULT_GREETING", "Sales")
+        monkeypatch.setenv("SUPPORT_DEFAULT_GREETING", "Support")
+        from core.config import reload_profiles
+        reload_profiles()
+        pools = WarmPools(depth=1, interval=3600, profiles=["sales"])
+
+        pools.warm(get_constants("sales"))
+        assert pools.take(get_constants("support")) is None
+        pools.fill()
+
+        assert sorted(pools.stats()) == ["SALES"]
+        assert pools.take(get_constants("sales")) is not None
+
+    def test_payload_overrides_skip_pool(self):
+        """Test which requests can use a warm channel"""
+        assert can_use_warm_channel({"profile": "sales", "debug": ""})
+        assert not can_use_warm_channel({"channel": "mine"})
+        assert not can_use_warm_channel({"voice_id": "nova"})
+
+
+@pytest.mark.integration
+class TestWarmStartAgent:
+    """Tests for /start-agent served from the warm pool"""
+
+    def test_start_uses_warm_channel(self, client, agent_env, fake_transport, monkeypatch):
+        """Test that a request without channel gets a pre-warmed one"""
+        monkeypatch.setenv("WARM_POOL_SIZE", "1")
+        from core.warmpool import get_warm_pools
+        pools = get_warm_pools()
+        pools.warm(get_constants())
+        pools.fill()
+        warm_channel = pools._pools[None]._channels[0].channel
+
+        response = client.get('/start-agent')
+
+        assert response.json['channel'] == warm_channel
+        assert warm_channel in fake_transport.requests[0]['body']
@@ -0,0 +1,154 @@
+"""Tests for core.warmup, local_server.warm_worker and gunicorn.conf.py"""
+
+import json
+import os
+import runpy
+import subprocess
+import sys
+import pytest
+from core.pool import get_pool
+from core.templates import get_template_cache
+from core.warmup import warm_up
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    """An empty process-wide connection pool"""
+    monkeypatch.setattr("core.pool._default_pool", None)
+    yield get_pool()
+    get_pool().close()
+
+
+@pytest.mark.unit
+class TestWarmUp:
+    """Tests for warming a process before it takes traffic"""
+
+    def test_warms_profiles_and_connections(self, agent_env, upstream, fresh_pool, monkeypatch):
+        """Test that every profile is compiled and connections are opened once per host"""
+        monkeypatch.setenv("AGENT_API_BASE_URL", upstream.base_url)
+        monkeypatch.setenv("SALES_TTS_VENDOR", "openai")
+        misses = get_template_cache().stats()["misses"]
+
+        summary = warm_up(connections=2)
+
+        assert summary["profiles"] == 2
+        assert summary["connections"] == 2
+        assert summary["problems"] == []
+        assert get_template_cache().stats()["misses"] == misses + 2
+        assert fresh_pool.idle_count() == 2
+
+    def test_problems_do_not_stop_startup(self, agent_env, upstream, fresh_pool, monkeypatch):
+        """Test that an invalid profile and an unreachable upstream are reported"""
+        url = upstream.base_url
+        upstream.stop()
+        monkeypatch.setenv("AGENT_API_BASE_URL", url)
+        monkeypatch.setenv("BAD_TTS_VENDOR", "unknown")
+
+        summary = warm_up(connections=1, connect_timeout=1)
+
+        assert summary["connections"] == 0
+        assert any(problem.startswith("BAD:") for problem in summary["problems"])
+        assert any(problem.startswith(url) for problem in summary["problems"])
+
+    def test_connections_disabled(self, agent_env, fresh_pool, monkeypatch):
+        """Test that WARMUP_CONNECTIONS=0 opens nothing"""
+        monkeypatch.setenv("WARMUP_CONNECTIONS", "0")
+
+        assert warm_up()["connections"] == 0
+        assert fresh_pool.idle_count() == 0
+
+    def test_warm_worker_fills_warm_pools(self, agent_env, monkeypatch):
+        """Test that the server warm-up also creates the warm channel pools"""
+        from local_server import warm_worker
+        monkeypatch.setenv("WARMUP_CONNECTIONS", "0")
+        monkeypatch.setenv("WARM_POOL_SIZE", "1")
+
+        summary = warm_worker()
+
+        assert summary["warm_pool_depth"] == 1
+        assert "" in __import__("core.warmpool").warmpool.get_warm_pools().stats()
+
+
+@pytest.mark.unit
+class TestGunicornConfig:
+    """Tests for the production serving settings"""
+
+    def load(self, monkeypatch, **environ):
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(os.path.join(BACKEND_DIR, "gunicorn.conf.py"))
+
+    def test_defaults(self, monkeypatch):
+        """Test the worker model and recycling defaults"""
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        config = self.load(monkeypatch, PORT="9000")
+
+        assert config["wsgi_app"] == "local_server:app"
+        assert config["bind"] == "0.0.0.0:9000"
+        assert config["worker_class"] == "gthread"
+        assert config["workers"] == (os.cpu_count() or 1)
+        assert config["max_requests"] > 0 and config["max_requests_jitter"] > 0
+        assert config["preload_app"] is False
+
+    def test_environment_overrides(self, monkeypatch):
+        """Test sizing from the environment"""
+        config = self.load(monkeypatch, WEB_CONCURRENCY="3", GUNICORN_THREADS="4", GUNICORN_MAX_REQUESTS="0")
+
+        assert (config["workers"], config["threads"], config["max_requests"]) == (3, 4, 0)
+
+    def test_reads_env_file_without_exporting_it(self, monkeypatch, tmp_path):
+        """Test that settings come from .env but the master's environment stays clean"""
+        env_file = tmp_path / ".env"
+        env_file.write_text("GUNICORN_THREADS=3\nDEFAULT_GREETING=Hello\n")
+        monkeypatch.delenv("GUNICORN_THREADS", raising=False)
+        monkeypatch.setattr("dotenv.find_dotenv", lambda *args, **kwargs: str(env_file))
+
+        config = self.load(monkeypatch)
+
+        assert config["threads"] == 3
+        assert "DEFAULT_GREETING" not in os.environ
+
+    def test_config_reload_in_worker(self, tmp_path):
+        """Test that a worker started under the gunicorn config reloads edited .env values"""
+        env_file = tmp_path / ".env"
+        env_file.write_text("APP_ID=abcdef1234567890abcdef1234567890\nDEFAULT_GREETING=Hello\n"
+                            "DEFAULT_PROMPT=From env file\n")
+        script = f"""
+import json, os, runpy, dotenv
+dotenv.find_dotenv = lambda *args, **kwargs: {str(env_file)!r}
+runpy.run_path("gunicorn.conf.py")  # the master
+import local_server  # a worker, forked from the master
+from core.config import get_constants
+before = get_constants(None)["DEFAULT_GREETING"]
+with open({str(env_file)!r}, "w") as f:
+    f.write("APP_ID=abcdef1234567890abcdef1234567890\\nDEFAULT_GREETING=Changed\\nDEFAULT_PROMPT=Edited\\n")
+response = local_server.app.test_client().post(
+    "/admin/reload-config", headers={{"Authorization": "Bearer secret"}})
+constants = get_constants(None)
+print(json.dumps([before, response.status_code, constants["DEFAULT_GREETING"], constants["DEFAULT_PROMPT"]]))
+"""
+        environ = dict(os.environ, ADMIN_TOKEN="secret", DEFAULT_PROMPT="From shell", CONFIG_WATCH="false",
+                       LOG_LEVEL="ERROR")
+        environ.pop("DEFAULT_GREETING", None)
+
+        output = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=environ,
+                                capture_output=True, text=True, timeout=60, check=True).stdout
+
+        # .env edits are picked up; variables set in the shell still win
+        assert json.loads(output.splitlines()[-1]) == ["Hello", 200, "Changed", "From shell"]
+
+    def test_post_worker_init_warms(self, monkeypatch):
+        """Test that each worker runs warm_worker before serving"""
+        calls = []
+        monkeypatch.setattr("local_server.warm_worker", lambda: calls.append(1) or {
+            "duration_ms": 1.0, "profiles": 1, "connections": 0})
+
+        class Worker:
+            pid = 42
+            log = type("Log", (), {"info": lambda self, *args: calls.append(args)})()
+
+        self.load(monkeypatch)["post_worker_init"](Worker())
+
+        assert calls[0] == 1 and calls[1][1] == 42
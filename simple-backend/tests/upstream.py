@@ -0,0 +1,122 @@
+"""Local HTTP(S) stand-in for the Agora ConvoAI REST API used by tests"""
+
+import json
+import os
+import socket
+import ssl
+import struct
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        server = self.server
+        server.requests.append({
+            "method": self.command,
+            "path": self.path,
+            "headers": dict(self.headers),
+            "body": body,
+            "client_port": self.client_address[1],
+        })
+
+        with server.lock:
+            scripted = server.scripted.pop(0) if server.scripted else None
+        status, payload, headers, delay = scripted or (200, {"agent_id": "agent_123", "status": "RUNNING"}, {}, 0)
+
+        if delay:
+            time.sleep(delay)
+        if status is None:
+            # Abort with a TCP reset instead of answering
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.close_connection = True
+            return
+
+        if callable(payload):
+            payload = payload(self, body)
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if server.close_connections:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_DELETE = _handle
+
+
+class UpstreamServer(ThreadingHTTPServer):
+    """
+    Threaded stand-in server that records requests and replays scripted
+    (status, payload, headers, delay) responses in order, then falls back to
+    a 200 join response. A scripted status of None resets the connection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, ssl_context=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        if ssl_context is not None:
+            self.socket = ssl_context.wrap_socket(self.socket, server_side=True)
+        self.scheme = "https" if ssl_context is not None else "http"
+        self.requests = []
+        self.scripted = []
+        self.close_connections = False
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"{self.scheme}://127.0.0.1:{self.server_address[1]}"
+
+    def script(self, status, payload=None, headers=None, delay=0):
+        self.scripted.append((status, payload if payload is not None else {}, headers or {}, delay))
+
+    def script_reset(self, delay=0):
+        self.script(None, delay=delay)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def make_self_signed_context(directory):
+    """
+    Creates a self-signed certificate with openssl and returns
+    (server_context, client_context), or None if openssl is unavailable.
+    """
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    try:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+             "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert, key)
+    client_context = ssl.create_default_context(cafile=cert)
+    return server_context, client_context
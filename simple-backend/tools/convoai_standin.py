@@ -0,0 +1,503 @@
+"""
+Local stand-in for the Agora Conversational AI REST API
+
+Serves the join, leave, update, query and list endpoints at the same URL
+shape as api.agora.io, keeps the state of every agent it started, and can
+inject latency, errors, 429s with Retry-After and connection resets. Point
+the backend at it with AGENT_API_BASE_URL to run and load-test offline:
+
+    python3 tools/convoai_standin.py --port 8090 --latency join=lognormal:0.6,0.4 --error-rate 0.01
+    AGENT_API_BASE_URL=http://127.0.0.1:8090/api/conversational-ai-agent/v2/projects python3 local_server.py
+
+Latency specs (seconds): fixed:0.2 (or just 0.2), uniform:0.1,0.5,
+normal:mean,stddev, lognormal:median,sigma, exponential:mean. Latency and
+rate options take an optional endpoint prefix (join=, leave=, update=,
+query=, list=) and can be repeated; without one they apply to every
+endpoint.
+
+Control endpoints (not part of the Agora API):
+    GET  /_standin/stats   Request counts by endpoint and outcome, agent counts
+    POST /_standin/faults  Replaces the fault settings, same keys as Faults()
+    POST /_standin/reset   Forgets all agents and counters
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_PATH = "/api/conversational-ai-agent/v2/projects"
+ENDPOINTS = ("join", "leave", "update", "query", "list")
+
+# Agora agent states: list filters use the numeric code, responses the name
+STATES = ("IDLE", "STARTING", "RUNNING", "STOPPING", "STOPPED", "RECOVERING", "FAILED")
+
+_ROUTE = re.compile(r"^.*/(?P<appid>[^/]+)/(?:(?P<join>join)|agents(?:/(?P<agent_id>[^/]+)(?:/(?P<action>leave|update))?)?)$")
+
+
+def parse_latency(spec):
+    """
+    Parses a latency distribution spec into a sampler.
+
+    Args:
+        spec: e.g. "0.2", "fixed:0.2", "uniform:0.1,0.5", "normal:0.3,0.05",
+            "lognormal:0.3,0.5" (median, sigma) or "exponential:0.3" (mean)
+
+    Returns:
+        Callable taking a random.Random and returning seconds (never negative)
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    kind, _, args = spec.partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    try:
+        values = [float(value) for value in args.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec}") from None
+    shapes = {
+        "fixed": (1, lambda rng, value: value),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean)),
+    }
+    if kind not in shapes or len(values) != shapes[kind][0] or any(value < 0 for value in values):
+        raise ValueError(f"Invalid latency spec: {spec}")
+    if kind in ("lognormal", "exponential") and values[0] == 0:
+        raise ValueError(f"Invalid latency spec: {spec}")
+    sample = shapes[kind][1]
+    return lambda rng: max(0.0, sample(rng, *values))
+
+
+def per_endpoint(values, parse=float):
+    """
+    Parses "[ENDPOINT=]VALUE" options into {endpoint or "*": parsed value}.
+
+    Raises:
+        ValueError: If an endpoint name is unknown
+    """
+    parsed = {}
+    for value in values or ():
+        endpoint, sep, rest = value.partition("=")
+        if not sep:
+            endpoint, rest = "*", value
+        elif endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint!r}, expected one of {', '.join(ENDPOINTS)}")
+        parsed[endpoint] = parse(rest)
+    return parsed
+
+
+class Faults:
+    """
+    Latency and failures to inject, per endpoint.
+
+    Dictionaries are keyed by endpoint name, with "*" applying to endpoints
+    without their own entry. Failures are drawn in the order reset, 429,
+    error, so their rates add up.
+
+    Args:
+        latency: {endpoint: latency spec}
+        error_rate: {endpoint: fraction answered with error_status}
+        error_status: Status code for injected errors (default 503)
+        rate_limit_rate: {endpoint: fraction answered with 429}
+        retry_after: Retry-After seconds sent with 429s (None to omit)
+        reset_rate: {endpoint: fraction whose connection is reset}
+        seed: Random seed, for reproducible runs
+    """
+
+    def __init__(self, latency=None, error_rate=None, error_status=503, rate_limit_rate=None,
+                 retry_after=1, reset_rate=None, seed=None):
+        self.latency = {endpoint: parse_latency(spec) for endpoint, spec in (latency or {}).items()}
+        self.error_rate = dict(error_rate or {})
+        self.error_status = error_status
+        self.rate_limit_rate = dict(rate_limit_rate or {})
+        self.retry_after = retry_after
+        self.reset_rate = dict(reset_rate or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, settings):
+        """Builds Faults from a JSON object; bare values apply to every endpoint."""
+        def endpoints(value):
+            return value if isinstance(value, dict) else ({"*": value} if value is not None else None)
+        return cls(
+            latency=endpoints(settings.get("latency")),
+            error_rate=endpoints(settings.get("error_rate")),
+            error_status=int(settings.get("error_status", 503)),
+            rate_limit_rate=endpoints(settings.get("rate_limit_rate")),
+            retry_after=settings.get("retry_after", 1),
+            reset_rate=endpoints(settings.get("reset_rate")),
+            seed=settings.get("seed"),
+        )
+
+    @staticmethod
+    def _lookup(table, endpoint, default):
+        return table.get(endpoint, table.get("*", default))
+
+    def decide(self, endpoint):
+        """
+        Draws the injected delay and failure for one request.
+
+        Returns:
+            Tuple of (delay seconds, failure), where failure is None, "reset",
+            "rate_limit" or "error"
+        """
+        with self._lock:
+            sampler = self._lookup(self.latency, endpoint, None)
+            delay = sampler(self._rng) if sampler else 0.0
+            draw = self._rng.random()
+        for failure, table in (("reset", self.reset_rate), ("rate_limit", self.rate_limit_rate),
+                               ("error", self.error_rate)):
+            rate = self._lookup(table, endpoint, 0.0)
+            if draw < rate:
+                return delay, failure
+            draw -= rate
+        return delay, None
+
+
+class AgentStore:
+    """
+    Agents started through the stand-in. Names are unique among running
+    agents of an app id, as on Agora (a duplicate join gets a 409).
+
+    Args:
+        max_stopped: Stopped agents kept for query/list before the oldest are
+            forgotten
+    """
+
+    def __init__(self, max_stopped=10000):
+        self.max_stopped = max_stopped
+        self._agents = OrderedDict()  # agent_id -> agent dict
+        self._running = {}  # (appid, name) -> agent_id
+        self._stopped = 0
+        self._lock = threading.Lock()
+
+    def join(self, appid, body):
+        """Starts an agent. Returns (status, response body)."""
+        if not isinstance(body, dict) or not body.get("name") or \
+                not isinstance(body.get("properties"), dict) or not body["properties"].get("channel"):
+            return 400, {"detail": "name and properties.channel are required", "reason": "InvalidRequest"}
+        with self._lock:
+            if (appid, body["name"]) in self._running:
+                return 409, {"detail": "task conflict", "reason": "TaskConflict"}
+            agent = {
+                "agent_id": uuid.uuid4().hex.upper(),
+                "appid": appid,
+                "name": body["name"],
+                "channel": body["properties"]["channel"],
+                "properties": body["properties"],
+                "status": "RUNNING",
+                "start_ts": int(time.time()),
+                "stop_ts": 0,
+            }
+            self._agents[agent["agent_id"]] = agent
+            self._running[(appid, agent["name"])] = agent["agent_id"]
+        return 200, {"agent_id": agent["agent_id"], "create_ts": agent["start_ts"], "status": "RUNNING"}
+
+    def _find(self, appid, agent_id):
+        agent = self._agents.get(agent_id)
+        return agent if agent is not None and agent["appid"] == appid else None
+
+    def leave(self, appid, agent_id):
+        """Stops a running agent. Returns (status, response body)."""
+        with self._lock:
+            agent = self._find(appid, agent_id)
+            if agent is None or agent["status"] != "RUNNING":
+                return 404, {"detail": "task not found", "reason": "TaskNotFound"}
+            agent["status"] = "STOPPED"
+            agent["stop_ts"] = int(time.time())
+            del self._running[(appid, agent["name"])]
+            self._stopped += 1
+            self._agents.move_to_end(agent_id)
+            while self._stopped > self.max_stopped:
+                oldest = next(a for a in self._agents.values() if a["status"] == "STOPPED")
+                del self._agents[oldest["agent_id"]]
+                self._stopped -= 1
+        return 200, {}
+
+    def update(self, appid, agent_id, body):
+        """Merges body["properties"] into a running agent. Returns (status, response body)."""
+        if not isinstance(body, dict) or not isinstance(body.get("properties"), dict):
+            return 400, {"detail": "properties is required", "reason": "InvalidRequest"}
+        with self._lock:
+            agent = self._find(appid, agent_id)
+            if agent is None or agent["status"] != "RUNNING":
+                return 404, {"detail": "task not found", "reason": "TaskNotFound"}
+            agent["properties"] = dict(agent["properties"], **body["properties"])
+        return 200, {"agent_id": agent_id, "create_ts": agent["start_ts"], "status": agent["status"]}
+
+    def query(self, appid, agent_id):
+        """Returns (status, response body) with an agent's state."""
+        with self._lock:
+            agent = self._find(appid, agent_id)
+            if agent is None:
+                return 404, {"detail": "task not found", "reason": "TaskNotFound"}
+            return 200, {"agent_id": agent_id, "start_ts": agent["start_ts"], "stop_ts": agent["stop_ts"],
+                         "status": agent["status"], "message": ""}
+
+    def list(self, appid, channel=None, state=None, limit=20, cursor=None):
+        """
+        Lists agents, newest first, as Agora's list endpoint does.
+
+        Args:
+            channel: Only agents on this channel
+            state: Only agents in this numeric state (2 is RUNNING)
+            limit: Page size
+            cursor: Opaque cursor from a previous page's meta.cursor
+        """
+        status = STATES[state] if state is not None and 0 <= state < len(STATES) else None
+        with self._lock:
+            agents = [agent for agent in reversed(self._agents.values())
+                      if agent["appid"] == appid
+                      and (channel is None or agent["channel"] == channel)
+                      and (status is None or agent["status"] == status)]
+        offset = int(cursor) if cursor and cursor.isdigit() else 0
+        page = agents[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(agents) else ""
+        return 200, {
+            "data": {
+                "count": len(page),
+                "list": [{"agent_id": a["agent_id"], "start_ts": a["start_ts"], "status": a["status"],
+                          "channel": a["channel"]} for a in page],
+            },
+            "meta": {"cursor": next_cursor, "total": len(agents)},
+            "status": "ok",
+        }
+
+    def stats(self):
+        """Returns the running and stopped agent counts."""
+        with self._lock:
+            return {"running": len(self._running), "stopped": self._stopped}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reset(self):
+        # Abort with a TCP reset instead of answering
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.close_connection = True
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _route(self, method, path):
+        """Returns (endpoint, appid, agent_id) or None."""
+        match = _ROUTE.match(path)
+        if match is None:
+            return None
+        appid, agent_id, action = match["appid"], match["agent_id"], match["action"]
+        if match["join"]:
+            endpoint = "join" if method == "POST" else None
+        elif agent_id is None:
+            endpoint = "list" if method == "GET" else None
+        elif action:
+            endpoint = action if method == "POST" else None
+        else:
+            endpoint = "query" if method == "GET" else None
+        return (endpoint, appid, agent_id) if endpoint else None
+
+    def _control(self, method, path):
+        server = self.server
+        if method == "GET" and path == "/_standin/stats":
+            return self._send(200, server.stats())
+        if method == "POST" and path == "/_standin/faults":
+            try:
+                server.faults = Faults.from_dict(self._body() or {})
+            except (TypeError, ValueError) as e:
+                return self._send(400, {"detail": str(e)})
+            return self._send(200, {"status": "ok"})
+        if method == "POST" and path == "/_standin/reset":
+            server.reset()
+            return self._send(200, {"status": "ok"})
+        self._send(404, {"detail": "not found"})
+
+    def _handle(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path.startswith("/_standin/"):
+            return self._control(self.command, url.path)
+
+        body = self._body() if self.command == "POST" else None
+        route = self._route(self.command, url.path)
+        if route is None:
+            return self._send(404, {"detail": "not found"})
+        endpoint, appid, agent_id = route
+        server = self.server
+
+        delay, failure = server.faults.decide(endpoint)
+        if delay:
+            time.sleep(delay)
+        if failure == "reset":
+            server.count(endpoint, "reset")
+            return self._reset()
+        if failure == "rate_limit":
+            server.count(endpoint, 429)
+            retry_after = server.faults.retry_after
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            return self._send(429, {"detail": "too many requests", "reason": "TooManyRequests"}, headers)
+        if failure == "error":
+            server.count(endpoint, server.faults.error_status)
+            return self._send(server.faults.error_status, {"detail": "injected error", "reason": "InternalError"})
+        if not self.headers.get("Authorization"):
+            server.count(endpoint, 401)
+            return self._send(401, {"detail": "missing Authorization header", "reason": "Unauthorized"})
+
+        store = server.store
+        if endpoint == "join":
+            status, payload = store.join(appid, body)
+        elif endpoint == "leave":
+            status, payload = store.leave(appid, agent_id)
+        elif endpoint == "update":
+            status, payload = store.update(appid, agent_id, body)
+        elif endpoint == "query":
+            status, payload = store.query(appid, agent_id)
+        else:
+            query = dict(urllib.parse.parse_qsl(url.query))
+            try:
+                state = int(query["state"]) if "state" in query else None
+                limit = int(query.get("limit", 20))
+            except ValueError:
+                status, payload = 400, {"detail": "state and limit must be integers", "reason": "InvalidRequest"}
+            else:
+                status, payload = store.list(appid, query.get("channel"), state, limit, query.get("cursor"))
+        server.count(endpoint, status)
+        self._send(status, payload)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Threaded stand-in server (one thread per connection, keep-alive).
+
+    Args:
+        address: (host, port) to listen on; port 0 picks a free port
+        faults: Faults to inject (default none)
+        verbose: Log each request to stderr
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address=("127.0.0.1", 0), faults=None, verbose=False):
+        super().__init__(address, _Handler)
+        self.faults = faults or Faults()
+        self.verbose = verbose
+        self.store = AgentStore()
+        self.counts = {}
+        self._counts_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Value for AGENT_API_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def count(self, endpoint, outcome):
+        key = f"{endpoint}:{outcome}"
+        with self._counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stats(self):
+        """Returns request counts ("endpoint:status" or "endpoint:reset") and agent counts."""
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {"requests": counts, "agents": self.store.stats()}
+
+    def reset(self):
+        """Forgets all agents and request counts."""
+        self.store = AgentStore(self.store.max_stopped)
+        with self._counts_lock:
+            self.counts = {}
+
+    def start(self):
+        """Serves from a daemon thread. Returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="convoai-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", action="append", metavar="[ENDPOINT=]SPEC",
+                        help="latency distribution, e.g. join=lognormal:0.6,0.4")
+    parser.add_argument("--error-rate", action="append", metavar="[ENDPOINT=]RATE",
+                        help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit-rate", action="append", metavar="[ENDPOINT=]RATE",
+                        help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429s")
+    parser.add_argument("--reset-rate", action="append", metavar="[ENDPOINT=]RATE",
+                        help="fraction of connections reset instead of answered")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible faults")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    try:
+        faults = Faults(
+            latency=per_endpoint(args.latency, str),
+            error_rate=per_endpoint(args.error_rate),
+            error_status=args.error_status,
+            rate_limit_rate=per_endpoint(args.rate_limit_rate),
+            retry_after=args.retry_after,
+            reset_rate=per_endpoint(args.reset_rate),
+            seed=args.seed,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = StandInServer((args.host, args.port), faults, verbose=args.verbose)
+    print(f"ConvoAI stand-in listening on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    print(f"AGENT_API_BASE_URL={server.base_url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
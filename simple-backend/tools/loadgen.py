@@ -0,0 +1,542 @@
+"""
+Load generator for /start-agent and /hangup-agent
+
+Drives local_server.py over HTTP, or lambda_handler in-process, with a mix
+of request kinds against the local ConvoAI stand-in, and reports latency
+percentiles, throughput, errors and the server's CPU and memory:
+
+    python3 tools/loadgen.py --duration 30 --concurrency 32
+    python3 tools/loadgen.py --rate 200 --mix token=50,join=30,avatar=10,hangup=10
+    python3 tools/loadgen.py --target lambda --concurrency 8
+    python3 tools/loadgen.py --target http://127.0.0.1:8081 --server-pid 1234
+
+By default the stand-in (tools/convoai_standin.py) and the server are started
+as subprocesses on free ports, with the fixed settings from
+benchmarks/harness.BENCH_ENV, so runs are reproducible on any Linux box.
+
+Request kinds:
+    token   GET /start-agent?connect=false
+    join    GET /start-agent
+    avatar  GET /start-agent?avatar_enabled=true&avatar_vendor=heygen
+    hangup  GET /hangup-agent?channel=... for a channel started earlier
+
+Without --rate, each of --concurrency workers sends requests back to back
+(closed loop). With --rate, requests arrive as a Poisson process (open loop)
+and latency is measured from the scheduled arrival, so queueing in the load
+generator counts against the server instead of being hidden.
+"""
+
+import argparse
+import collections
+import http.client
+import itertools
+import json
+import os
+import queue
+import random
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import BENCH_ENV, percentile  # noqa: E402
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+STANDIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "convoai_standin.py")
+STANDIN_BASE_PATH = "/api/conversational-ai-agent/v2/projects"
+
+KINDS = ("token", "join", "avatar", "hangup")
+KIND_PARAMS = {
+    "token": {"connect": "false"},
+    "join": {},
+    "avatar": {"avatar_enabled": "true", "avatar_vendor": "heygen"},
+}
+PERCENTILES = (50, 95, 99, 99.9)
+
+# Serves the Flask app without the debug reloader, so the server PID is the
+# process that handles requests
+DEFAULT_SERVER_CMD = (f"{shlex.quote(sys.executable)} -c "
+                      "\"from local_server import app; app.run(host='127.0.0.1', port={port}, threaded=True)\"")
+DEFAULT_STANDIN_ARGS = "--latency join=lognormal:0.2,0.3 --latency 0.02 --seed 1"
+
+
+def parse_mix(spec):
+    """
+    Parses "token=50,join=30,..." into {kind: weight}.
+
+    Raises:
+        ValueError: If a kind is unknown or no weight is positive
+    """
+    mix = {}
+    for item in spec.split(","):
+        kind, _, weight = item.strip().partition("=")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown request kind {kind!r}, expected one of {', '.join(KINDS)}")
+        mix[kind] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("The mix needs at least one positive weight")
+    return mix
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15.0, process=None):
+    """Waits until something accepts connections on the port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with status {process.returncode} before listening on {port}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+class ProcessMonitor:
+    """
+    Samples the CPU time and resident memory of a process and its
+    descendants (e.g. pre-forked workers) from /proc. Linux only.
+
+    Args:
+        pid: Root process id
+        interval: Seconds between memory samples (for the peak)
+        children: Include descendant processes
+    """
+
+    def __init__(self, pid, interval=0.5, children=True):
+        self.pid = pid
+        self.interval = interval
+        self.children = children
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self._cpu_started = 0.0
+
+    @staticmethod
+    def _stat(pid):
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces; fields resume after ")"
+            return f.read().rsplit(")", 1)[1].split()
+
+    def pids(self):
+        """Returns the root pid and all of its descendants."""
+        if not self.children:
+            return [self.pid]
+        children = collections.defaultdict(list)
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    children[int(self._stat(entry)[1])].append(int(entry))
+                except (OSError, IndexError):
+                    pass
+        found, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            found.append(pid)
+            pending.extend(children.get(pid, ()))
+        return found
+
+    def sample(self):
+        """Returns (cpu seconds, rss bytes) summed over the process tree."""
+        cpu = rss = 0
+        for pid in self.pids():
+            try:
+                fields = self._stat(pid)
+            except OSError:
+                continue
+            cpu += (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+            rss += int(fields[21]) * self.page_size
+        return cpu, rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.sample()[1])
+
+    def start(self):
+        self._cpu_started, rss = self.sample()
+        self.peak_rss = rss
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="process-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops sampling. Returns a dictionary of CPU and memory usage."""
+        self._stop.set()
+        self._thread.join()
+        cpu, rss = self.sample()
+        self.peak_rss = max(self.peak_rss, rss)
+        elapsed = time.monotonic() - self._started
+        return {
+            "pid": self.pid,
+            "processes": len(self.pids()),
+            "cpu_seconds": round(cpu - self._cpu_started, 2),
+            "cpu_percent": round((cpu - self._cpu_started) / elapsed * 100, 1) if elapsed else 0.0,
+            "rss_mb": round(rss / 2**20, 1),
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+        }
+
+
+def classify(status, body):
+    """
+    Returns None for a successful response, else a short error reason.
+
+    Args:
+        status: HTTP status (statusCode for Lambda)
+        body: Parsed JSON body, or None
+    """
+    if status != 200:
+        return f"http {status}"
+    agent_response = body.get("agent_response") if isinstance(body, dict) else None
+    if isinstance(agent_response, dict) and not agent_response.get("success", True):
+        if agent_response.get("circuit_open"):
+            return "circuit open"
+        return f"upstream {agent_response.get('status_code')}"
+    return None
+
+
+class HttpClient:
+    """One keep-alive connection to the server (one per worker)."""
+
+    def __init__(self, base_url, timeout=60):
+        url = urllib.parse.urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def call(self, path, params):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.conn.request("GET", f"{path}?{urllib.parse.urlencode(params)}")
+            response = self.conn.getresponse()
+            data = response.read()
+        except BaseException:
+            self.conn.close()
+            self.conn = None
+            raise
+        return response.status, json.loads(data) if data else None
+
+
+class LambdaClient:
+    """Calls lambda_handler in this process."""
+
+    def __init__(self):
+        from lambda_handler import lambda_handler
+        self.handler = lambda_handler
+
+    def call(self, path, params):
+        if path == "/hangup-agent":
+            params = dict(params, hangup="true")
+        response = self.handler({"queryStringParameters": params}, None)
+        return response["statusCode"], json.loads(response["body"])
+
+
+class LoadRun:
+    """
+    One load test: picks request kinds by weight, keeps the channels that
+    were started for later hangups, and records each request's outcome.
+
+    Args:
+        make_client: Callable returning a client (one per worker)
+        mix: {kind: weight}
+        seed: Random seed for the kind sequence and arrivals
+    """
+
+    def __init__(self, make_client, mix, seed=None):
+        self.make_client = make_client
+        self.kinds, self.weights = zip(*mix.items())
+        self.rng = random.Random(seed)
+        self.run_id = f"{os.getpid()}x{int(time.time()) % 100000}"
+        self.channels = itertools.count()
+        self.started_channels = collections.deque()
+        self.samples = collections.defaultdict(list)  # kind -> [latency seconds]
+        self.errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    def next_kind(self):
+        with self._lock:
+            return self.rng.choices(self.kinds, self.weights)[0]
+
+    def request_for(self, kind):
+        """Returns (path, params) for a request of this kind."""
+        if kind == "hangup":
+            try:
+                channel = self.started_channels.popleft()
+            except IndexError:
+                channel = f"load-{self.run_id}-idle"
+            return "/hangup-agent", {"channel": channel}
+        params = dict(KIND_PARAMS[kind], channel=f"load-{self.run_id}-{next(self.channels)}")
+        return "/start-agent", params
+
+    def execute(self, client, kind, scheduled=None):
+        """Sends one request and records it (latency from `scheduled` if given)."""
+        path, params = self.request_for(kind)
+        started = time.perf_counter()
+        try:
+            status, body = client.call(path, params)
+            error = classify(status, body)
+        except Exception as e:
+            error = type(e).__name__
+        latency = time.perf_counter() - (scheduled if scheduled is not None else started)
+        with self._lock:
+            self.samples[kind].append(latency)
+            if error:
+                self.errors[f"{kind}: {error}"] += 1
+        if error is None and kind in ("join", "avatar"):
+            self.started_channels.append(params["channel"])
+
+    def closed_loop(self, concurrency, duration, requests=None):
+        """Each worker sends back to back until the duration or request budget is used."""
+        deadline = time.perf_counter() + duration
+        budget = itertools.count() if requests else None
+
+        def worker():
+            client = self.make_client()
+            while time.perf_counter() < deadline:
+                if budget is not None and next(budget) >= requests:
+                    return
+                self.execute(client, self.next_kind())
+
+        self._run_workers(worker, concurrency)
+
+    def open_loop(self, rate, concurrency, duration, requests=None):
+        """Requests arrive at `rate` per second (Poisson) and wait for a free worker."""
+        arrivals = queue.Queue()
+
+        def worker():
+            client = self.make_client()
+            while True:
+                scheduled = arrivals.get()
+                if scheduled is None:
+                    return
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self.execute(client, self.next_kind(), scheduled)
+
+        threads = self._start_workers(worker, concurrency)
+        now = time.perf_counter()
+        deadline = now + duration
+        count = 0
+        while now < deadline and (not requests or count < requests):
+            arrivals.put(now)
+            count += 1
+            now += self.rng.expovariate(rate)
+            time.sleep(max(0.0, now - time.perf_counter()))
+        for _ in threads:
+            arrivals.put(None)
+        for thread in threads:
+            thread.join()
+
+    def _start_workers(self, worker, concurrency):
+        threads = [threading.Thread(target=worker, name=f"load-{i}", daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _run_workers(self, worker, concurrency):
+        for thread in self._start_workers(worker, concurrency):
+            thread.join()
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of seconds."""
+    ordered = sorted(samples)
+    summary = {f"p{pct:g}": round(percentile(ordered, pct) * 1000, 2) for pct in PERCENTILES}
+    summary["max"] = round(ordered[-1] * 1000, 2) if ordered else 0.0
+    summary["mean"] = round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0
+    return summary
+
+
+def report(run, elapsed, server=None, upstream=None, offered_rate=None):
+    """Builds the result dictionary for a finished LoadRun."""
+    everything = [latency for samples in run.samples.values() for latency in samples]
+    total = len(everything)
+    errors = sum(run.errors.values())
+    result = {
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "success_rps": round((total - errors) / elapsed, 1) if elapsed else 0.0,
+        "offered_rps": offered_rate,
+        "latency_ms": summarize(everything),
+        "by_kind": {},
+        "error_breakdown": dict(run.errors.most_common()),
+    }
+    for kind, samples in sorted(run.samples.items()):
+        kind_errors = sum(count for key, count in run.errors.items() if key.startswith(f"{kind}:"))
+        result["by_kind"][kind] = {"requests": len(samples), "errors": kind_errors, "latency_ms": summarize(samples)}
+    if server is not None:
+        result["server"] = server
+    if upstream is not None:
+        result["upstream"] = upstream
+    return result
+
+
+def print_report(result, out=None):
+    out = out or sys.stdout
+    columns = ["p50", "p95", "p99", "p99.9", "max"]
+    print(f"\n{result['requests']:,} requests in {result['duration_s']}s: "
+          f"{result['throughput_rps']:,} req/s ({result['success_rps']:,} ok/s), {result['errors']:,} errors", file=out)
+    if result["offered_rps"]:
+        print(f"Offered load: {result['offered_rps']:,} req/s", file=out)
+    print(f"\n{'kind':<10}{'requests':>10}{'errors':>8}" + "".join(f"{c + ' ms':>11}" for c in columns), file=out)
+    rows = list(result["by_kind"].items()) + [("all", {"requests": result["requests"], "errors": result["errors"],
+                                                       "latency_ms": result["latency_ms"]})]
+    for kind, row in rows:
+        print(f"{kind:<10}{row['requests']:>10,}{row['errors']:>8,}"
+              + "".join(f"{row['latency_ms'][c]:>11,.1f}" for c in columns), file=out)
+    if result["error_breakdown"]:
+        print("\nErrors:", file=out)
+        for reason, count in result["error_breakdown"].items():
+            print(f"  {count:>8,}  {reason}", file=out)
+    server = result.get("server")
+    if server:
+        print(f"\nServer (pid {server['pid']}, {server['processes']} process(es)): "
+              f"{server['cpu_percent']}% CPU ({server['cpu_seconds']}s), "
+              f"RSS {server['rss_mb']} MB, peak {server['peak_rss_mb']} MB"
+              + (f" ({server['note']})" if server.get("note") else ""), file=out)
+    upstream = result.get("upstream")
+    if upstream:
+        print(f"Upstream stand-in: {json.dumps(upstream['requests'], sort_keys=True)}", file=out)
+
+
+def start_standin(args_text):
+    """Starts the stand-in on a free port. Returns (process, base_url)."""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, STANDIN_SCRIPT, "--port", str(port), *shlex.split(args_text)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    wait_for_port(port, process=process)
+    return process, f"http://127.0.0.1:{port}{STANDIN_BASE_PATH}"
+
+
+def start_server(command, environ):
+    """Starts the server command ({port} is substituted). Returns (process, base_url)."""
+    port = free_port()
+    process = subprocess.Popen(shlex.split(command.format(port=port)), cwd=BACKEND_DIR, env=environ,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    wait_for_port(port, timeout=30, process=process)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def stop_process(process):
+    if process is not None and process.poll() is None:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)  # including pre-forked workers
+        except OSError:
+            process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def standin_stats(base_url):
+    url = urllib.parse.urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    try:
+        conn.request("GET", "/_standin/stats")
+        return json.loads(conn.getresponse().read())
+    except (OSError, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="spawn",
+                        help="'spawn' (start local_server.py), 'lambda' (in-process) or a server URL")
+    parser.add_argument("--server-cmd", default=DEFAULT_SERVER_CMD,
+                        help="command used by --target spawn; {port} is replaced")
+    parser.add_argument("--server-pid", type=int, help="pid to monitor when --target is a URL")
+    parser.add_argument("--upstream", help="existing stand-in base URL (default: start one)")
+    parser.add_argument("--standin-args", default=DEFAULT_STANDIN_ARGS,
+                        help="arguments for the started stand-in (latency and faults)")
+    parser.add_argument("--mix", default="token=40,join=40,avatar=10,hangup=10", help="kind=weight,...")
+    parser.add_argument("--concurrency", type=int, default=16, help="worker threads")
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate per second (default: closed loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=20, help="unrecorded requests sent first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    standin = server = None
+    try:
+        if args.upstream:
+            upstream_url = args.upstream
+        else:
+            standin, upstream_url = start_standin(args.standin_args)
+        environ = dict(os.environ, **BENCH_ENV, AGENT_API_BASE_URL=upstream_url)
+
+        if args.target == "lambda":
+            # Retry warnings would interleave with the report
+            os.environ.update(environ, LOG_LEVEL="ERROR")
+            make_client, monitor_pid = LambdaClient, os.getpid()
+        else:
+            if args.target == "spawn":
+                server, base_url = start_server(args.server_cmd, environ)
+                monitor_pid = server.pid
+            else:
+                base_url, monitor_pid = args.target, args.server_pid
+            make_client = lambda: HttpClient(base_url)  # noqa: E731
+
+        run = LoadRun(make_client, mix, seed=args.seed)
+        warmup_client = make_client()
+        for _ in range(args.warmup):
+            run.execute(warmup_client, run.next_kind())
+        run.samples.clear()
+        run.errors.clear()
+
+        monitor = None
+        if monitor_pid and os.path.isdir("/proc"):
+            monitor = ProcessMonitor(monitor_pid, children=args.target != "lambda").start()
+        started = time.perf_counter()
+        if args.rate:
+            run.open_loop(args.rate, args.concurrency, args.duration, args.requests)
+        else:
+            run.closed_loop(args.concurrency, args.duration, args.requests)
+        elapsed = time.perf_counter() - started
+        usage = monitor.stop() if monitor else None
+        if usage and args.target == "lambda":
+            usage["note"] = "in-process: includes the load generator"
+
+        result = report(run, elapsed, usage, standin_stats(upstream_url), args.rate)
+        result["target"] = args.target
+        result["concurrency"] = args.concurrency
+        print_report(result)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(result, f, indent=2)
+                f.write("\n")
+    finally:
+        stop_process(server)
+        stop_process(standin)
+
+
+if __name__ == "__main__":
+    main()